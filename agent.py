@@ -1,15 +1,33 @@
+import asyncio
 import logging
-import json
 import os
 import shutil
 import datetime
-from claude_agent_sdk import ClaudeAgentOptions, AssistantMessage, TextBlock, ToolUseBlock, ToolResultBlock, ClaudeSDKClient
+import time
+from dataclasses import dataclass
+from typing import Any, List, Optional
+from claude_agent_sdk import ClaudeAgentOptions, AssistantMessage, TextBlock, ToolUseBlock, ToolResultBlock, ClaudeSDKClient, ResultMessage, StreamEvent, UserMessage, query
 from dotenv import load_dotenv
+import tracing
 
 load_dotenv()
 
-# Import scheduler MCP server
+# Import scheduler and reading list MCP servers
 from scheduler.mcp_tools import create_scheduler_mcp_server
+from reading_list.mcp_tools import create_reading_list_mcp_server
+from usage import UsageTracker, context_tokens
+from chat_queue import ChatQueue, QueuedMessage
+from response_cache import (
+    ResponseCache, is_cacheable_turn, is_read_query,
+    DEFAULT_MAX_ENTRIES as DEFAULT_CACHE_ENTRIES, DEFAULT_TTL as DEFAULT_CACHE_TTL
+)
+from reading_list.shards import get_reading_store
+from reading_list.router import URL_RE
+from reading_list.metadata import get_metadata_fetcher, format_link_info
+from session_pool import (
+    SessionPool, WarmPool,
+    DEFAULT_MAX_SESSIONS, DEFAULT_IDLE_TIMEOUT, DEFAULT_WARM_CLIENTS, DEFAULT_WARM_MAX_AGE
+)
 
 # Remove ANTHROPIC_API_KEY if it's the placeholder, as it conflicts with 'claude login'
 if os.getenv('ANTHROPIC_API_KEY') == 'your_anthropic_api_key':
@@ -18,176 +36,565 @@ if os.getenv('ANTHROPIC_API_KEY') == 'your_anthropic_api_key':
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Ensure reading list exists
-if not os.path.exists('reading_list.json'):
-    with open('reading_list.json', 'w') as f:
-        json.dump([], f)
-
-# Create scheduler MCP server (singleton)
+# Create scheduler MCP server (singleton). Reading list servers are per chat.
 SCHEDULER_MCP_SERVER = create_scheduler_mcp_server()
 
-# Tools configuration
+# Tools configuration. The reading list is only reachable through its MCP
+# tools, so the agent never reads or rewrites the whole list.
 ALLOWED_TOOLS = [
-    "Read", "Write", "Edit", "WebFetch",
+    "Read", "WebFetch",
     "mcp__scheduler__cron_list",
     "mcp__scheduler__cron_add",
     "mcp__scheduler__cron_remove",
-    "mcp__scheduler__cron_update"
+    "mcp__scheduler__cron_update",
+    "mcp__reading_list__list_items",
+    "mcp__reading_list__search",
+    "mcp__reading_list__add_item",
+    "mcp__reading_list__mark_read",
+    "mcp__reading_list__update_item",
+    "mcp__reading_list__delete_item",
+    "mcp__reading_list__count",
+    "mcp__reading_list__link_info",
+    "mcp__reading_list__read_snapshot",
+    "mcp__reading_list__quick_picks"
 ]
 
-# Global dictionary to store sessions: {chat_id: {'client': ClaudeSDKClient, 'turn_count': int}}
-SESSIONS = {}
-TURN_LIMIT = 20
+# Sessions compact against a context token budget. Compaction starts in the
+# background at COMPACT_SOFT_RATIO of the budget; a turn only waits for it
+# if the session reaches the full budget first. TURN_LIMIT is a backstop
+# for turns whose usage isn't reported.
+CONTEXT_TOKEN_BUDGET = int(os.getenv('CONTEXT_TOKEN_BUDGET', 100_000))
+COMPACT_SOFT_RATIO = 0.75
+TURN_LIMIT = 100
+
+# Per-chat token and cost totals
+USAGE = UsageTracker()
+SUMMARY_PROMPT = "CRITICAL: Summarize our current conversation state, known user preferences, and any unfinished tasks in 2-3 sentences. Do not add any conversational filler."
+
+# Links in a turn are described up front (capped, and waited on at most this long)
+MAX_LINK_INFO = 5
+LINK_INFO_TIMEOUT = 4.0
+
+# Notes about things handled outside the agent (e.g. the fast path), delivered
+# with the chat's next agent turn: {chat_id: [note, ...]}
+SESSION_NOTES = {}
+MAX_SESSION_NOTES = 20
+
+
+def add_session_note(chat_id, note: str):
+    """Queue a note for the agent, prepended to this chat's next message."""
+    notes = SESSION_NOTES.setdefault(chat_id, [])
+    notes.append(note)
+    del notes[:-MAX_SESSION_NOTES]
+
+
+@dataclass
+class ChatBinding:
+    """The chat a client's reading list tools act on. Warm clients are bound when claimed."""
+    chat_id: Any = None
+
 
+def get_cli_path() -> str:
+    """Force use of system-installed claude."""
+    return shutil.which("claude") or "/Users/sjain/.nvm/versions/node/v22.20.0/bin/claude"
 
-def create_agent_options(system_prompt: str, cli_path: str) -> ClaudeAgentOptions:
-    """Create ClaudeAgentOptions with scheduler MCP server."""
+
+def current_time_iso() -> str:
+    return datetime.datetime.now(datetime.timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+def create_agent_options(system_prompt: str, cli_path: str, binding: ChatBinding) -> ClaudeAgentOptions:
+    """Create ClaudeAgentOptions with the scheduler and the bound chat's reading list MCP servers."""
+    reading_list_server = create_reading_list_mcp_server(lambda: binding.chat_id)
     return ClaudeAgentOptions(
         system_prompt=system_prompt,
         allowed_tools=ALLOWED_TOOLS,
-        mcp_servers={"scheduler": SCHEDULER_MCP_SERVER},
+        mcp_servers={"scheduler": SCHEDULER_MCP_SERVER, "reading_list": reading_list_server},
         permission_mode="acceptEdits",
         cwd="/Users/sjain/gemi",
         max_turns=10,
-        cli_path=cli_path
+        cli_path=cli_path,
+        include_partial_messages=True
     )
 
 
-async def get_or_create_session(chat_id, system_prompt, cli_path):
-    if chat_id not in SESSIONS:
-        logger.info(f"🆕 Creating NEW session for chat_id {chat_id}")
-        options = create_agent_options(system_prompt, cli_path)
-        client = ClaudeSDKClient(options)
+async def summarize_client(client) -> str:
+    """Ask a live client to summarize its conversation so far."""
+    summary = ""
+    await client.query(SUMMARY_PROMPT)
+    async for message in client.receive_response():
+        if isinstance(message, AssistantMessage):
+            for block in message.content:
+                if isinstance(block, TextBlock):
+                    summary += block.text
+    return summary
+
+
+# Live sessions: {chat_id: {'client': ClaudeSDKClient, 'turn_count': int, ...}}.
+# Bounded; evicted and idle sessions are summarized and disconnected.
+SESSIONS = SessionPool(
+    max_size=int(os.getenv('MAX_SESSIONS', DEFAULT_MAX_SESSIONS)),
+    idle_timeout=float(os.getenv('SESSION_IDLE_TIMEOUT', DEFAULT_IDLE_TIMEOUT)),
+    summarize=summarize_client
+)
+
+
+def load_system_prompt(summary: str = None) -> str:
+    """Render system_prompt.txt with the current time and an optional carried-over summary."""
+    current_time = current_time_iso()
+    try:
+        with open('system_prompt.txt', 'r') as f:
+            template = f.read()
+            system_prompt = template.format(current_time=current_time)
+    except Exception as e:
+        logger.error(f"Error reading system prompt: {e}")
+        system_prompt = f"You are a helpful assistant. The current time is {current_time}."
+
+    if summary:
+        system_prompt = f"{system_prompt}\n\n[PREVIOUS CONVERSATION SUMMARY]: {summary}"
+    return system_prompt
+
+
+async def connect_warm_client() -> dict:
+    """Connect an unbound client for the warm pool."""
+    binding = ChatBinding()
+    client = ClaudeSDKClient(create_agent_options(load_system_prompt(), get_cli_path(), binding))
+    await client.connect()
+    return {'client': client, 'binding': binding}
+
+
+# Pre-connected clients that new and compacted sessions claim instead of
+# waiting for a CLI subprocess to start.
+WARM_CLIENTS = WarmPool(
+    connect_warm_client,
+    size=int(os.getenv('WARM_CLIENTS', DEFAULT_WARM_CLIENTS)),
+    max_age=float(os.getenv('WARM_CLIENT_MAX_AGE', DEFAULT_WARM_MAX_AGE))
+)
+
+
+def start_sessions():
+    """Start the idle reaper and pre-warm clients. Called once the event loop is running."""
+    SESSIONS.start()
+    WARM_CLIENTS.refill()
+
+
+def session_stats() -> dict:
+    """Pool occupancy, eviction, warm-client, turn queue and response cache counters."""
+    cache = {f"cache_{k}": v for k, v in RESPONSES.stats().items()}
+    return {**SESSIONS.stats(), **WARM_CLIENTS.stats(), **TURNS.stats(), **cache}
+
+
+async def shutdown_sessions():
+    """Disconnect every live and warm session and write pending usage. Called from the bot's shutdown hook."""
+    for task in list(COMPACTIONS.values()):
+        task.cancel()
+    await WARM_CLIENTS.close()
+    await SESSIONS.close()
+    await USAGE.stop()
+
+
+async def new_session(chat_id, summary: str = None) -> dict:
+    """
+    Start a session for chat_id, claiming a warm client when one is ready.
+
+    A warm client's system prompt was rendered when it connected, so the
+    current time and any carried-over summary go in a preamble on its
+    first turn instead.
+    """
+    warm = WARM_CLIENTS.claim()
+    if warm is not None:
+        warm['binding'].chat_id = chat_id
+        preamble = f"[System Note: The current time is now {current_time_iso()}."
+        if summary:
+            preamble += f"\n[PREVIOUS CONVERSATION SUMMARY]: {summary}"
+        preamble += "]"
+        return {'client': warm['client'], 'turn_count': 0, 'summary': summary, 'transcript': [], 'preamble': preamble}
+
+    options = create_agent_options(load_system_prompt(summary), get_cli_path(), ChatBinding(chat_id))
+    client = ClaudeSDKClient(options)
+    with tracing.span("session.connect"):
         await client.connect()
-        SESSIONS[chat_id] = {'client': client, 'turn_count': 0}
+    return {'client': client, 'turn_count': 0, 'summary': summary, 'transcript': []}
+
+
+async def get_or_create_session(chat_id):
+    if chat_id not in SESSIONS:
+        # Resume an evicted chat from the summary it left behind
+        summary = SESSIONS.pop_summary(chat_id)
+        if summary:
+            logger.info(f"🆕 Creating NEW session for chat_id {chat_id} (resuming from summary)")
+        else:
+            logger.info(f"🆕 Creating NEW session for chat_id {chat_id}")
+        SESSIONS[chat_id] = await new_session(chat_id, summary)
     else:
         logger.info(f"♻️  REUSING existing session for chat_id {chat_id} (turn #{SESSIONS[chat_id]['turn_count'] + 1})")
 
     return SESSIONS[chat_id]
 
 
-async def compact_session(chat_id, session):
-    client = session['client']
-    logger.info(f"Compacting session for chat_id {chat_id} (turns > {TURN_LIMIT})")
+# Background compactions in flight: {chat_id: asyncio.Task}
+COMPACTIONS = {}
 
-    # 1. Summarize
-    summary_prompt = "CRITICAL: Summarize our current conversation state, known user preferences, and any unfinished tasks in 2-3 sentences. Do not add any conversational filler."
-    summary = ""
-    try:
-        await client.query(summary_prompt)
-        async for message in client.receive_response():
-            if isinstance(message, AssistantMessage):
-                for block in message.content:
-                    if isinstance(block, TextBlock):
-                        summary += block.text
-    except Exception as e:
-        logger.error(f"Error generating summary: {e}")
-        summary = "Previous context lost due to error."
 
-    logger.info(f"Session Summary: {summary}")
-
-    # 2. Disconnect old client
-    try:
-        await client.disconnect()
-    except Exception as e:
-        logger.error(f"Error disconnecting client: {e}")
+def context_pressure(session) -> float:
+    """How full a session is: 1.0 means it must compact before its next turn."""
+    return max(
+        session.get('context_tokens', 0) / CONTEXT_TOKEN_BUDGET,
+        session['turn_count'] / TURN_LIMIT
+    )
 
-    # 3. Create NEW client with fresh system prompt
-    reading_list_path = os.path.abspath('reading_list.json')
-    current_time = datetime.datetime.now(datetime.timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
 
-    try:
-        with open('system_prompt.txt', 'r') as f:
-            template = f.read()
-            base_prompt = template.format(
-                reading_list_path=reading_list_path,
-                current_time=current_time
-            )
-    except:
-        base_prompt = f"You are a helpful assistant. The current time is {current_time}."
+def usage_stats(chat_id) -> dict:
+    """A chat's usage totals plus its live session's context estimate."""
+    stats = dict(USAGE.get(chat_id) or {})
+    session = SESSIONS.peek(chat_id)
+    if session is not None:
+        stats["context_tokens"] = session.get('context_tokens', 0)
+        stats["session_cost_usd"] = round(session.get('cost_usd', 0.0), 6)
+    stats["context_budget"] = CONTEXT_TOKEN_BUDGET
+    return stats
 
-    # Inject summary into new system prompt
-    new_system_prompt = f"{base_prompt}\n\n[PREVIOUS CONVERSATION SUMMARY]: {summary}"
 
-    cli_path = shutil.which("claude") or "/Users/sjain/.nvm/versions/node/v22.20.0/bin/claude"
+def format_transcript(transcript) -> str:
+    return "\n".join(f"{'User' if role == 'user' else 'You'}: {text}" for role, text in transcript)
 
-    options = create_agent_options(new_system_prompt, cli_path)
-    new_client = ClaudeSDKClient(options)
-    await new_client.connect()
 
-    # Update session
-    SESSIONS[chat_id] = {'client': new_client, 'turn_count': 0}
-    logger.info(f"Session compacted and reset for chat_id {chat_id}")
-    return SESSIONS[chat_id]
+async def summarize_transcript(chat_id, summary, transcript) -> str:
+    """Summarize a session from its kept transcript, without touching its client."""
+    prompt = SUMMARY_PROMPT + "\n\n"
+    if summary:
+        prompt += f"[PREVIOUS CONVERSATION SUMMARY]: {summary}\n\n"
+    prompt += "[CONVERSATION]\n" + format_transcript(transcript)
 
+    options = ClaudeAgentOptions(
+        system_prompt="You summarize conversations between a user and Gemi, their reading buddy bot.",
+        allowed_tools=[],
+        max_turns=1,
+        cli_path=get_cli_path()
+    )
+    result = ""
+    async for message in query(prompt=prompt, options=options):
+        if isinstance(message, AssistantMessage):
+            for block in message.content:
+                if isinstance(block, TextBlock):
+                    result += block.text
+        elif isinstance(message, ResultMessage):
+            USAGE.record(chat_id, message.usage, message.total_cost_usd, message.duration_ms)
+    return result
 
-async def process_message(user_message, chat_id, image_path=None):
-    # Get absolute path to reading list
-    reading_list_path = os.path.abspath('reading_list.json')
 
-    # Get current time for the prompt
-    current_time = datetime.datetime.now(datetime.timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+async def compact_session(chat_id, session):
+    """
+    Build a replacement session from a summary while the old one keeps serving.
+
+    The replacement is parked on the old session and swapped in by
+    install_replacement as soon as the old session is between turns.
+    """
+    logger.info(
+        f"Compacting session for chat_id {chat_id} in the background "
+        f"(turn {session['turn_count']}, ~{session.get('context_tokens', 0)} context tokens)"
+    )
+    transcript = list(session['transcript'])
 
-    # System prompt loading
+    # 1. Summarize from the transcript; the old client may be mid-turn
     try:
-        with open('system_prompt.txt', 'r') as f:
-            template = f.read()
-            system_prompt = template.format(
-                reading_list_path=reading_list_path,
-                current_time=current_time
-            )
+        summary = await summarize_transcript(chat_id, session.get('summary'), transcript)
     except Exception as e:
-        logger.error(f"Error reading system prompt: {e}")
-        system_prompt = f"You are a helpful assistant. The current time is {current_time}."
+        logger.error(f"Error generating summary: {e}")
+        summary = session.get('summary') or "Previous context lost due to error."
+
+    logger.info(f"Session Summary: {summary}")
+
+    # 2. Start a fresh session carrying the summary
+    new = await new_session(chat_id, summary)
+    new['summarized_turns'] = len(transcript)
+    session['replacement'] = new
+
+    # 3. Swap now if the old session is between turns; otherwise its turn will
+    if not session.get('busy'):
+        install_replacement(chat_id, session)
+
+
+def start_compaction(chat_id, session) -> asyncio.Task:
+    """Start (or return the running) background compaction for chat_id."""
+    task = COMPACTIONS.get(chat_id)
+    if task is None or task.done():
+        # Background work isn't part of the triggering message's trace
+        with tracing.activate(None):
+            task = asyncio.ensure_future(compact_session(chat_id, session))
+        COMPACTIONS[chat_id] = task
+        task.add_done_callback(lambda t: _compaction_done(chat_id, t))
+    return task
+
+
+def _compaction_done(chat_id, task: asyncio.Task):
+    if COMPACTIONS.get(chat_id) is task:
+        del COMPACTIONS[chat_id]
+    if not task.cancelled() and task.exception() is not None:
+        logger.error(f"Background compaction failed for chat_id {chat_id}: {task.exception()!r}")
+
+
+def install_replacement(chat_id, session) -> dict:
+    """Swap a finished compaction into the pool. Returns the chat's current session."""
+    new = session.pop('replacement', None)
+    if new is None:
+        return session
+    if SESSIONS.peek(chat_id) is not session:
+        # The old session was evicted or discarded meanwhile; the replacement is unused
+        asyncio.ensure_future(new['client'].disconnect())
+        return session
+
+    # Turns that happened while the summary was being written ride along
+    recent = session['transcript'][new.pop('summarized_turns'):]
+    if recent:
+        note = "[System Note: Messages since that summary:\n" + format_transcript(recent) + "]"
+        new['preamble'] = f"{new['preamble']}\n\n{note}" if new.get('preamble') else note
+        new['transcript'] = list(recent)
+
+    SESSIONS.replace(chat_id, new)
+    logger.info(f"Session compacted and swapped for chat_id {chat_id}")
+    return new
+
+
+def image_note(image_path) -> str:
+    """System note pointing the agent at one image path, or a list of them (an album)."""
+    if isinstance(image_path, str):
+        return f"[System Note: The user has uploaded an image. It is saved locally at '{image_path}'. Please analyze this image if relevant to the request. If you cannot read images directly, please let the user know.]"
+    paths = ", ".join(f"'{path}'" for path in image_path)
+    return f"[System Note: The user has uploaded {len(image_path)} images as one album. They are saved locally at {paths}. Please analyze them together if relevant to the request. If you cannot read images directly, please let the user know.]"
+
+
+def batch_prompt(batch: List[QueuedMessage]) -> str:
+    """Fold messages that piled up during a turn into one prompt."""
+    lines = [f"[System Note: The user sent {len(batch)} messages in a row while you were busy. Handle them together in one reply.]"]
+    for i, message in enumerate(batch, 1):
+        text = message.text
+        if message.image_path:
+            text += "\n" + image_note(message.image_path)
+        lines.append(f"{i}. {text}")
+    return "\n\n".join(lines)
+
+
+# Replies to read-only questions, reused until the chat's reading list changes
+RESPONSES = ResponseCache(
+    max_entries=int(os.getenv('RESPONSE_CACHE_SIZE', DEFAULT_CACHE_ENTRIES)),
+    ttl=float(os.getenv('RESPONSE_CACHE_TTL', DEFAULT_CACHE_TTL))
+)
+
+
+async def _run_batch(chat_id, batch: List[QueuedMessage]) -> str:
+    if len(batch) > 1:
+        return await _process_turn(batch_prompt(batch), chat_id, stream=batch[0].stream)
+
+    message = batch[0]
+    store = get_reading_store(chat_id)
+    # Scheduled prompts (coalesce=False) aren't the user's questions; never cache them
+    cacheable = (
+        store is not None
+        and message.image_path is None
+        and message.coalesce
+        and is_read_query(message.text)
+    )
+    if not cacheable:
+        return await _process_turn(message.text, chat_id, message.image_path, message.stream)
+
+    version = store.version
+    cached = RESPONSES.get(chat_id, message.text, version)
+    if cached is not None:
+        logger.info(f"Response cache hit for chat_id {chat_id}: {message.text!r}")
+        add_session_note(chat_id, f"The user asked \"{message.text}\" and got your earlier answer again (list unchanged).")
+        return cached
+
+    turn = {}
+    reply = await _process_turn(message.text, chat_id, stream=message.stream, turn=turn)
+    # Only cache clean, read-only turns that raced no write (the shard may
+    # have been reopened meanwhile, so look the store up again)
+    store = get_reading_store(chat_id)
+    if turn.get('ok') and is_cacheable_turn(turn['tools']) and store.version == version:
+        RESPONSES.put(chat_id, message.text, version, reply)
+    return reply
+
+
+# One turn at a time per chat; messages sent mid-turn are coalesced
+TURNS = ChatQueue(_run_batch)
+
+
+async def process_message(user_message, chat_id, image_path=None, stream=None) -> Optional[str]:
+    """
+    Queue a user message for the chat's agent session.
+
+    Args:
+        image_path: Path of an uploaded image, or a list of paths for an album
+        stream: Optional sink with async update(text_so_far) and tool(name),
+            fed as the reply streams in (see streaming.ReplyStream)
+
+    Returns:
+        The reply, or None if the message was folded into a batch whose
+        reply goes to the caller of an earlier message
+    """
+    return await TURNS.submit(chat_id, user_message, image_path, stream=stream)
+
+
+async def process_scheduled(prompt, chat_id) -> str:
+    """Run a scheduled prompt as its own turn, queued behind any running one."""
+    return await TURNS.submit(chat_id, prompt, coalesce=False)
+
+
+async def _process_turn(user_message, chat_id, image_path=None, stream=None, turn=None):
+    # Get or create session, pinned in the pool until the turn is done
+    with tracing.span("session.acquire"):
+        session = await get_or_create_session(chat_id)
+    session['busy'] = True
+
+    if context_pressure(session) >= 1.0 and 'replacement' not in session:
+        # Background compaction didn't finish in time; wait for it
+        try:
+            with tracing.span("compaction.wait"):
+                await start_compaction(chat_id, session)
+        except Exception as e:
+            logger.error(f"Error compacting session: {e}")
+    if 'replacement' in session:
+        session['busy'] = False
+        session = install_replacement(chat_id, session)
+        session['busy'] = True
+
+    try:
+        return await _run_turn(user_message, chat_id, session, image_path, stream, turn)
+    finally:
+        SESSIONS.release(session)
+        session = install_replacement(chat_id, session)
+        if context_pressure(session) >= COMPACT_SOFT_RATIO and SESSIONS.peek(chat_id) is session:
+            start_compaction(chat_id, session)
+
+
+def _record_usage(chat_id, session, result: ResultMessage, estimate_context: bool = False):
+    """Account a finished turn's usage to the chat and its session."""
+    totals = USAGE.record(chat_id, result.usage, result.total_cost_usd, result.duration_ms)
+    session['cost_usd'] = session.get('cost_usd', 0.0) + (result.total_cost_usd or 0.0)
+    if estimate_context and result.usage:
+        # No per-call usage seen; the turn total spread over its API calls
+        session['context_tokens'] = context_tokens(result.usage) // max(result.num_turns, 1)
+    logger.info(
+        f"Turn usage for chat_id {chat_id}: {result.usage} cost=${result.total_cost_usd or 0:.4f} "
+        f"context~{session.get('context_tokens', 0)}/{CONTEXT_TOKEN_BUDGET} "
+        f"(chat total ${totals['cost_usd']:.4f} over {totals['turns']} turns)"
+    )
 
-    # Force use of system-installed claude
-    cli_path = shutil.which("claude")
-    if not cli_path:
-        cli_path = "/Users/sjain/.nvm/versions/node/v22.20.0/bin/claude"
 
-    # Get or create session
-    session = await get_or_create_session(chat_id, system_prompt, cli_path)
+def _text_delta(event: StreamEvent) -> str:
+    """Text carried by a partial-message stream event, if any."""
+    data = event.event or {}
+    if data.get('type') == 'content_block_delta':
+        delta = data.get('delta') or {}
+        if delta.get('type') == 'text_delta':
+            return delta.get('text', '')
+    return ""
 
-    # Check for compaction
-    if session['turn_count'] >= TURN_LIMIT:
-        await session['client'].query("Hold on, my memory is getting full. Organizing my thoughts...")
-        async for _ in session['client'].receive_response():
-            pass
-        session = await compact_session(chat_id, session)
 
+async def _run_turn(user_message, chat_id, session, image_path=None, stream=None, turn=None):
+    """
+    Run one agent turn and return its reply.
+
+    If turn is given it is filled with the tools used ('tools') and
+    whether the turn completed ('ok').
+    """
+    turn = turn if turn is not None else {}
+    turn['tools'] = []
     client = session['client']
 
+    # Only links the user sent; notes and preambles added below may quote others
+    urls = list(dict.fromkeys(u.rstrip(".,)") for u in URL_RE.findall(user_message)))[:MAX_LINK_INFO]
+
     # Append image info to user message if present
     if image_path:
-        user_message += f"\n\n[System Note: The user has uploaded an image. It is saved locally at '{image_path}'. Please analyze this image if relevant to the request. If you cannot read images directly, please let the user know.]"
+        user_message += "\n\n" + image_note(image_path)
+
+    # Catch the agent up on anything handled without it since the last turn
+    notes = SESSION_NOTES.pop(chat_id, None)
+    if notes:
+        user_message = "[System Note: Since your last turn:\n" + "\n".join(notes) + "]\n\n" + user_message
+
+    # A claimed warm client learns the time and prior summary on its first turn
+    preamble = session.pop('preamble', None)
+    if preamble:
+        user_message = preamble + "\n\n" + user_message
+
+    # Describe links up front so the agent doesn't need WebFetch for them
+    if urls:
+        with tracing.span("link_info"):
+            infos = await get_metadata_fetcher().fetch_many(urls, timeout=LINK_INFO_TIMEOUT)
+        user_message += "\n\n[Link info:\n" + format_link_info(infos) + "]"
 
     final_response = ""
+    partial = ""  # streamed text of the block still being written
+    saw_call_usage = False
+    tool_starts = {}  # tool_use_id -> (name, perf_counter start)
     logger.info(f"Processing message from chat_id {chat_id}: {user_message}")
 
     try:
         # Send query to existing session
-        await client.query(user_message)
+        with tracing.span("agent.query"):
+            await client.query(user_message)
         session['turn_count'] += 1
+        session['transcript'].append(('user', user_message))
+
+        response_start = time.perf_counter()
+        first_text_seen = False
+
+        def saw_text():
+            nonlocal first_text_seen
+            if not first_text_seen:
+                first_text_seen = True
+                tracing.record("agent.first_text", time.perf_counter() - response_start, response_start)
 
         async for message in client.receive_response():
-            if isinstance(message, AssistantMessage):
+            if isinstance(message, StreamEvent):
+                delta = _text_delta(message)
+                if delta:
+                    saw_text()
+                if delta and stream is not None:
+                    partial += delta
+                    await stream.update(final_response + partial)
+            elif isinstance(message, AssistantMessage):
+                # The latest API call saw the whole context so far
+                if message.usage:
+                    session['context_tokens'] = context_tokens(message.usage)
+                    saw_call_usage = True
                 for block in message.content:
                     if isinstance(block, TextBlock):
+                        saw_text()
                         final_response += block.text
+                        partial = ""
+                        if stream is not None:
+                            await stream.update(final_response)
                     elif isinstance(block, ToolUseBlock):
                         logger.info(f"Agent using tool: {block.name} input: {block.input}")
+                        turn['tools'].append(block.name)
+                        tool_starts[block.id] = (block.name, time.perf_counter())
+                        if stream is not None:
+                            await stream.tool(block.name)
                     elif isinstance(block, ToolResultBlock):
                         logger.info(f"Tool result: {block.content} (is_error={block.is_error})")
                     else:
                         logger.info(f"Agent generated block type: {type(block)}")
+            elif isinstance(message, UserMessage) and isinstance(message.content, list):
+                # Tool results come back as user messages
+                for block in message.content:
+                    if isinstance(block, ToolResultBlock) and block.tool_use_id in tool_starts:
+                        name, started = tool_starts.pop(block.tool_use_id)
+                        tracing.record(f"tool.{name}", time.perf_counter() - started, started)
+            elif isinstance(message, ResultMessage):
+                _record_usage(chat_id, session, message, estimate_context=not saw_call_usage)
 
+        tracing.record("agent.response", time.perf_counter() - response_start, response_start)
         logger.info(f"Agent response for chat_id {chat_id}: {final_response}")
+        session['transcript'].append(('assistant', final_response))
+        turn['ok'] = True
 
     except Exception as e:
         logger.error(f"Error processing message: {e}")
         # If session is broken, clear it so next time it recreates
-        if chat_id in SESSIONS:
-            del SESSIONS[chat_id]
+        SESSIONS.discard(chat_id)
         return f"Sorry, I encountered an error: {str(e)}"
 
     return final_response
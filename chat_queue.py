@@ -0,0 +1,117 @@
+"""Per-chat turn queue: one agent turn at a time per chat, bursts coalesced."""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional
+
+import tracing
+
+logger = logging.getLogger(__name__)
+
+MAX_BATCH = 10  # messages folded into one turn at most
+
+
+@dataclass
+class QueuedMessage:
+    """A message waiting for its chat's session."""
+    text: str
+    image_path: Optional[str] = None
+    coalesce: bool = True
+    stream: Any = None
+    future: Optional[asyncio.Future] = field(default=None, repr=False)
+    trace: Any = field(default=None, repr=False)
+    queued_at: float = field(default_factory=time.perf_counter, repr=False)
+
+
+class ChatQueue:
+    """
+    Serializes agent turns per chat.
+
+    Each chat gets a worker that runs one turn at a time. Messages that
+    arrive while a turn is running wait, and when it ends every waiting
+    coalescable message is handed to run as a single batch. The batch's
+    reply goes to the first message's caller; the others get None so the
+    reply is only sent once. Messages with coalesce=False (e.g. scheduled
+    prompts) always run alone.
+    """
+
+    def __init__(self, run: Callable[[Any, List[QueuedMessage]], Awaitable[str]], max_batch: int = MAX_BATCH):
+        self._run = run
+        self.max_batch = max_batch
+        self._pending: Dict[Any, Deque[QueuedMessage]] = {}
+        self._workers: Dict[Any, asyncio.Task] = {}
+        self.messages = 0
+        self.turns = 0
+
+    async def submit(
+        self,
+        chat_id,
+        text: str,
+        image_path: Optional[str] = None,
+        coalesce: bool = True,
+        stream: Any = None
+    ) -> Optional[str]:
+        """
+        Queue a message and wait for the turn that handles it.
+
+        A batch streams its reply to the first message's stream, if any.
+
+        Returns:
+            The agent's reply, or None if the message was folded into a
+            batch whose reply goes to an earlier caller
+        """
+        message = QueuedMessage(text, image_path, coalesce, stream, asyncio.get_running_loop().create_future())
+        # The worker task outlives this caller's context, so carry the trace along
+        message.trace = tracing.current_trace()
+        self._pending.setdefault(chat_id, deque()).append(message)
+        self.messages += 1
+        if chat_id not in self._workers:
+            self._workers[chat_id] = asyncio.ensure_future(self._drain(chat_id))
+        return await message.future
+
+    def _next_batch(self, queue: Deque[QueuedMessage]) -> List[QueuedMessage]:
+        batch = [queue.popleft()]
+        if batch[0].coalesce:
+            while queue and queue[0].coalesce and len(batch) < self.max_batch:
+                batch.append(queue.popleft())
+        return batch
+
+    async def _drain(self, chat_id):
+        queue = self._pending[chat_id]
+        try:
+            while queue:
+                batch = self._next_batch(queue)
+                if len(batch) > 1:
+                    logger.info(f"Coalescing {len(batch)} messages into one turn for chat_id {chat_id}")
+                self.turns += 1
+                try:
+                    with tracing.activate(batch[0].trace):
+                        waited = time.perf_counter() - batch[0].queued_at
+                        tracing.record("queue.wait", waited, batch[0].queued_at)
+                        reply = await self._run(chat_id, batch)
+                except Exception as e:
+                    for message in batch:
+                        if not message.future.done():
+                            message.future.set_exception(e)
+                    continue
+                for i, message in enumerate(batch):
+                    if not message.future.done():
+                        message.future.set_result(reply if i == 0 else None)
+        finally:
+            del self._workers[chat_id]
+            del self._pending[chat_id]
+
+    def depth(self, chat_id) -> int:
+        """Messages waiting behind the chat's running turn."""
+        return len(self._pending.get(chat_id, ()))
+
+    def stats(self) -> dict:
+        return {
+            "queued": sum(len(q) for q in self._pending.values()),
+            "active_chats": len(self._workers),
+            "messages": self.messages,
+            "turns": self.turns
+        }
@@ -0,0 +1,179 @@
+"""
+Bot configuration (config.json), held in memory.
+
+The file is read once. Reads come from memory, and changes are written
+behind, coalesced and atomically renamed into place, so handling a
+message never touches the disk. Edits made to the file by hand are
+picked up while the bot runs. Settings can be global ("chat_id", the
+owner chat that scheduled jobs report to) or per chat, under
+"chats": {"<chat_id>": {...}}.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import tempfile
+from typing import Any, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+CONFIG_FILE = 'config.json'
+FLUSH_DELAY = 1.0      # seconds to coalesce changes before writing
+POLL_INTERVAL = 5.0    # seconds between checks for outside edits
+
+
+class ConfigManager:
+    """
+    In-memory config with write-behind persistence and reload on change.
+
+    Changes not yet written survive a reload: they are re-applied on top
+    of the file's new contents.
+    """
+
+    def __init__(self, path: str = CONFIG_FILE, flush_delay: float = FLUSH_DELAY, poll_interval: float = POLL_INTERVAL):
+        self.path = path
+        self.flush_delay = flush_delay
+        self.poll_interval = poll_interval
+        self._data: dict = {}
+        self._pending: List[Tuple[Optional[str], str, Any]] = []  # (chat key, key, value) not yet written
+        self._stamp = None  # (mtime_ns, size) of the file as last read or written
+        self._flush_task: Optional[asyncio.Task] = None
+        self._watch_task: Optional[asyncio.Task] = None
+        self._load()
+
+    def _file_stamp(self):
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def _load(self):
+        stamp = self._file_stamp()
+        data = {"chat_id": None}
+        if stamp is not None:
+            try:
+                with open(self.path, 'r') as f:
+                    data = json.load(f)
+            except Exception as e:
+                # Half-written by hand; keep what we have and retry on the next change
+                logger.error(f"Error loading {self.path}: {e}")
+                return
+        self._data = data
+        self._stamp = stamp
+        for chat_key, key, value in self._pending:
+            self._apply(chat_key, key, value)
+
+    # ------------------------------------------------------------
+    # Reads and writes
+    # ------------------------------------------------------------
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return self._data.get(key, default)
+
+    def set(self, key: str, value: Any):
+        """Change a global setting (written behind)."""
+        if self._data.get(key) != value:
+            self._change(None, key, value)
+
+    def chat_setting(self, chat_id: Any, key: str, default: Any = None) -> Any:
+        """A per-chat setting, or default if the chat hasn't set it."""
+        return self._data.get("chats", {}).get(str(chat_id), {}).get(key, default)
+
+    def set_chat_setting(self, chat_id: Any, key: str, value: Any):
+        """Change a per-chat setting (written behind)."""
+        if self.chat_setting(chat_id, key) != value:
+            self._change(str(chat_id), key, value)
+
+    def remember_chat(self, chat_id: Any):
+        """
+        Make chat_id the owner chat if there is none yet.
+
+        Scheduled jobs report to the owner chat, so other chats talking
+        to the bot never take it over. Cheap when already set.
+        """
+        if self._data.get("chat_id") is None:
+            self.set("chat_id", chat_id)
+
+    def _apply(self, chat_key: Optional[str], key: str, value: Any):
+        if chat_key is None:
+            self._data[key] = value
+        else:
+            self._data.setdefault("chats", {}).setdefault(chat_key, {})[key] = value
+
+    def _change(self, chat_key: Optional[str], key: str, value: Any):
+        self._apply(chat_key, key, value)
+        self._pending.append((chat_key, key, value))
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            # No event loop (startup, scripts): write through
+            self._write(json.dumps(self._data, indent=2))
+            self._pending.clear()
+            return
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.ensure_future(self._flush_later())
+
+    # ------------------------------------------------------------
+    # Persistence
+    # ------------------------------------------------------------
+
+    def _write(self, text: str):
+        dir_path = os.path.dirname(self.path) or '.'
+        fd, temp_path = tempfile.mkstemp(dir=dir_path, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                f.write(text)
+            os.rename(temp_path, self.path)
+            self._stamp = self._file_stamp()
+        except Exception as e:
+            logger.error(f"Error saving {self.path}: {e}")
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+
+    async def _flush_later(self):
+        await asyncio.sleep(self.flush_delay)
+        await self.flush()
+
+    async def flush(self):
+        """Write pending changes now."""
+        if not self._pending:
+            return
+        # Serialize on the loop, so the worker thread sees a consistent snapshot
+        text = json.dumps(self._data, indent=2)
+        written = len(self._pending)
+        await asyncio.to_thread(self._write, text)
+        del self._pending[:written]
+
+    async def _watch(self):
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            stamp = self._file_stamp()
+            if stamp != self._stamp and stamp is not None:
+                logger.info(f"{self.path} changed on disk, reloading")
+                self._load()
+
+    async def start(self):
+        """Start watching the file for outside edits."""
+        if self._watch_task is None:
+            self._watch_task = asyncio.ensure_future(self._watch())
+
+    async def stop(self):
+        """Stop watching and write anything pending."""
+        for task in (self._watch_task, self._flush_task):
+            if task is not None:
+                task.cancel()
+        self._watch_task = self._flush_task = None
+        await self.flush()
+
+
+# Global config manager
+_config: Optional[ConfigManager] = None
+
+
+def get_config() -> ConfigManager:
+    global _config
+    if _config is None:
+        _config = ConfigManager()
+    return _config
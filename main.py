@@ -1,15 +1,26 @@
 import os
+import time
+import asyncio
 import logging
-import json
-import datetime
-from collections import Counter
 from dotenv import load_dotenv
 from telegram import Update
 from telegram.ext import Application, ContextTypes, CommandHandler, MessageHandler, filters
-from agent import process_message
+import tracing
+from config import get_config
+from streaming import ReplyStream
+from photos import AlbumCollector, get_photo_store, pick_size
+from agent import process_message, process_scheduled, add_session_note, start_sessions, shutdown_sessions, usage_stats, session_stats
+from reading_list.store import DEFAULT_TZ
+from reading_list.shards import ShardManager, get_shard_manager, set_shard_manager, lease_reading_store
+from reading_list.tools import quick_picks
+from reading_list.router import handle_fast_path, URL_RE
+from reading_list.metadata import get_metadata_fetcher, close_metadata_fetcher
+from reading_list.snapshots import SnapshotPipeline, get_snapshot_pipeline, set_snapshot_pipeline
+from reading_list.streaks import render_heatmap
+from reading_list.importer import import_file, ImportProgress
 
 # Import scheduler
-from scheduler.service import CronService, set_cron_service
+from scheduler.service import CronService, get_cron_service, set_cron_service
 from scheduler.executor import set_executor_deps, execute_cron_job
 
 load_dotenv()
@@ -19,123 +30,145 @@ logging.basicConfig(
     level=logging.INFO
 )
 
-CONFIG_FILE = 'config.json'
+# Export files accepted by the importer, and how often to report progress
+IMPORT_EXTENSIONS = ('.html', '.htm', '.csv')
+IMPORT_PROGRESS_INTERVAL = 2.0
 
-def load_config():
-    if os.path.exists(CONFIG_FILE):
-        with open(CONFIG_FILE, 'r') as f:
-            return json.load(f)
-    return {"chat_id": None}
+# Stream agent replies via message edits (set STREAM_REPLIES=0 to send once at the end)
+STREAM_REPLIES = os.getenv('STREAM_REPLIES', '1') != '0'
 
-def save_config(config):
-    with open(CONFIG_FILE, 'w') as f:
-        json.dump(config, f, indent=2)
+# Per-stage latency metrics (metrics.prom, and /metrics if TRACE_METRICS_PORT is set)
+METRICS_EXPORTER = tracing.MetricsExporter()
 
-def calculate_streak(dates_strings):
-    """Calculates current streak of consecutive days from a list of date strings."""
-    if not dates_strings:
-        return 0
-    
-    # Parse dates and notify time info to get just date objects
-    dates = set()
-    for ds in dates_strings:
-        try:
-            # Handle ISO format with possible Z or timezone
-            dt = datetime.datetime.fromisoformat(ds.replace('Z', '+00:00'))
-            dates.add(dt.date())
-        except ValueError:
-            continue
-            
-    if not dates:
-        return 0
-        
-    sorted_dates = sorted(list(dates), reverse=True)
-    today = datetime.datetime.now(datetime.timezone.utc).date()
-    
-    current_streak = 0
-    check_date = today
-    
-    # Check if today is present, if not check yesterday (streak might be active but not incremented today yet)
-    if check_date not in sorted_dates:
-        check_date = today - datetime.timedelta(days=1)
-        if check_date not in sorted_dates:
-            return 0 # Streak broken or not started
-            
-    # Count backwards
-    while check_date in sorted_dates:
-        current_streak += 1
-        check_date -= datetime.timedelta(days=1)
-        
-    return current_streak
+# Photos sent as an album are answered in one turn
+ALBUMS = AlbumCollector()
+
+# Time budget for /quick without an argument, in minutes
+DEFAULT_QUICK_MINUTES = 15
+
+# Fire-and-forget work (e.g. cache warming), referenced until done so it isn't collected
+BACKGROUND_TASKS = set()
+
+def run_in_background(coro) -> asyncio.Task:
+    """Start a task that nobody awaits, keeping it alive and logging its failure."""
+    task = asyncio.ensure_future(coro)
+    BACKGROUND_TASKS.add(task)
+    task.add_done_callback(_background_done)
+    return task
+
+def _background_done(task: asyncio.Task):
+    BACKGROUND_TASKS.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+        logging.error(f"Background task failed: {task.exception()!r}")
 
 async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
     chat_id = update.effective_chat.id
-    config = load_config()
-    if config.get('chat_id') != chat_id:
-        config['chat_id'] = chat_id
-        save_config(config)
+    get_config().remember_chat(chat_id)
         
     await context.bot.send_message(chat_id=chat_id, text="I'm your Reading Buddy! Send me links or notes.")
 
 async def stats_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     chat_id = update.effective_chat.id
     try:
-        if not os.path.exists('reading_list.json'):
+        with lease_reading_store(chat_id) as store:
+            stats = store.get_stats(top_tags=5) if store else None
+        if not stats or stats['total'] == 0:
              await context.bot.send_message(chat_id=chat_id, text="No reading list found yet!")
              return
 
-        with open('reading_list.json', 'r') as f:
-            reading_list = json.load(f)
-            
-        total_items = len(reading_list)
-        read_count = sum(1 for item in reading_list if item.get('status') == 'read')
+        total_items = stats['total']
+        read_count = stats['by_status'].get('read', 0)
         unread_count = total_items - read_count
         
-        # Tags stats
-        all_tags = []
-        for item in reading_list:
-            all_tags.extend(item.get('tags', []))
-        
-        top_tags = Counter(all_tags).most_common(5)
-        tags_str = "\n".join([f"#{tag} ({count})" for tag, count in top_tags])
+        # Tags and type stats
+        tags_str = "\n".join([f"#{tag} ({count})" for tag, count in stats['top_tags']])
+        types_str = ", ".join(
+            f"{item_type} {count}"
+            for item_type, count in sorted(stats['by_type'].items(), key=lambda kv: -kv[1])
+        )
         
         msg = (
             f"📊 **My Library Stats**\n\n"
             f"📚 Total Items: {total_items}\n"
             f"✅ Read: {read_count}\n"
-            f"📖 To Read: {unread_count}\n\n"
+            f"📖 To Read: {unread_count}\n"
+            f"🗂️ By Type: {types_str}\n\n"
             f"🏷️ **Top Topics:**\n{tags_str}"
         )
+        ingest = store.ingest_metrics()
+        if ingest['duplicates']:
+            msg += (
+                f"\n\n🔁 Dupes caught: {ingest['duplicates']} of {ingest['checked']} links "
+                f"({ingest['hit_rate']:.0%})"
+            )
+        pipeline = get_snapshot_pipeline()
+        if pipeline is not None:
+            snap = pipeline.stats()
+            msg += (
+                f"\n\n🗄️ Snapshots: {store.snapshot_count()} saved, {snap['queue_depth']} queued, "
+                f"{snap['per_minute']:.1f}/min, extract p50 {snap['extract_ms_p50']:.0f}ms / "
+                f"p95 {snap['extract_ms_p95']:.0f}ms"
+            )
         await context.bot.send_message(chat_id=chat_id, text=msg, parse_mode='Markdown')
         
     except Exception as e:
         logging.error(f"Error in stats: {e}")
         await context.bot.send_message(chat_id=chat_id, text="Oops, couldn't calculate stats right now.")
 
+async def usage_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    chat_id = update.effective_chat.id
+    stats = usage_stats(chat_id)
+    if not stats.get('turns'):
+        await context.bot.send_message(chat_id=chat_id, text="No agent usage recorded yet.")
+        return
+
+    cached = stats['cache_read_input_tokens']
+    sent = stats['input_tokens'] + cached + stats['cache_creation_input_tokens']
+    cached_share = cached / sent if sent else 0
+    msg = (
+        f"🧮 **Agent Usage**\n\n"
+        f"💬 Turns: {stats['turns']}\n"
+        f"📥 Input tokens: {sent:,} ({cached_share:.0%} cached)\n"
+        f"📤 Output tokens: {stats['output_tokens']:,}\n"
+        f"💸 Cost: ${stats['cost_usd']:.2f}"
+    )
+    if 'context_tokens' in stats:
+        msg += f"\n🧠 Context: ~{stats['context_tokens']:,} / {stats['context_budget']:,} tokens"
+    pool = session_stats()
+    if pool['cache_hits'] or pool['cache_misses']:
+        msg += f"\n⚡ Cached replies: {pool['cache_hits']} of {pool['cache_hits'] + pool['cache_misses']} ({pool['cache_hit_rate']:.0%})"
+    await context.bot.send_message(chat_id=chat_id, text=msg, parse_mode='Markdown')
+
 async def streak_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     chat_id = update.effective_chat.id
     try:
-        if not os.path.exists('reading_list.json'):
+        with lease_reading_store(chat_id) as store:
+            streaks = store.streaks if store is not None and store.count() else None
+        if streaks is None:
              await context.bot.send_message(chat_id=chat_id, text="No reading list found yet!")
              return
 
-        with open('reading_list.json', 'r') as f:
-            reading_list = json.load(f)
-            
-        # Collection Streak (based on added_at)
-        added_dates = [item.get('added_at') for item in reading_list if item.get('added_at')]
-        collection_streak = calculate_streak(added_dates)
+        # Collection Streak (days something was added)
+        collection_streak = streaks.current_streak('added').length
         
-        # Reading Streak (based on read_at)
-        read_dates = [item.get('read_at') for item in reading_list if item.get('read_at')]
-        reading_streak = calculate_streak(read_dates)
+        # Reading Streak (days something was marked read)
+        reading_streak = streaks.current_streak('read').length
+        longest_reading = streaks.longest_streak('read')
+        longest_str = ""
+        if longest_reading.length:
+            longest_str = f"🏆 Best: {longest_reading.length} days (ended {longest_reading.end.strftime('%b %d')})\n"
+
+        # Last four weeks of reading, one row per week
+        heatmap = render_heatmap(streaks.heatmap('read', days=28))
         
         msg = (
             f"🔥 **Streaks**\n\n"
             f"📖 **Reading Streak:** {reading_streak} days\n"
+            f"{longest_str}"
             f"_(Days you finished an article)_\n\n"
             f"📥 **Collection Streak:** {collection_streak} days\n"
-            f"_(Days you added new stuff)_"
+            f"_(Days you added new stuff)_\n\n"
+            f"🗓️ **Last 4 weeks:**\n{heatmap}"
         )
         await context.bot.send_message(chat_id=chat_id, text=msg, parse_mode='Markdown')
         
@@ -143,43 +176,210 @@ async def streak_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
         logging.error(f"Error in streak: {e}")
         await context.bot.send_message(chat_id=chat_id, text="Oops, couldn't calculate streaks right now.")
 
+async def quick_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    chat_id = update.effective_chat.id
+    try:
+        default = get_config().chat_setting(chat_id, 'quick_minutes', DEFAULT_QUICK_MINUTES)
+        minutes = int(context.args[0]) if context.args else int(default)
+    except ValueError:
+        await context.bot.send_message(chat_id=chat_id, text="Usage: /quick [minutes], e.g. /quick 20")
+        return
+    # Answered from the time-estimate index, no agent turn needed
+    picks = await asyncio.to_thread(quick_picks, chat_id, minutes)
+    await context.bot.send_message(chat_id=chat_id, text=f"⏱️ {minutes} minutes:\n\n{picks}")
+
+async def import_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    chat_id = update.effective_chat.id
+    await context.bot.send_message(
+        chat_id=chat_id,
+        text=(
+            "send me your export file and I'll pull it all in 🐧\n\n"
+            "works with Pocket (.html or .csv), Instapaper (.csv), browser bookmarks (.html) "
+            "or any CSV with a url column. dupes get skipped."
+        )
+    )
+
+def format_import_progress(progress: ImportProgress) -> str:
+    if progress.done:
+        text = f"import done 🐧 added {progress.added}"
+    else:
+        text = f"importing... {progress.parsed} links read, {progress.added} added"
+    if progress.duplicates:
+        text += f", {progress.duplicates} already saved"
+    if progress.invalid:
+        text += f", {progress.invalid} skipped (not links)"
+    return text
+
+async def handle_document(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    chat_id = update.effective_chat.id
+    document = update.message.document
+    file_name = os.path.basename(document.file_name or "export")
+    if not file_name.lower().endswith(IMPORT_EXTENSIONS):
+        await context.bot.send_message(chat_id=chat_id, text="I can only import .html or .csv exports. try /import")
+        return
+
+    status = await context.bot.send_message(chat_id=chat_id, text=f"importing {file_name}... 🐧")
+
+    os.makedirs('imports', exist_ok=True)
+    path = os.path.abspath(f'imports/{update.message.message_id}_{file_name}')
+    telegram_file = await document.get_file()
+    await telegram_file.download_to_drive(path)
+
+    loop = asyncio.get_running_loop()
+    last_report = [0.0]
+
+    async def edit_status(text):
+        try:
+            await status.edit_text(text)
+        except Exception as e:
+            logging.debug(f"Couldn't update import progress: {e}")
+
+    def report(progress: ImportProgress):
+        # Runs on the import thread; hop back to the event loop to edit
+        now = time.monotonic()
+        if progress.done or now - last_report[0] >= IMPORT_PROGRESS_INTERVAL:
+            last_report[0] = now
+            asyncio.run_coroutine_threadsafe(edit_status(format_import_progress(progress)), loop)
+
+    def run_import():
+        # The lease keeps the shard open for the whole import
+        with lease_reading_store(chat_id) as store:
+            return import_file(path, lambda: store, None, report)
+
+    try:
+        result = await asyncio.to_thread(run_import)
+    except Exception as e:
+        logging.error(f"Error importing {file_name}: {e}")
+        await edit_status("Oops, couldn't import that file.")
+        return
+    finally:
+        os.remove(path)
+
+    await edit_status(format_import_progress(result))
+    if result.added:
+        add_session_note(
+            chat_id,
+            f"The user imported {result.added} links from a {result.format} export "
+            f"({result.duplicates} duplicates skipped). Imported items have no reason and may lack tags."
+        )
+
+async def save_photo(message) -> str:
+    """Store a message's photo (smallest adequate size), returning its content hash."""
+    photos = get_photo_store()
+    size = pick_size(message.photo)
+    content_hash = await asyncio.to_thread(photos.lookup, size.file_unique_id)
+    if content_hash is not None:
+        return content_hash
+    photo = await size.get_file()
+    data = bytes(await photo.download_as_bytearray())
+    # Hashing and downscaling happen off the event loop
+    return await asyncio.to_thread(photos.put, data, size.file_unique_id)
+
 async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    with tracing.trace("message", chat_id=update.effective_chat.id, photo=bool(update.message.photo)):
+        await _handle_message(update, context)
+
+async def _handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
     chat_id = update.effective_chat.id
     image_path = None
+    photo_hashes = []
     
     # Handle both text and photos
     if update.message.photo:
-        caption = update.message.caption or ""
-        user_message = f"I sent a photo. Caption: {caption}" if caption else "I sent a photo."
+        messages = [update.message]
+        if update.message.media_group_id:
+            # The album's first message answers for all of its photos
+            with tracing.span("photo.album"):
+                messages = await ALBUMS.collect(update.message.media_group_id, update.message)
+            if messages is None:
+                return
+        caption = next((m.caption for m in messages if m.caption), "")
+        what = "a photo" if len(messages) == 1 else f"{len(messages)} photos"
+        user_message = f"I sent {what}. Caption: {caption}" if caption else f"I sent {what}."
         
-        # Download the photo
-        photo = await update.message.photo[-1].get_file()
-        # Ensure photos directory exists
-        os.makedirs('photos', exist_ok=True)
-        image_path = os.path.abspath(f'photos/{update.message.message_id}.jpg')
-        await photo.download_to_drive(image_path)
+        # Download the photos
+        with tracing.span("photo.download"):
+            photo_hashes = await asyncio.gather(*(save_photo(m) for m in messages))
+        photos = get_photo_store()
+        if len(photo_hashes) == 1:
+            image_path = photos.path(photo_hashes[0])
+            earlier = photos.analysis(photo_hashes[0], chat_id)
+            if earlier:
+                sent = time.strftime('%b %d', time.localtime(earlier['sent_at']))
+                user_message += (
+                    f"\n\n[System Note: This chat sent this exact image before ({sent}). Your reply then:\n"
+                    f"{earlier['text']}\nBuild on that instead of analyzing it from scratch.]"
+                )
+        else:
+            image_path = [photos.path(h) for h in photo_hashes]
         
     elif update.message.text:
         user_message = update.message.text
     else:
         return
 
-    # Save chat_id if not already saved
-    config = load_config()
-    if config.get('chat_id') != chat_id:
-        config['chat_id'] = chat_id
-        save_config(config)
-    
-    # Process message with Claude Agent
-    response = await process_message(user_message, chat_id, image_path)
+    # The first chat becomes the owner that scheduled jobs report to (in memory; written behind)
+    with tracing.span("config"):
+        get_config().remember_chat(chat_id)
+
+    # Common intents (bare links, "done with X", "what's unread") are handled locally
+    if image_path is None:
+        with tracing.span("fast_path"):
+            with lease_reading_store(chat_id) as store:
+                fast = handle_fast_path(user_message, store)
+        if fast is not None:
+            with tracing.span("telegram.send"):
+                await context.bot.send_message(chat_id=chat_id, text=fast.reply)
+            if fast.agent_note:
+                add_session_note(chat_id, fast.agent_note)
+                # Warm the metadata cache for the agent's follow-up on saved links
+                urls = [u.rstrip(".,)") for u in URL_RE.findall(user_message)]
+                if urls:
+                    run_in_background(get_metadata_fetcher().fetch_many(urls))
+            return
     
-    await context.bot.send_message(chat_id=chat_id, text=response)
+    # Process message with Claude Agent, streaming the reply in as it's written.
+    # Messages sent while a turn is running are answered together, so only
+    # the first of them gets the reply.
+    streaming = get_config().chat_setting(chat_id, 'stream_replies', STREAM_REPLIES)
+    stream = ReplyStream(context.bot, chat_id) if streaming else None
+    with tracing.span("agent"):
+        response = await process_message(user_message, chat_id, image_path, stream=stream)
+    if response is None:
+        return
+    with tracing.span("telegram.send"):
+        if stream is not None:
+            await stream.finish(response)
+        else:
+            await context.bot.send_message(chat_id=chat_id, text=response)
+    if len(photo_hashes) == 1:
+        await asyncio.to_thread(get_photo_store().set_analysis, photo_hashes[0], chat_id, response)
 
 async def post_init(application: Application):
-    """Initialize scheduler after application is ready."""
-    config = load_config()
+    """Initialize reading list storage and scheduler after application is ready."""
+    config = get_config()
+    await config.start()
 
-    # Helper to get chat_id
+    # Per-chat reading list shards; single-chat data moves into the owner's shard
+    shards = ShardManager(tz=os.getenv('USER_TIMEZONE', DEFAULT_TZ))
+    # Newly added articles get their text fetched and stored in the background
+    # (watching from the first shard opened, but not queueing the legacy import)
+    pipeline = SnapshotPipeline(shards.lease, get_metadata_fetcher)
+    pipeline.attach(shards)
+    if config.get('chat_id'):
+        shards.adopt_legacy(config['chat_id'])
+    set_shard_manager(shards)
+    await pipeline.start()
+    set_snapshot_pipeline(pipeline)
+
+    # Idle agent sessions get disconnected in the background
+    start_sessions()
+    await METRICS_EXPORTER.start()
+
+    # Old and excess photos are cleaned up in the background
+    get_photo_store().start()
+
+    # Helper to get chat_id, read live so a chat registered after startup gets its jobs
     def get_chat_id():
         return config.get('chat_id')
 
@@ -188,7 +388,7 @@ async def post_init(application: Application):
         await application.bot.send_message(chat_id=chat_id, text=text)
 
     # Set up executor dependencies
-    set_executor_deps(process_message, send_message, get_chat_id)
+    set_executor_deps(process_scheduled, send_message, get_chat_id)
 
     # Create and start cron service
     cron_service = CronService(store_path="cron_jobs.json")
@@ -202,25 +402,61 @@ async def post_init(application: Application):
     logging.info("Scheduler initialized")
 
 
+async def post_shutdown(application: Application):
+    """Disconnect agent sessions and close all open reading list shards cleanly."""
+    await shutdown_sessions()
+    await METRICS_EXPORTER.stop()
+    get_photo_store().stop()
+    pipeline = get_snapshot_pipeline()
+    if pipeline is not None:
+        await pipeline.stop()
+    await close_metadata_fetcher()
+    await get_config().stop()
+    cron_service = get_cron_service()
+    if cron_service is not None:
+        cron_service.stop()
+
+    shards = get_shard_manager()
+    if shards is not None:
+        await asyncio.to_thread(shards.close_all)
+
+
 if __name__ == '__main__':
     token = os.getenv('TELEGRAM_BOT_TOKEN')
     if not token:
         print("Error: TELEGRAM_BOT_TOKEN not found in .env")
         exit(1)
 
-    application = Application.builder().token(token).post_init(post_init).build()
+    # Updates are handled concurrently so messages sent mid-turn reach the
+    # per-chat turn queue (which serializes and coalesces them)
+    application = (
+        Application.builder()
+        .token(token)
+        .concurrent_updates(True)
+        .post_init(post_init)
+        .post_shutdown(post_shutdown)
+        .build()
+    )
 
     start_handler = CommandHandler('start', start)
     stats_handler = CommandHandler('stats', stats_command)
+    usage_handler = CommandHandler('usage', usage_command)
     streak_handler = CommandHandler('streak', streak_command)
+    import_handler = CommandHandler('import', import_command)
+    quick_handler = CommandHandler('quick', quick_command)
 
     # Allow text AND photos
     message_handler = MessageHandler((filters.TEXT | filters.PHOTO) & (~filters.COMMAND), handle_message)
+    document_handler = MessageHandler(filters.Document.ALL, handle_document)
 
     application.add_handler(start_handler)
     application.add_handler(stats_handler)
+    application.add_handler(usage_handler)
     application.add_handler(streak_handler)
+    application.add_handler(import_handler)
+    application.add_handler(quick_handler)
     application.add_handler(message_handler)
+    application.add_handler(document_handler)
 
     print("Bot is running...")
     application.run_polling()
@@ -0,0 +1,334 @@
+"""
+Photo ingest: size selection, downscaling, content-hash dedupe and retention.
+
+Telegram offers every photo in several sizes. We download the smallest
+one that is still big enough for the agent to read (MIN_SIDE on its long
+edge) and, if it is larger than MAX_SIDE, downscale it in a worker
+thread (when Pillow is installed). Photos are stored once per content
+hash as photos/<hash>.jpg, with an index that remembers the agent's
+earlier take on each per chat, so a screenshot re-sent to the same chat
+reuses it. Only the bytes are shared between chats. A retention
+pass keeps the directory under an age and a size limit.
+
+Albums (media groups) arrive as one update per photo; AlbumCollector
+gathers them so the whole album becomes a single agent turn.
+"""
+
+import asyncio
+import hashlib
+import io
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from typing import Any, Dict, List, Optional, Sequence
+
+try:
+    from PIL import Image
+except ImportError:  # Photos are stored as sent without Pillow
+    Image = None
+
+logger = logging.getLogger(__name__)
+
+PHOTOS_DIR = "photos"
+INDEX_FILE = "index.json"
+MIN_SIDE = 1024          # long edge the agent needs to read screenshots
+MAX_SIDE = 1568          # larger photos are downscaled to this long edge
+JPEG_QUALITY = 85
+MAX_ANALYSIS_CHARS = 2000
+DEFAULT_MAX_AGE_DAYS = 30
+DEFAULT_MAX_MB = 200
+RETENTION_INTERVAL = 6 * 3600   # seconds between retention passes
+ALBUM_WAIT = 1.0                # seconds of quiet before an album is complete
+
+
+def pick_size(sizes: Sequence[Any], min_side: int = MIN_SIDE) -> Any:
+    """
+    Smallest photo size whose long edge is at least min_side, else the largest.
+
+    Args:
+        sizes: Telegram PhotoSize objects (anything with width and height)
+    """
+    ordered = sorted(sizes, key=lambda s: s.width * s.height)
+    for size in ordered:
+        if max(size.width, size.height) >= min_side:
+            return size
+    return ordered[-1]
+
+
+def downscale(data: bytes, max_side: int = MAX_SIDE) -> bytes:
+    """Re-encode a photo with its long edge at most max_side (as-is without Pillow)."""
+    if Image is None:
+        return data
+    try:
+        with Image.open(io.BytesIO(data)) as image:
+            if max(image.size) <= max_side:
+                return data
+            image.thumbnail((max_side, max_side))
+            out = io.BytesIO()
+            image.convert("RGB").save(out, format="JPEG", quality=JPEG_QUALITY, optimize=True)
+            return out.getvalue()
+    except Exception as e:
+        logger.warning(f"Couldn't downscale photo, keeping original: {e}")
+        return data
+
+
+class PhotoStore:
+    """
+    Content-addressed photo files plus an index of when each was last
+    used and what the agent made of it.
+
+    Index entries: {hash: {"bytes", "used_at", "file_ids": [Telegram
+    file_unique_id, ...], "analyses": {chat_id: {"text", "sent_at"}}}}.
+    file_unique_id is stable for a forwarded or re-sent file, so those
+    skip the download entirely.
+    Methods may be called from worker threads; the index has its own lock.
+    """
+
+    def __init__(
+        self,
+        dir_path: str = PHOTOS_DIR,
+        max_age_days: float = DEFAULT_MAX_AGE_DAYS,
+        max_bytes: int = DEFAULT_MAX_MB * 1024 * 1024
+    ):
+        self.dir_path = dir_path
+        self.max_age = max_age_days * 86400
+        self.max_bytes = max_bytes
+        self._index_path = os.path.join(dir_path, INDEX_FILE)
+        self._index: Dict[str, dict] = {}
+        self._by_file_id: Dict[str, str] = {}
+        self._lock = threading.RLock()
+        self._task: Optional[asyncio.Task] = None
+        self.reused = 0
+        self.stored = 0
+        self.deleted = 0
+        os.makedirs(dir_path, exist_ok=True)
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self._index_path):
+            return
+        try:
+            with open(self._index_path, 'r') as f:
+                self._index = json.load(f)
+        except Exception as e:
+            logger.error(f"Error loading photo index, starting fresh: {e}")
+            self._index = {}
+        for content_hash, entry in self._index.items():
+            # Analyses from before they were kept per chat can't be attributed
+            entry.pop("analysis", None)
+            entry.pop("sent_at", None)
+            entry.setdefault("analyses", {})
+            for file_id in entry.get("file_ids", []):
+                self._by_file_id[file_id] = content_hash
+
+    def _save(self):
+        fd, temp_path = tempfile.mkstemp(dir=self.dir_path, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(self._index, f)
+            os.rename(temp_path, self._index_path)
+        except Exception as e:
+            logger.error(f"Error saving photo index: {e}")
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+
+    def path(self, content_hash: str) -> str:
+        return os.path.abspath(os.path.join(self.dir_path, f"{content_hash}.jpg"))
+
+    def lookup(self, file_unique_id: str) -> Optional[str]:
+        """Hash of an already stored photo with this Telegram file id, if its file still exists."""
+        with self._lock:
+            content_hash = self._by_file_id.get(file_unique_id)
+            if content_hash and os.path.exists(self.path(content_hash)):
+                self._touch(content_hash)
+                self.reused += 1
+                return content_hash
+        return None
+
+    def put(self, data: bytes, file_unique_id: str = "") -> str:
+        """
+        Store (downscaled) photo bytes once per content. Returns the content hash.
+
+        Blocking (hashing, Pillow, disk); call it through asyncio.to_thread.
+        """
+        content_hash = hashlib.sha256(data).hexdigest()[:32]
+        path = self.path(content_hash)
+        with self._lock:
+            known = content_hash in self._index and os.path.exists(path)
+        if not known:
+            scaled = downscale(data)
+            fd, temp_path = tempfile.mkstemp(dir=self.dir_path, suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    f.write(scaled)
+                os.rename(temp_path, path)
+            except:
+                if os.path.exists(temp_path):
+                    os.unlink(temp_path)
+                raise
+
+        with self._lock:
+            if known:
+                self.reused += 1
+            else:
+                self._index[content_hash] = {"bytes": len(scaled), "file_ids": [], "analyses": {}}
+                self.stored += 1
+            entry = self._index[content_hash]
+            if file_unique_id and file_unique_id not in entry["file_ids"]:
+                entry["file_ids"].append(file_unique_id)
+                self._by_file_id[file_unique_id] = content_hash
+            self._touch(content_hash)
+        return content_hash
+
+    def _touch(self, content_hash: str):
+        self._index[content_hash]["used_at"] = time.time()
+        self._save()
+
+    def analysis(self, content_hash: str, chat_id: Any) -> Optional[dict]:
+        """The agent's earlier reply to this photo in this chat and when the chat first sent it, if any."""
+        with self._lock:
+            entry = self._index.get(content_hash)
+            if entry:
+                return entry["analyses"].get(str(chat_id))
+        return None
+
+    def set_analysis(self, content_hash: str, chat_id: Any, text: str):
+        with self._lock:
+            entry = self._index.get(content_hash)
+            if entry is not None and text:
+                earlier = entry["analyses"].get(str(chat_id)) or {}
+                entry["analyses"][str(chat_id)] = {
+                    "text": text[:MAX_ANALYSIS_CHARS],
+                    "sent_at": earlier.get("sent_at", time.time())
+                }
+                self._save()
+
+    def enforce_retention(self) -> int:
+        """
+        Delete photos unused for max_age, then the least recently used
+        until the directory fits max_bytes. Files the index doesn't know
+        (e.g. from before the index existed) go by modification time.
+        Returns the number of files deleted.
+        """
+        with self._lock:
+            now = time.time()
+            files = []  # (last_used, bytes, path, hash or None)
+            known = {f"{h}.jpg": h for h in self._index}
+            for name in os.listdir(self.dir_path):
+                path = os.path.join(self.dir_path, name)
+                if name == INDEX_FILE or name.endswith(".tmp") or not os.path.isfile(path):
+                    continue
+                content_hash = known.get(name)
+                if content_hash is not None:
+                    entry = self._index[content_hash]
+                    files.append((entry.get("used_at", 0), entry["bytes"], path, content_hash))
+                else:
+                    stat = os.stat(path)
+                    files.append((stat.st_mtime, stat.st_size, path, None))
+
+            files.sort()
+            total = sum(f[1] for f in files)
+            deleted = 0
+            for last_used, size, path, content_hash in files:
+                if now - last_used <= self.max_age and total <= self.max_bytes:
+                    break
+                try:
+                    os.unlink(path)
+                except FileNotFoundError:
+                    pass
+                total -= size
+                deleted += 1
+                if content_hash is not None:
+                    for file_id in self._index.pop(content_hash).get("file_ids", []):
+                        self._by_file_id.pop(file_id, None)
+
+            # Entries whose file disappeared some other way
+            for content_hash in [h for h in self._index if not os.path.exists(self.path(h))]:
+                for file_id in self._index.pop(content_hash).get("file_ids", []):
+                    self._by_file_id.pop(file_id, None)
+
+            self._save()
+            if deleted:
+                self.deleted += deleted
+                logger.info(f"Photo retention removed {deleted} files, {total / 1024 / 1024:.1f}MB left")
+        return deleted
+
+    async def _retain_periodically(self):
+        while True:
+            try:
+                await asyncio.to_thread(self.enforce_retention)
+            except Exception as e:
+                logger.error(f"Photo retention failed: {e}")
+            await asyncio.sleep(RETENTION_INTERVAL)
+
+    def start(self):
+        """Run the retention pass now and every RETENTION_INTERVAL."""
+        if self._task is None:
+            self._task = asyncio.ensure_future(self._retain_periodically())
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def stats(self) -> dict:
+        with self._lock:
+            photos = len(self._index)
+            total = sum(e["bytes"] for e in self._index.values())
+        return {
+            "photos": photos,
+            "bytes": total,
+            "stored": self.stored,
+            "reused": self.reused,
+            "deleted": self.deleted
+        }
+
+
+class AlbumCollector:
+    """
+    Gathers the updates of a media group into one list.
+
+    The first message of an album waits until no new photo has arrived
+    for ALBUM_WAIT seconds and gets every message back; the others get
+    None and should return without a turn of their own.
+    """
+
+    def __init__(self, wait: float = ALBUM_WAIT):
+        self.wait = wait
+        self._albums: Dict[str, dict] = {}
+
+    async def collect(self, group_id: str, message: Any) -> Optional[List[Any]]:
+        album = self._albums.get(group_id)
+        if album is not None:
+            album["messages"].append(message)
+            album["last"] = time.monotonic()
+            return None
+
+        album = {"messages": [message], "last": time.monotonic()}
+        self._albums[group_id] = album
+        try:
+            while True:
+                remaining = album["last"] + self.wait - time.monotonic()
+                if remaining <= 0:
+                    break
+                await asyncio.sleep(remaining)
+        finally:
+            del self._albums[group_id]
+        return sorted(album["messages"], key=lambda m: m.message_id)
+
+
+# Global photo store
+_photo_store: Optional[PhotoStore] = None
+
+
+def get_photo_store() -> PhotoStore:
+    global _photo_store
+    if _photo_store is None:
+        _photo_store = PhotoStore(
+            max_age_days=float(os.getenv('PHOTO_MAX_AGE_DAYS', DEFAULT_MAX_AGE_DAYS)),
+            max_bytes=int(float(os.getenv('PHOTO_MAX_MB', DEFAULT_MAX_MB)) * 1024 * 1024)
+        )
+    return _photo_store
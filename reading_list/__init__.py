@@ -0,0 +1,22 @@
+# Reading list module for Gemi
+from .types import ReadingItem
+from .store import ReadingListStore
+from .journal import ReadingJournal
+from .shards import ShardManager, get_shard_manager, set_shard_manager, get_reading_store
+from .tools import list_items, search, add_item, mark_read, update_item, delete_item, count, read_snapshot, quick_picks
+from .urls import canonicalize_url, detect_type
+from .router import classify, handle_fast_path
+from .snapshots import SnapshotStore, SnapshotPipeline, get_snapshot_store, get_snapshot_pipeline, set_snapshot_pipeline
+from .mcp_tools import create_reading_list_mcp_server
+
+__all__ = [
+    'ReadingItem',
+    'ReadingListStore',
+    'ReadingJournal',
+    'ShardManager', 'get_shard_manager', 'set_shard_manager', 'get_reading_store',
+    'list_items', 'search', 'add_item', 'mark_read', 'update_item', 'delete_item', 'count', 'read_snapshot', 'quick_picks',
+    'SnapshotStore', 'SnapshotPipeline', 'get_snapshot_store', 'get_snapshot_pipeline', 'set_snapshot_pipeline',
+    'canonicalize_url', 'detect_type',
+    'classify', 'handle_fast_path',
+    'create_reading_list_mcp_server'
+]
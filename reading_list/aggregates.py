@@ -0,0 +1,136 @@
+"""Materialized reading list aggregates, maintained on every write.
+
+The aggregates table holds one counter per (kind, key):
+
+    status     unread / read          -> item count
+    type       article / video / ...  -> item count
+    tag        tag name               -> item count
+    added_day  YYYY-MM-DD (local)     -> items added that day
+    read_day   YYYY-MM-DD (local)     -> items read that day
+
+Days are bucketed in the store's timezone, so /stats and /streak agree
+with the user's calendar rather than UTC.
+"""
+
+import logging
+import sqlite3
+from collections import Counter
+from datetime import datetime
+from typing import Optional, List
+import pytz
+
+from .types import ReadingItem
+
+logger = logging.getLogger(__name__)
+
+KINDS = ("status", "type", "tag", "added_day", "read_day")
+
+
+def local_day(timestamp: Optional[str], tz) -> Optional[str]:
+    """Convert an ISO UTC timestamp to a 'YYYY-MM-DD' day in the given timezone."""
+    if not timestamp:
+        return None
+    try:
+        dt = datetime.fromisoformat(timestamp.replace('Z', '+00:00'))
+    except ValueError:
+        return None
+    if dt.tzinfo is None:
+        dt = pytz.utc.localize(dt)
+    return dt.astimezone(tz).date().isoformat()
+
+
+def item_keys(item: ReadingItem, tz) -> List[tuple]:
+    """Return every (kind, key) counter an item contributes to."""
+    keys = [("status", item.status), ("type", item.type)]
+    keys.extend(("tag", tag) for tag in item.tags)
+    added_day = local_day(item.added_at, tz)
+    if added_day:
+        keys.append(("added_day", added_day))
+    read_day = local_day(item.read_at, tz)
+    if read_day:
+        keys.append(("read_day", read_day))
+    return keys
+
+
+def apply_delta(conn: sqlite3.Connection, keys: List[tuple], delta: int):
+    """Add delta to each (kind, key) counter, dropping counters that reach zero."""
+    for kind, key in keys:
+        conn.execute(
+            "INSERT INTO aggregates (kind, key, count) VALUES (?, ?, ?) "
+            "ON CONFLICT(kind, key) DO UPDATE SET count = count + excluded.count",
+            (kind, key, delta)
+        )
+    if delta < 0:
+        conn.executemany(
+            "DELETE FROM aggregates WHERE kind = ? AND key = ? AND count <= 0",
+            keys
+        )
+
+
+def apply_counts(conn: sqlite3.Connection, counts: Counter):
+    """Add a batch of positive per-counter increments in one pass."""
+    conn.executemany(
+        "INSERT INTO aggregates (kind, key, count) VALUES (?, ?, ?) "
+        "ON CONFLICT(kind, key) DO UPDATE SET count = count + excluded.count",
+        [(kind, key, n) for (kind, key), n in counts.items()]
+    )
+
+
+def apply_change(conn: sqlite3.Connection, old: Optional[ReadingItem], new: Optional[ReadingItem], tz):
+    """Move an item's contribution from its old state to its new state."""
+    old_keys = Counter(item_keys(old, tz)) if old else Counter()
+    new_keys = Counter(item_keys(new, tz)) if new else Counter()
+    removed = list((old_keys - new_keys).elements())
+    added = list((new_keys - old_keys).elements())
+    if removed:
+        apply_delta(conn, removed, -1)
+    if added:
+        apply_delta(conn, added, 1)
+
+
+def compute(conn: sqlite3.Connection, tz) -> Counter:
+    """Compute all aggregates from scratch by scanning the items table."""
+    totals = Counter()
+    rows = conn.execute("SELECT status, type, added_at, read_at FROM items").fetchall()
+    for status, item_type, added_at, read_at in rows:
+        totals[("status", status)] += 1
+        totals[("type", item_type)] += 1
+        added_day = local_day(added_at, tz)
+        if added_day:
+            totals[("added_day", added_day)] += 1
+        read_day = local_day(read_at, tz)
+        if read_day:
+            totals[("read_day", read_day)] += 1
+    for tag, n in conn.execute("SELECT tag, COUNT(*) FROM item_tags GROUP BY tag"):
+        totals[("tag", tag)] = n
+    return totals
+
+
+def load(conn: sqlite3.Connection) -> Counter:
+    """Load the materialized aggregates table."""
+    return Counter({
+        (kind, key): count
+        for kind, key, count in conn.execute("SELECT kind, key, count FROM aggregates")
+    })
+
+
+def rebuild(conn: sqlite3.Connection, tz):
+    """Replace the aggregates table with freshly computed values."""
+    totals = compute(conn, tz)
+    conn.execute("DELETE FROM aggregates")
+    conn.executemany(
+        "INSERT INTO aggregates (kind, key, count) VALUES (?, ?, ?)",
+        [(kind, key, count) for (kind, key), count in totals.items()]
+    )
+    logger.info(f"Rebuilt reading list aggregates ({len(totals)} counters)")
+
+
+def diff(conn: sqlite3.Connection, tz) -> List[str]:
+    """Compare materialized aggregates with a fresh scan. Returns mismatches."""
+    expected = compute(conn, tz)
+    actual = load(conn)
+    problems = []
+    for key in sorted(set(expected) | set(actual)):
+        if expected[key] != actual[key]:
+            problems.append(f"{key[0]}:{key[1]} expected {expected[key]}, found {actual[key]}")
+    return problems
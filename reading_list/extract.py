@@ -0,0 +1,127 @@
+"""
+Main-text and duration extraction from page HTML.
+
+Pure functions on strings so they can run in a worker process. The
+heuristic: take text from block elements (paragraphs, headings, list
+items, quotes, code) inside <article> or <main> when the page has one,
+otherwise from the whole body, skipping scripts, navigation and other
+page chrome. Durations come from the meta tags and embedded JSON that
+video and podcast pages use to state their length.
+"""
+
+import re
+from html.parser import HTMLParser
+from typing import List, Optional, Tuple
+
+from .timing import parse_duration
+
+# Elements whose contents are never article text
+_SKIP_TAGS = {
+    "script", "style", "noscript", "template", "svg", "canvas", "iframe",
+    "nav", "header", "footer", "aside", "form", "button", "select", "figure"
+}
+# Elements that hold article text, one block each
+_BLOCK_TAGS = {"p", "h1", "h2", "h3", "h4", "h5", "h6", "li", "blockquote", "pre", "dd", "dt", "td"}
+# Containers that mark the article when a page has them
+_CONTENT_TAGS = {"article", "main"}
+# HTML void elements never get an end tag, so they don't nest
+_VOID_TAGS = {"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "source", "track", "wbr"}
+
+_WHITESPACE_RE = re.compile(r"\s+")
+_WORD_RE = re.compile(r"\w+")
+
+# Where pages state a video's or episode's length: meta tags (OpenGraph,
+# schema.org itemprop) and the JSON embedded by players and JSON-LD
+_META_TAG_RE = re.compile(r"<meta\b[^>]*>", re.IGNORECASE)
+_META_KEY_RE = re.compile(r"""(?:property|name|itemprop)\s*=\s*["']([^"']+)["']""", re.IGNORECASE)
+_META_CONTENT_RE = re.compile(r"""content\s*=\s*["']([^"']*)["']""", re.IGNORECASE)
+_DURATION_KEYS = {"duration", "og:video:duration", "video:duration", "music:duration", "og:audio:duration"}
+_JSON_DURATION_RES = (
+    re.compile(r'"lengthSeconds"\s*:\s*"?(\d+)'),
+    re.compile(r'"duration"\s*:\s*"(P[T0-9HMSD.]+)"', re.IGNORECASE),
+)
+
+# Blocks shorter than this (in words) outside headings are usually chrome
+MIN_BLOCK_WORDS = 4
+
+
+class _TextExtractor(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.skip_depth = 0
+        self.content_depth = 0
+        self.block_tag = None
+        self.buffer: List[str] = []
+        self.blocks: List[tuple] = []  # (in_content, tag, text)
+
+    def handle_starttag(self, tag, attrs):
+        if tag in _VOID_TAGS:
+            return
+        if tag in _SKIP_TAGS:
+            self.skip_depth += 1
+        elif tag in _CONTENT_TAGS:
+            self.content_depth += 1
+        elif tag in _BLOCK_TAGS and self.block_tag is None:
+            self.block_tag = tag
+            self.buffer = []
+
+    def handle_endtag(self, tag):
+        if tag in _SKIP_TAGS:
+            self.skip_depth = max(0, self.skip_depth - 1)
+        elif tag in _CONTENT_TAGS:
+            self.content_depth = max(0, self.content_depth - 1)
+        elif tag == self.block_tag:
+            text = _WHITESPACE_RE.sub(" ", "".join(self.buffer)).strip()
+            if text:
+                self.blocks.append((self.content_depth > 0, tag, text))
+            self.block_tag = None
+
+    def handle_data(self, data):
+        if self.block_tag is not None and self.skip_depth == 0:
+            self.buffer.append(data)
+
+
+def extract_text(html: str) -> str:
+    """Readable main text of a page, one block per paragraph."""
+    parser = _TextExtractor()
+    parser.feed(html)
+    parser.close()
+
+    blocks = parser.blocks
+    if any(in_content for in_content, _, _ in blocks):
+        blocks = [b for b in blocks if b[0]]
+
+    kept = []
+    for _, tag, text in blocks:
+        heading = tag.startswith("h") and len(tag) == 2
+        if heading or tag == "pre" or len(_WORD_RE.findall(text)) >= MIN_BLOCK_WORDS:
+            kept.append(text)
+    return "\n\n".join(kept)
+
+
+def word_count(text: str) -> int:
+    return len(_WORD_RE.findall(text))
+
+
+def extract_article(html: str) -> Tuple[str, int]:
+    """extract_text plus its word count, in one call for a worker process."""
+    text = extract_text(html)
+    return text, word_count(text)
+
+
+def extract_duration(html: str) -> Optional[float]:
+    """A video's or podcast episode's length in seconds, if its page states one."""
+    for tag in _META_TAG_RE.finditer(html):
+        key = _META_KEY_RE.search(tag.group(0))
+        if key and key.group(1).lower() in _DURATION_KEYS:
+            content = _META_CONTENT_RE.search(tag.group(0))
+            seconds = parse_duration(content.group(1)) if content else None
+            if seconds:
+                return seconds
+    for pattern in _JSON_DURATION_RES:
+        match = pattern.search(html)
+        if match:
+            seconds = parse_duration(match.group(1))
+            if seconds:
+                return seconds
+    return None
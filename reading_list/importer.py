@@ -0,0 +1,265 @@
+"""Streaming importer for Pocket, Instapaper, CSV and browser bookmark exports."""
+
+import csv
+import io
+import logging
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from html.parser import HTMLParser
+from typing import Callable, Iterator, List, Optional
+
+from .types import ReadingItem, normalize_timestamp
+from .store import ReadingListStore
+from .urls import canonicalize_url, detect_type
+
+logger = logging.getLogger(__name__)
+
+# Items per transaction
+BATCH_SIZE = 500
+
+# Bytes read per step from HTML exports
+CHUNK_SIZE = 64 * 1024
+
+FORMATS = ("pocket_html", "pocket_csv", "instapaper_csv", "bookmarks_html", "csv")
+
+
+@dataclass
+class ImportRecord:
+    """One link parsed from an export, before dedupe."""
+    url: str
+    title: str = ""
+    tags: tuple = ()
+    added_at: Optional[str] = None
+    read: bool = False
+
+
+@dataclass
+class ImportProgress:
+    """Running totals, reported after every batch."""
+    format: str = ""
+    parsed: int = 0
+    added: int = 0
+    duplicates: int = 0
+    invalid: int = 0
+    done: bool = False
+
+
+def _timestamp(value) -> Optional[str]:
+    """Accept unix seconds or an ISO string."""
+    if value is None or value == "":
+        return None
+    try:
+        seconds = int(float(value))
+        return datetime.fromtimestamp(seconds, tz=timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+    except (TypeError, ValueError, OverflowError, OSError):
+        return normalize_timestamp(str(value))
+
+
+def _split_tags(value: Optional[str]) -> tuple:
+    if not value:
+        return ()
+    sep = "|" if "|" in value else ","
+    return tuple(t.strip() for t in value.split(sep) if t.strip())
+
+
+# ============================================================
+# Parsers
+# ============================================================
+
+class _AnchorParser(HTMLParser):
+    """
+    Collects <a> links from Pocket and Netscape bookmark HTML.
+
+    Pocket puts read items under an <h1>Read Archive</h1> heading; the
+    section is tracked from the most recent <h1>.
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.records: List[ImportRecord] = []
+        self._current: Optional[ImportRecord] = None
+        self._in_heading = False
+        self._heading = ""
+        self._read_section = False
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "h1":
+            self._in_heading = True
+            self._heading = ""
+        elif tag == "a":
+            attrs = {k.lower(): v for k, v in attrs}
+            href = attrs.get("href") or ""
+            if href.startswith(("http://", "https://")):
+                self._current = ImportRecord(
+                    url=href,
+                    tags=_split_tags(attrs.get("tags")),
+                    added_at=_timestamp(attrs.get("time_added") or attrs.get("add_date")),
+                    read=self._read_section
+                )
+
+    def handle_endtag(self, tag):
+        if tag == "h1":
+            self._in_heading = False
+            heading = self._heading.strip().lower()
+            self._read_section = heading.startswith("read") or "archive" in heading
+        elif tag == "a" and self._current is not None:
+            self.records.append(self._current)
+            self._current = None
+
+    def handle_data(self, data):
+        if self._in_heading:
+            self._heading += data
+        elif self._current is not None:
+            self._current.title += data.strip()
+
+
+def _parse_html(f: io.TextIOBase) -> Iterator[ImportRecord]:
+    parser = _AnchorParser()
+    while True:
+        chunk = f.read(CHUNK_SIZE)
+        if not chunk:
+            break
+        parser.feed(chunk)
+        yield from parser.records
+        parser.records.clear()
+    parser.close()
+    yield from parser.records
+
+
+def _parse_csv(f: io.TextIOBase, fmt: str) -> Iterator[ImportRecord]:
+    reader = csv.DictReader(f)
+    for row in reader:
+        row = {(k or "").strip().lower(): (v or "").strip() for k, v in row.items()}
+        if fmt == "instapaper_csv":
+            yield ImportRecord(
+                url=row.get("url", ""),
+                title=row.get("title", ""),
+                tags=_split_tags(row.get("tags")),
+                added_at=_timestamp(row.get("timestamp")),
+                read=row.get("folder", "").lower() == "archive"
+            )
+        else:
+            status = (row.get("status") or "").lower()
+            yield ImportRecord(
+                url=row.get("url") or row.get("link") or row.get("href", ""),
+                title=row.get("title") or row.get("description") or row.get("name", ""),
+                tags=_split_tags(row.get("tags")),
+                added_at=_timestamp(
+                    row.get("time_added") or row.get("added_at") or row.get("timestamp") or row.get("created")
+                ),
+                read=status in ("read", "archive", "archived")
+            )
+
+
+def detect_format(head: str) -> str:
+    """Guess an export's format from its first few kilobytes."""
+    lowered = head.lower()
+    if lowered.lstrip().startswith("<") or "<a " in lowered:
+        if "netscape-bookmark-file" in lowered or "add_date" in lowered:
+            return "bookmarks_html"
+        return "pocket_html"
+    header = lowered.splitlines()[0] if lowered else ""
+    if "selection" in header and "folder" in header:
+        return "instapaper_csv"
+    if "time_added" in header:
+        return "pocket_csv"
+    return "csv"
+
+
+def iter_records(f: io.TextIOBase, fmt: str) -> Iterator[ImportRecord]:
+    """Stream records from an open export file."""
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown import format: {fmt}")
+    if fmt.endswith("_html"):
+        return _parse_html(f)
+    return _parse_csv(f, fmt)
+
+
+# ============================================================
+# Import
+# ============================================================
+
+def _to_item(record: ImportRecord) -> ReadingItem:
+    added_at = record.added_at
+    return ReadingItem(
+        url=record.url.strip(),
+        description=record.title.strip()[:300],
+        type=detect_type(record.url),
+        tags=list(record.tags)[:5],
+        status="read" if record.read else "unread",
+        **({"added_at": added_at} if added_at else {})
+    )
+
+
+def import_file(
+    path: str,
+    get_store: Callable[[], ReadingListStore],
+    fmt: Optional[str] = None,
+    progress: Optional[Callable[[ImportProgress], None]] = None,
+    batch_size: int = BATCH_SIZE
+) -> ImportProgress:
+    """
+    Import an export file into a reading list, batch by batch.
+
+    Only the current batch is held in memory: links are deduped against
+    the store (which already holds every earlier batch) and within the
+    batch by canonical URL.
+
+    Args:
+        path: Export file path
+        get_store: function() -> store, resolved per batch so a long
+            import keeps working if the chat's shard is reopened
+        fmt: One of FORMATS, or None to detect it
+        progress: Called with running totals after every batch
+        batch_size: Items per transaction
+
+    Returns:
+        Final totals
+    """
+    with open(path, 'r', encoding='utf-8-sig', errors='replace', newline='') as f:
+        if fmt is None:
+            fmt = detect_format(f.read(4096))
+            f.seek(0)
+        totals = ImportProgress(format=fmt)
+        logger.info(f"Importing {path} as {fmt}")
+
+        batch: List[ReadingItem] = []
+        batch_urls = set()
+
+        def flush():
+            store = get_store()
+            totals.added += store.add_items(batch)
+            batch.clear()
+            batch_urls.clear()
+            if progress:
+                progress(totals)
+
+        for record in iter_records(f, fmt):
+            totals.parsed += 1
+            if not record.url.startswith(("http://", "https://")):
+                totals.invalid += 1
+                continue
+
+            try:
+                canonical = canonicalize_url(record.url)
+            except ValueError:
+                # e.g. a bad port or an unbalanced IPv6 bracket
+                totals.invalid += 1
+                continue
+            if canonical in batch_urls or get_store().find_by_url(record.url):
+                totals.duplicates += 1
+                continue
+
+            batch_urls.add(canonical)
+            batch.append(_to_item(record))
+            if len(batch) >= batch_size:
+                flush()
+
+        if batch:
+            flush()
+
+    totals.done = True
+    if progress:
+        progress(totals)
+    logger.info(f"Import finished: {totals}")
+    return totals
@@ -0,0 +1,266 @@
+"""Append-only event journal for the reading list, with snapshots and compaction.
+
+Every committed store write is appended as one JSON line:
+
+    {"seq": 42, "ts": "...", "event": "added", "item_id": "3fa1b2c4", "data": {...}}
+
+Events are 'added', 'tagged', 'status_changed', 'updated' and 'deleted'.
+Every event sets state rather than modifying it, so replaying an event
+twice is harmless.
+
+Once SNAPSHOT_EVERY events have accumulated, a background thread rotates
+the journal into a closed segment. It then writes a snapshot of the whole
+list atomically and deletes the segments the snapshot covers. Recovery
+loads the last snapshot and replays the segments and live journal after
+it.
+"""
+
+import glob
+import json
+import os
+import tempfile
+import threading
+import logging
+from typing import Dict, List, Optional
+
+from .types import ReadingItem, utc_now_iso
+
+logger = logging.getLogger(__name__)
+
+# Default journal directory
+DEFAULT_JOURNAL_DIR = "journal"
+
+# Events between snapshots
+SNAPSHOT_EVERY = 1000
+
+JOURNAL_FILE = "journal.jsonl"
+SNAPSHOT_FILE = "snapshot.json"
+SEGMENT_GLOB = "journal.*.jsonl"
+
+
+def item_events(old: Optional[ReadingItem], new: Optional[ReadingItem]) -> List[tuple]:
+    """Describe a store change as (event, item_id, data) tuples."""
+    if old is None and new is not None:
+        return [("added", new.id, new.to_dict())]
+    if new is None and old is not None:
+        return [("deleted", old.id, {})]
+    if old is None:
+        return []
+
+    events = []
+    if (old.status, old.read_at) != (new.status, new.read_at):
+        events.append(("status_changed", new.id, {"status": new.status, "read_at": new.read_at}))
+    if old.tags != new.tags:
+        events.append(("tagged", new.id, {"tags": list(new.tags)}))
+    old_dict, new_dict = old.to_dict(), new.to_dict()
+    changed = {
+        k: v for k, v in new_dict.items()
+        if k not in ("status", "read_at", "tags") and old_dict.get(k) != v
+    }
+    if changed:
+        events.append(("updated", new.id, changed))
+    return events
+
+
+def apply_event(items: Dict[str, dict], event: dict):
+    """Apply one journal event to an {item_id: item_dict} state."""
+    kind = event["event"]
+    item_id = event["item_id"]
+    data = event.get("data", {})
+    if kind == "added":
+        items[item_id] = dict(data)
+    elif kind == "deleted":
+        items.pop(item_id, None)
+    elif item_id in items:
+        items[item_id].update(data)
+
+
+class ReadingJournal:
+    """
+    Durable event log of reading list changes.
+
+    Attached to a ReadingListStore as a listener. Appends are O(1), and
+    the journal can rebuild the list if the database is ever lost.
+    """
+
+    def __init__(self, dir_path: str = DEFAULT_JOURNAL_DIR, snapshot_every: int = SNAPSHOT_EVERY):
+        self.dir_path = dir_path
+        self.snapshot_every = snapshot_every
+        self._lock = threading.Lock()
+        self._store = None
+        self._compaction_thread: Optional[threading.Thread] = None
+        self.closed = False
+        os.makedirs(dir_path, exist_ok=True)
+
+        self.snapshot_seq = self._read_snapshot().get("seq", 0)
+        self.seq = max([self.snapshot_seq] + [e["seq"] for e in self._read_tail()])
+        self.events_since_snapshot = self.seq - self.snapshot_seq
+        self._file = open(self._path(JOURNAL_FILE), 'a')
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.dir_path, name)
+
+    def close(self):
+        """Wait for any running compaction, then flush and close the journal file."""
+        thread = self._compaction_thread
+        if thread is not None:
+            thread.join()
+        with self._lock:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._file.close()
+            self.closed = True
+
+    # ------------------------------------------------------------
+    # Writing
+    # ------------------------------------------------------------
+
+    def attach(self, store):
+        """
+        Start journaling a store's writes.
+
+        If the store is empty but the journal isn't (e.g. the database was
+        lost), the list is restored from the journal first. A store with
+        no snapshot yet gets an initial one.
+        """
+        self._store = store
+        if store.count() == 0:
+            state = self.replay()
+            if state:
+                restored = store.add_items(ReadingItem.from_dict(d) for d in state.values())
+                logger.info(f"Restored {restored} reading list items from journal")
+        if not os.path.exists(self._path(SNAPSHOT_FILE)):
+            self.snapshot()
+        store.add_listener(self.on_change)
+
+    def on_change(self, old: Optional[ReadingItem], new: Optional[ReadingItem]):
+        """
+        Store listener: append the change's events.
+
+        The store calls this inside its write lock, so events are numbered
+        in commit order. Raises if the journal was closed, since the
+        change could then never be replayed.
+        """
+        events = item_events(old, new)
+        if not events:
+            return
+
+        with self._lock:
+            if self.closed:
+                logger.error(f"Write to closed journal {self.dir_path}: {len(events)} events lost")
+                raise RuntimeError(f"Journal {self.dir_path} is closed")
+            for kind, item_id, data in events:
+                self.seq += 1
+                line = json.dumps({
+                    "seq": self.seq, "ts": utc_now_iso(), "event": kind,
+                    "item_id": item_id, "data": data
+                })
+                self._file.write(line + "\n")
+            self._file.flush()
+            self.events_since_snapshot += len(events)
+            due = self.events_since_snapshot >= self.snapshot_every and self._compaction_thread is None
+            if due:
+                self._compaction_thread = threading.Thread(
+                    target=self._compact, name="journal-compaction", daemon=True
+                )
+
+        if due:
+            self._compaction_thread.start()
+
+    # ------------------------------------------------------------
+    # Snapshots and compaction
+    # ------------------------------------------------------------
+
+    def snapshot(self):
+        """Rotate the journal, snapshot the store and drop covered segments."""
+        if self._store is None:
+            raise RuntimeError("Journal is not attached to a store")
+
+        # Close the live journal as a segment; later events go to a fresh file
+        with self._lock:
+            seq = self.seq
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._file.close()
+            segment = self._path(f"journal.{seq:012d}.jsonl")
+            os.rename(self._path(JOURNAL_FILE), segment)
+            self._file = open(self._path(JOURNAL_FILE), 'a')
+            self.events_since_snapshot = 0
+
+        # Items may already include events after seq; replay is idempotent
+        data = {"seq": seq, "created_at": utc_now_iso(), "items": self._store.export_items()}
+        fd, temp_path = tempfile.mkstemp(dir=self.dir_path, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(data, f)
+                f.flush()
+                os.fsync(f.fileno())
+            os.rename(temp_path, self._path(SNAPSHOT_FILE))
+        except:
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+            raise
+
+        self.snapshot_seq = seq
+        for path in glob.glob(self._path(SEGMENT_GLOB)):
+            if _segment_seq(path) <= seq:
+                os.unlink(path)
+        logger.info(f"Reading list snapshot at seq {seq} ({len(data['items'])} items)")
+
+    def _compact(self):
+        try:
+            self.snapshot()
+        except Exception as e:
+            logger.error(f"Journal compaction failed: {e}")
+        finally:
+            with self._lock:
+                self._compaction_thread = None
+
+    # ------------------------------------------------------------
+    # Recovery
+    # ------------------------------------------------------------
+
+    def _read_snapshot(self) -> dict:
+        path = self._path(SNAPSHOT_FILE)
+        if not os.path.exists(path):
+            return {}
+        try:
+            with open(path, 'r') as f:
+                return json.load(f)
+        except Exception as e:
+            logger.error(f"Error reading journal snapshot: {e}")
+            return {}
+
+    def _read_tail(self) -> List[dict]:
+        """Events from closed segments and the live journal, in order."""
+        paths = sorted(glob.glob(self._path(SEGMENT_GLOB)), key=_segment_seq)
+        paths.append(self._path(JOURNAL_FILE))
+        events = []
+        for path in paths:
+            if not os.path.exists(path):
+                continue
+            with open(path, 'r') as f:
+                for line in f:
+                    try:
+                        events.append(json.loads(line))
+                    except ValueError:
+                        # A torn final line from a crash mid-append
+                        logger.warning(f"Skipping unreadable journal line in {path}")
+        return events
+
+    def replay(self) -> Dict[str, dict]:
+        """Rebuild the list state: last snapshot plus the journal tail."""
+        snapshot = self._read_snapshot()
+        snapshot_seq = snapshot.get("seq", 0)
+        items = {d["id"]: d for d in snapshot.get("items", [])}
+        for event in self._read_tail():
+            if event["seq"] > snapshot_seq:
+                apply_event(items, event)
+        return items
+
+
+def _segment_seq(path: str) -> int:
+    try:
+        return int(os.path.basename(path).split(".")[1])
+    except (IndexError, ValueError):
+        return 0
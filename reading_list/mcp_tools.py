@@ -0,0 +1,281 @@
+"""MCP tools for the reading list - used by Claude Agent SDK."""
+
+import asyncio
+from typing import Any, Callable
+from claude_agent_sdk import tool, create_sdk_mcp_server
+
+from .tools import list_items, search, add_item, mark_read, update_item, delete_item, count, read_snapshot, quick_picks, LIST_FIELDS, ITEM_TYPES
+from .metadata import get_metadata_fetcher, format_link_info
+
+MAX_LINK_INFO_URLS = 10
+
+
+def _text(result: str) -> dict[str, Any]:
+    return {
+        "content": [{"type": "text", "text": result}]
+    }
+
+
+_STRING_LIST = {"type": "array", "items": {"type": "string"}}
+
+# (name, description, input_schema, handler(chat_id, args)) for every tool
+_TOOLS = []
+
+
+def reading_tool(name: str, description: str, input_schema: Any):
+    """
+    Register a reading list tool.
+
+    Like claude_agent_sdk.tool, but the handler also receives the chat
+    id. The id is bound when a chat's server is created.
+    """
+    def decorator(handler):
+        _TOOLS.append((name, description, input_schema, handler))
+        return handler
+    return decorator
+
+
+@reading_tool(
+    "list_items",
+    "List reading list items, newest first, as compact '|'-separated rows. Filter by status ('unread'/'read'), "
+    "tags (any match), type, or older_than (days since added). Use fields to return only what you need "
+    f"(any of: {', '.join(LIST_FIELDS)}). Pass next_cursor back as cursor to get the next page.",
+    {
+        "type": "object",
+        "properties": {
+            "status": {"type": "string", "enum": ["unread", "read"]},
+            "tags": _STRING_LIST,
+            "type": {"type": "string", "enum": list(ITEM_TYPES)},
+            "older_than": {"type": "integer", "description": "Only items added more than N days ago"},
+            "limit": {"type": "integer", "description": "Page size, default 20, max 100"},
+            "cursor": {"type": "string"},
+            "fields": _STRING_LIST
+        },
+        "required": []
+    }
+)
+async def list_items_tool(chat_id: Any, args: dict[str, Any]) -> dict[str, Any]:
+    """List reading list items."""
+    return _text(list_items(
+        chat_id,
+        status=args.get("status"),
+        tags=args.get("tags"),
+        type=args.get("type"),
+        older_than=args.get("older_than"),
+        limit=args.get("limit"),
+        cursor=args.get("cursor"),
+        fields=args.get("fields")
+    ))
+
+
+@reading_tool(
+    "search",
+    "Full-text search the reading list (descriptions, reasons, urls, tags), best match first. "
+    "Use this to find an item from a vague reference like 'that kubernetes article' or 'the rust cli thing'.",
+    {
+        "type": "object",
+        "properties": {
+            "query": {"type": "string"},
+            "status": {"type": "string", "enum": ["unread", "read"]},
+            "limit": {"type": "integer", "description": "Maximum results, default 20"},
+            "fields": _STRING_LIST
+        },
+        "required": ["query"]
+    }
+)
+async def search_tool(chat_id: Any, args: dict[str, Any]) -> dict[str, Any]:
+    """Search the reading list."""
+    return _text(search(
+        chat_id,
+        query=args["query"],
+        status=args.get("status"),
+        limit=args.get("limit"),
+        fields=args.get("fields")
+    ))
+
+
+@reading_tool(
+    "add_item",
+    "Add a link to the reading list as unread. Returns the new item ID and the unread count.",
+    {
+        "type": "object",
+        "properties": {
+            "url": {"type": "string"},
+            "description": {"type": "string"},
+            "reason": {"type": "string", "description": "Why it might be interesting"},
+            "type": {"type": "string", "enum": list(ITEM_TYPES)},
+            "tags": _STRING_LIST
+        },
+        "required": ["url", "description", "type", "tags"]
+    }
+)
+async def add_item_tool(chat_id: Any, args: dict[str, Any]) -> dict[str, Any]:
+    """Add an item to the reading list."""
+    return _text(add_item(
+        chat_id,
+        url=args["url"],
+        description=args.get("description", ""),
+        reason=args.get("reason", ""),
+        type=args.get("type", "article"),
+        tags=args.get("tags")
+    ))
+
+
+@reading_tool(
+    "mark_read",
+    "Mark a reading list item as read by its ID. Get the ID from list_items first.",
+    {"item_id": str}
+)
+async def mark_read_tool(chat_id: Any, args: dict[str, Any]) -> dict[str, Any]:
+    """Mark an item as read."""
+    return _text(mark_read(chat_id, args["item_id"]))
+
+
+@reading_tool(
+    "update_item",
+    "Update a reading list item's description, reason, type or tags (tags replaces the whole list).",
+    {
+        "type": "object",
+        "properties": {
+            "item_id": {"type": "string"},
+            "description": {"type": "string"},
+            "reason": {"type": "string"},
+            "type": {"type": "string", "enum": list(ITEM_TYPES)},
+            "tags": _STRING_LIST
+        },
+        "required": ["item_id"]
+    }
+)
+async def update_item_tool(chat_id: Any, args: dict[str, Any]) -> dict[str, Any]:
+    """Update an item."""
+    return _text(update_item(
+        chat_id,
+        item_id=args["item_id"],
+        description=args.get("description"),
+        reason=args.get("reason"),
+        type=args.get("type"),
+        tags=args.get("tags")
+    ))
+
+
+@reading_tool(
+    "delete_item",
+    "Remove a reading list item entirely (e.g. he's not interested anymore). Get the ID from list_items first.",
+    {"item_id": str}
+)
+async def delete_item_tool(chat_id: Any, args: dict[str, Any]) -> dict[str, Any]:
+    """Delete an item."""
+    return _text(delete_item(chat_id, args["item_id"]))
+
+
+@reading_tool(
+    "count",
+    "Count reading list items, optionally filtered by status, tags and type.",
+    {
+        "type": "object",
+        "properties": {
+            "status": {"type": "string", "enum": ["unread", "read"]},
+            "tags": _STRING_LIST,
+            "type": {"type": "string", "enum": list(ITEM_TYPES)}
+        },
+        "required": []
+    }
+)
+async def count_tool(chat_id: Any, args: dict[str, Any]) -> dict[str, Any]:
+    """Count items."""
+    return _text(count(
+        chat_id,
+        status=args.get("status"),
+        tags=args.get("tags"),
+        type=args.get("type")
+    ))
+
+
+@reading_tool(
+    "link_info",
+    "Look up what links are (title, site, type, author, description) from their OpenGraph/oEmbed data. "
+    "Fast and cached - use this instead of WebFetch to describe and tag a link.",
+    {
+        "type": "object",
+        "properties": {
+            "urls": _STRING_LIST
+        },
+        "required": ["urls"]
+    }
+)
+async def link_info_tool(chat_id: Any, args: dict[str, Any]) -> dict[str, Any]:
+    """Fetch link metadata."""
+    urls = [u for u in args.get("urls") or [] if isinstance(u, str) and u.strip()][:MAX_LINK_INFO_URLS]
+    if not urls:
+        return _text("Error: no urls given")
+    infos = await get_metadata_fetcher().fetch_many(urls)
+    return _text(format_link_info(infos))
+
+
+@reading_tool(
+    "read_snapshot",
+    "Read the main text of a saved page from the local snapshot taken when it was added. "
+    "Use this before WebFetch to summarize or answer questions about a saved item.",
+    {
+        "type": "object",
+        "properties": {
+            "item_id": {"type": "string"},
+            "offset": {"type": "integer", "minimum": 0},
+            "max_chars": {"type": "integer", "minimum": 1}
+        },
+        "required": ["item_id"]
+    }
+)
+async def read_snapshot_tool(chat_id: Any, args: dict[str, Any]) -> dict[str, Any]:
+    """Read an item's snapshot text."""
+    return _text(read_snapshot(
+        chat_id,
+        item_id=args["item_id"],
+        offset=args.get("offset") or 0,
+        max_chars=args.get("max_chars")
+    ))
+
+
+@reading_tool(
+    "quick_picks",
+    "Pick unread items that together fill a time budget, from their estimated reading/watch times. "
+    "Use this whenever he says how much time he has.",
+    {
+        "type": "object",
+        "properties": {
+            "minutes": {"type": "integer", "minimum": 1},
+            "tags": _STRING_LIST,
+            "type": {"type": "string", "enum": list(ITEM_TYPES)}
+        },
+        "required": ["minutes"]
+    }
+)
+async def quick_picks_tool(chat_id: Any, args: dict[str, Any]) -> dict[str, Any]:
+    """Pick items for a time budget."""
+    # The knapsack takes tens of milliseconds on big budgets; keep it off the loop
+    return _text(await asyncio.to_thread(
+        quick_picks,
+        chat_id,
+        minutes=args["minutes"],
+        tags=args.get("tags"),
+        type=args.get("type")
+    ))
+
+
+def create_reading_list_mcp_server(get_chat_id: Callable[[], Any]):
+    """
+    Create a reading list MCP server whose tools act on one chat's list.
+
+    Args:
+        get_chat_id: function() -> chat_id, called on every tool use
+    """
+    def bind(name, description, input_schema, handler):
+        async def bound(args: dict[str, Any]) -> dict[str, Any]:
+            return await handler(get_chat_id(), args)
+        return tool(name, description, input_schema)(bound)
+
+    return create_sdk_mcp_server(
+        name="reading_list",
+        version="1.0.0",
+        tools=[bind(*spec) for spec in _TOOLS]
+    )
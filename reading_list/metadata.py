@@ -0,0 +1,419 @@
+"""
+Link metadata fetcher: title, OpenGraph and oEmbed data for saved links.
+
+Pages are fetched with one pooled httpx.AsyncClient, a bounded number at
+a time, reading only the first MAX_BYTES (metadata lives in <head>).
+Results are cached on disk per canonical URL with a TTL, and concurrent
+requests for the same URL share one fetch. That fetch belongs to the
+fetcher, not to its callers: a caller that stops waiting (a timeout)
+doesn't stop it, so slow pages still end up cached. Hosts on private,
+loopback or link-local addresses are never fetched.
+"""
+
+import asyncio
+import ipaddress
+import json
+import logging
+import os
+import socket
+import tempfile
+import time
+from dataclasses import dataclass, asdict, fields
+from html.parser import HTMLParser
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urljoin, urlsplit, quote
+
+import httpx
+
+from .urls import canonicalize_url, url_hash
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_DIR = os.path.join("cache", "metadata")
+DEFAULT_TTL = 7 * 24 * 3600       # seconds a fetched result stays fresh
+ERROR_TTL = 60 * 60               # failed fetches are retried sooner
+DEFAULT_CONCURRENCY = 4
+DEFAULT_TIMEOUT = 8.0             # seconds per request
+MAX_BYTES = 512 * 1024            # stop reading a page after this much
+USER_AGENT = "Mozilla/5.0 (compatible; ReadingBuddy/1.0; +https://github.com/samyakjain0606/reading-buddy)"
+
+# oEmbed endpoints for hosts whose pages are heavy or carry little metadata
+_OEMBED_PROVIDERS = {
+    "youtube.com": "https://www.youtube.com/oembed?format=json&url={url}",
+    "youtu.be": "https://www.youtube.com/oembed?format=json&url={url}",
+    "vimeo.com": "https://vimeo.com/api/oembed.json?url={url}",
+    "x.com": "https://publish.twitter.com/oembed?omit_script=true&url={url}",
+    "twitter.com": "https://publish.twitter.com/oembed?omit_script=true&url={url}",
+    "open.spotify.com": "https://open.spotify.com/oembed?url={url}",
+}
+
+
+@dataclass
+class LinkMetadata:
+    """What a link points at, as far as its page says."""
+    url: str
+    title: str = ""
+    description: str = ""
+    site_name: str = ""
+    og_type: str = ""
+    author: str = ""
+    image: str = ""
+    fetched_at: float = 0.0
+    error: str = ""
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "LinkMetadata":
+        known = {f.name for f in fields(cls)}
+        return cls(**{k: v for k, v in data.items() if k in known})
+
+    def summary(self) -> str:
+        """One compact line for the agent, e.g. 'Title — site (video): description'."""
+        if self.error and not self.title:
+            return f"{self.url}: couldn't fetch ({self.error})"
+        head = self.title or self.url
+        if self.site_name:
+            head += f" — {self.site_name}"
+        if self.author:
+            head += f" by {self.author}"
+        if self.og_type:
+            head += f" ({self.og_type})"
+        if self.description:
+            head += f": {self.description[:280]}"
+        return head
+
+
+class _MetaParser(HTMLParser):
+    """Collects <title>, <meta> and the oEmbed <link> from a page's head."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.meta: Dict[str, str] = {}
+        self.title = ""
+        self.oembed_url = ""
+        self.done = False
+        self._in_title = False
+
+    def handle_starttag(self, tag, attrs):
+        attrs = {k.lower(): (v or "") for k, v in attrs}
+        if tag == "title":
+            self._in_title = True
+        elif tag == "meta":
+            key = (attrs.get("property") or attrs.get("name") or "").lower()
+            if key and "content" in attrs:
+                self.meta.setdefault(key, attrs["content"].strip())
+        elif tag == "link" and "oembed" in attrs.get("type", "") and "json" in attrs.get("type", ""):
+            self.oembed_url = self.oembed_url or attrs.get("href", "")
+        elif tag == "body":
+            self.done = True
+
+    def handle_endtag(self, tag):
+        if tag == "title":
+            self._in_title = False
+        elif tag == "head":
+            self.done = True
+
+    def handle_data(self, data):
+        if self._in_title and not self.title:
+            self.title = data.strip()
+
+
+def parse_html(url: str, html: str) -> Tuple[LinkMetadata, str]:
+    """
+    Metadata from a page's HTML; OpenGraph and Twitter tags win over plain ones.
+
+    Returns:
+        The metadata and the page's oEmbed endpoint ("" if it has none)
+    """
+    parser = _MetaParser()
+    # Feed in pieces so parsing stops once the head is over
+    for start in range(0, len(html), 8192):
+        parser.feed(html[start:start + 8192])
+        if parser.done:
+            break
+    meta = parser.meta
+
+    def first(*keys):
+        for key in keys:
+            if meta.get(key):
+                return meta[key]
+        return ""
+
+    info = LinkMetadata(
+        url=url,
+        title=first("og:title", "twitter:title") or parser.title,
+        description=first("og:description", "twitter:description", "description"),
+        site_name=first("og:site_name", "application-name"),
+        og_type=first("og:type"),
+        author=first("author", "article:author", "twitter:creator"),
+        image=first("og:image", "twitter:image")
+    )
+    return info, urljoin(url, parser.oembed_url) if parser.oembed_url else ""
+
+
+def apply_oembed(info: LinkMetadata, data: dict):
+    """Fill gaps in info from an oEmbed response."""
+    info.title = info.title or data.get("title", "")
+    info.author = info.author or data.get("author_name", "")
+    info.site_name = info.site_name or data.get("provider_name", "")
+    info.og_type = info.og_type or data.get("type", "")
+    info.image = info.image or data.get("thumbnail_url", "")
+
+
+def _oembed_endpoint(url: str) -> Optional[str]:
+    host = (urlsplit(url).hostname or "").lower()
+    for provider_host, endpoint in _OEMBED_PROVIDERS.items():
+        if host == provider_host or host.endswith("." + provider_host):
+            return endpoint.format(url=quote(url, safe=""))
+    return None
+
+
+class MetadataCache:
+    """One JSON file per canonical URL under dir_path, written atomically."""
+
+    def __init__(self, dir_path: str = DEFAULT_CACHE_DIR, ttl: float = DEFAULT_TTL):
+        self.dir_path = dir_path
+        self.ttl = ttl
+        os.makedirs(dir_path, exist_ok=True)
+
+    def _path(self, canonical: str) -> str:
+        return os.path.join(self.dir_path, f"{url_hash(canonical) & 0xFFFFFFFFFFFFFFFF:016x}.json")
+
+    def get(self, canonical: str) -> Optional[LinkMetadata]:
+        path = self._path(canonical)
+        try:
+            with open(path, 'r') as f:
+                info = LinkMetadata.from_dict(json.load(f))
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.error(f"Error reading metadata cache {path}: {e}")
+            return None
+        ttl = ERROR_TTL if info.error else self.ttl
+        if time.time() - info.fetched_at > ttl:
+            return None
+        return info
+
+    def put(self, canonical: str, info: LinkMetadata):
+        """Cache info for canonical (also used to store metadata parsed elsewhere)."""
+        fd, temp_path = tempfile.mkstemp(dir=self.dir_path, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(info.to_dict(), f)
+            os.rename(temp_path, self._path(canonical))
+        except Exception as e:
+            logger.error(f"Error writing metadata cache: {e}")
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+
+
+class MetadataFetcher:
+    """
+    Async, cached link metadata lookups.
+
+    Call fetch()/fetch_many() from the event loop and aclose() on shutdown.
+    """
+
+    def __init__(
+        self,
+        cache: Optional[MetadataCache] = None,
+        concurrency: int = DEFAULT_CONCURRENCY,
+        timeout: float = DEFAULT_TIMEOUT,
+        transport: Optional[httpx.AsyncBaseTransport] = None
+    ):
+        self.cache = cache or MetadataCache()
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._client = httpx.AsyncClient(
+            timeout=httpx.Timeout(timeout, connect=min(timeout, 5.0)),
+            limits=httpx.Limits(max_connections=concurrency * 2, max_keepalive_connections=concurrency),
+            headers={"User-Agent": USER_AGENT, "Accept-Language": "en"},
+            follow_redirects=True,
+            transport=transport,
+            # Runs for every request, redirects included
+            event_hooks={"request": [_refuse_private_hosts]}
+        )
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self.hits = 0
+        self.fetches = 0
+        self.errors = 0
+
+    async def fetch(self, url: str) -> LinkMetadata:
+        """Metadata for url, from cache when fresh."""
+        canonical = canonicalize_url(url)
+        cached = self.cache.get(canonical)
+        if cached is not None:
+            self.hits += 1
+            return cached
+
+        task = self._inflight.get(canonical)
+        if task is None:
+            # Canonical URLs key the cache but may have been rewritten
+            # (e.g. upgraded to https), so fetch what was given
+            task = asyncio.ensure_future(self._fetch_and_cache(url, canonical))
+            self._inflight[canonical] = task
+            task.add_done_callback(lambda t: self._fetch_done(canonical, t))
+        try:
+            # Cancelling the caller (e.g. a timeout) only stops the waiting
+            return await asyncio.shield(task)
+        except asyncio.CancelledError:
+            if task.cancelled() and not asyncio.current_task().cancelling():
+                # The fetch itself was stopped (aclose), not this caller
+                return LinkMetadata(url=url, error="cancelled", fetched_at=time.time())
+            raise
+
+    async def _fetch_and_cache(self, url: str, canonical: str) -> LinkMetadata:
+        async with self._semaphore:
+            info = await self._fetch(url)
+        self.cache.put(canonical, info)
+        return info
+
+    def _fetch_done(self, canonical: str, task: asyncio.Task):
+        if self._inflight.get(canonical) is task:
+            del self._inflight[canonical]
+        if not task.cancelled():
+            task.exception()  # mark retrieved; waiters get it via shield
+
+    async def fetch_many(self, urls: List[str], timeout: Optional[float] = None) -> List[LinkMetadata]:
+        """
+        Fetch several links concurrently.
+
+        Links that fail or don't finish within timeout come back with
+        error set instead of raising.
+        """
+        async def one(url):
+            try:
+                return await asyncio.wait_for(self.fetch(url), timeout)
+            except asyncio.TimeoutError:
+                return LinkMetadata(url=url, error="timed out", fetched_at=time.time())
+            except Exception as e:
+                return LinkMetadata(url=url, error=str(e) or type(e).__name__, fetched_at=time.time())
+        return list(await asyncio.gather(*(one(u) for u in urls)))
+
+    async def fetch_page(
+        self,
+        url: str,
+        max_bytes: int = MAX_BYTES,
+        limit: Optional[asyncio.Semaphore] = None
+    ) -> Tuple[str, str, str]:
+        """
+        A page's HTML through the shared, bounded client.
+
+        Args:
+            limit: Concurrency limit to hold instead of the one metadata
+                lookups use, so background fetches can't starve them
+
+        Returns:
+            (html, final_url, content_type); html is "" for non-HTML responses
+        """
+        async with limit or self._semaphore:
+            return await self._get_page(url, max_bytes)
+
+    async def _get_page(self, url: str, max_bytes: int = MAX_BYTES) -> Tuple[str, str, str]:
+        """First max_bytes of a page, decoded, plus the final URL and content type."""
+        async with self._client.stream("GET", url) as response:
+            response.raise_for_status()
+            content_type = response.headers.get("content-type", "")
+            if "html" not in content_type and "xml" not in content_type:
+                return "", str(response.url), content_type
+            body = bytearray()
+            async for chunk in response.aiter_bytes():
+                body.extend(chunk)
+                if len(body) >= max_bytes:
+                    break
+            return bytes(body).decode(response.encoding or "utf-8", errors="replace"), str(response.url), content_type
+
+    async def _get_oembed(self, endpoint: str) -> dict:
+        response = await self._client.get(endpoint)
+        response.raise_for_status()
+        return response.json()
+
+    async def _fetch(self, url: str) -> LinkMetadata:
+        self.fetches += 1
+        info = LinkMetadata(url=url)
+        endpoint = _oembed_endpoint(url)
+        try:
+            if endpoint is None:
+                html, final_url, content_type = await self._get_page(url)
+                if html:
+                    info, discovered = parse_html(url, html)
+                    # Only worth a second request if the page itself said little
+                    endpoint = discovered if not info.title else None
+                else:
+                    info.og_type = content_type.split(";")[0]
+                    info.title = final_url.rsplit("/", 1)[-1]
+            if endpoint:
+                apply_oembed(info, await self._get_oembed(endpoint))
+        except httpx.HTTPStatusError as e:
+            self.errors += 1
+            info.error = f"HTTP {e.response.status_code}"
+        except Exception as e:
+            self.errors += 1
+            info.error = str(e) or type(e).__name__
+            logger.info(f"Metadata fetch failed for {url}: {info.error}")
+        info.fetched_at = time.time()
+        return info
+
+    def stats(self) -> dict:
+        return {
+            "cache_hits": self.hits,
+            "fetches": self.fetches,
+            "errors": self.errors,
+            "inflight": len(self._inflight)
+        }
+
+    async def aclose(self):
+        tasks = list(self._inflight.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await self._client.aclose()
+
+
+async def _refuse_private_hosts(request: httpx.Request):
+    """
+    httpx request hook: refuse hosts that are or resolve to private,
+    loopback, link-local or otherwise non-public addresses, so a saved
+    link can't make the bot probe its own network.
+    """
+    host = request.url.host
+    try:
+        addresses = [ipaddress.ip_address(host)]
+    except ValueError:
+        infos = await asyncio.get_running_loop().getaddrinfo(
+            host, request.url.port or 443, type=socket.SOCK_STREAM
+        )
+        addresses = [ipaddress.ip_address(info[4][0].split("%")[0]) for info in infos]
+    for address in addresses:
+        if not address.is_global:
+            raise httpx.RequestError(f"refusing to fetch {host}: {address} is not a public address", request=request)
+
+
+def format_link_info(infos: List[LinkMetadata]) -> str:
+    """One line per link for the agent."""
+    return "\n".join(f"- {info.url}: {info.summary()}" if info.title else f"- {info.summary()}" for info in infos)
+
+
+# Global fetcher, created on first use from the event loop
+_fetcher: Optional[MetadataFetcher] = None
+
+
+def get_metadata_fetcher() -> MetadataFetcher:
+    global _fetcher
+    if _fetcher is None:
+        _fetcher = MetadataFetcher()
+    return _fetcher
+
+
+def set_metadata_fetcher(fetcher: Optional[MetadataFetcher]):
+    global _fetcher
+    _fetcher = fetcher
+
+
+async def close_metadata_fetcher():
+    """Close the global fetcher's connections, if it was ever created."""
+    global _fetcher
+    if _fetcher is not None:
+        await _fetcher.aclose()
+        _fetcher = None
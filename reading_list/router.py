@@ -0,0 +1,191 @@
+"""Local intent router: handles common messages without an agent round trip."""
+
+import re
+import logging
+from dataclasses import dataclass, field
+from typing import Optional, List
+
+from .types import ReadingItem
+from .store import ReadingListStore
+from .tools import format_age, format_added
+from .urls import canonicalize_url, detect_type
+
+logger = logging.getLogger(__name__)
+
+URL_RE = re.compile(r'https?://\S+', re.IGNORECASE)
+
+_MARK_READ_RE = re.compile(
+    r'^(?:'
+    r'done\s+with|(?:i\s+|just\s+)?finished|(?:i\s+|just\s+)read|'
+    r'(?:i\s+|just\s+)?watched|mark(?:ed)?)\s+(?:reading\s+|watching\s+)?'
+    r'(?P<query>.+?)'
+    r'(?:\s+(?:as\s+)?(?:read|done))?[.!]*$',
+    re.IGNORECASE
+)
+
+_LIST_RE = re.compile(
+    r"^(?:what'?s|what\s+is|what\s+do\s+i\s+have|show(?:\s+me)?|list)\s*"
+    r"(?:my\s+)?(?:the\s+)?(?:reading\s+)?(?:list|unread|backlog)(?:\s+list)?\??$",
+    re.IGNORECASE
+)
+
+ITEM_ID_RE = re.compile(r'^[0-9a-f]{8}$')
+
+# Max items shown by the local list reply
+LIST_PREVIEW = 10
+
+
+@dataclass
+class Intent:
+    """A message classified by the router."""
+    kind: str                                  # "save_links", "mark_read" or "list"
+    urls: List[str] = field(default_factory=list)
+    query: str = ""
+
+
+@dataclass
+class FastPathResult:
+    """Reply to send the user, plus a note for the agent's next turn."""
+    reply: str
+    agent_note: Optional[str] = None
+
+
+def classify(text: str) -> Optional[Intent]:
+    """Classify a message, or return None if it needs the agent."""
+    text = text.strip()
+    if not text:
+        return None
+
+    # Only bare links: any commentary goes to the agent
+    urls = URL_RE.findall(text)
+    if urls and not URL_RE.sub("", text).strip():
+        return Intent(kind="save_links", urls=[u.rstrip(".,)") for u in urls])
+    if urls:
+        return None
+
+    if _LIST_RE.match(text):
+        return Intent(kind="list")
+
+    match = _MARK_READ_RE.match(text)
+    if match:
+        return Intent(kind="mark_read", query=match.group("query"))
+
+    return None
+
+
+def _save_links(store: ReadingListStore, urls: List[str]) -> FastPathResult:
+    saved = []
+    duplicates = []
+    invalid = 0
+    for url in urls:
+        try:
+            canonicalize_url(url)
+        except ValueError:
+            invalid += 1
+            continue
+        existing = store.check_duplicate(url)
+        if existing is not None:
+            duplicates.append(existing)
+            continue
+        item = store.add_item(ReadingItem(
+            url=url,
+            description=re.sub(r'^https?://(www\.)?', '', url).rstrip('/'),
+            type=detect_type(url)
+        ))
+        saved.append(item)
+
+    if not saved and len(duplicates) == 1:
+        item = duplicates[0]
+        state = "you already read it tho" if item.status == "read" else "still unread"
+        return FastPathResult(
+            reply=f"already got that one 🐧 [{item.type}] {item.description or item.url} - {format_added(item.added_at)}, {state}"
+        )
+
+    unread = store.count(status="unread")
+    if not saved and not duplicates:
+        return FastPathResult(reply="that link looks broken 🐧 nothing saved")
+    if not saved:
+        return FastPathResult(reply=f"all {len(duplicates)} of those are already saved 🐧 {unread} unread")
+    if len(saved) == 1 and not duplicates:
+        reply = f"saved 🐧 [{saved[0].type}] — {unread} unread now"
+    else:
+        reply = f"saved {len(saved)} 🐧 — {unread} unread now"
+    if duplicates:
+        reply += f" ({len(duplicates)} already there)"
+    if invalid:
+        reply += f" ({invalid} broken link{'s' if invalid > 1 else ''} skipped)"
+
+    lines = [f"[{i.id}] {i.url} ({i.type})" for i in saved]
+    note = (
+        "These links were saved directly, with no description or tags yet:\n"
+        + "\n".join(lines)
+        + "\nFill in description, reason and tags with mcp__reading_list__update_item when convenient."
+    )
+    return FastPathResult(reply=reply, agent_note=note)
+
+
+def _mark_read(store: ReadingListStore, query: str) -> Optional[FastPathResult]:
+    query = query.strip()
+    if ITEM_ID_RE.match(query):
+        item = store.get_item(query)
+        matches = [item] if item and item.status == "unread" else []
+    else:
+        matches = store.search(query, status="unread", limit=2, match_all=True)
+
+    # Ambiguous or unknown: let the agent figure it out
+    if len(matches) != 1:
+        return None
+
+    item = store.mark_read(matches[0].id)
+    age = format_age(item.added_at)
+    reply = f"marked done ✨ {item.description}"
+    if age != "today":
+        reply += f" (sat there {age})"
+    note = f"The user marked [{item.id}] '{item.description}' as read; it was handled directly."
+    return FastPathResult(reply=reply, agent_note=note)
+
+
+def _list_unread(store: ReadingListStore) -> FastPathResult:
+    total = store.count(status="unread")
+    if total == 0:
+        return FastPathResult(reply="nothing unread. who are you 🐧")
+
+    items = store.list_items(status="unread", limit=LIST_PREVIEW)
+    lines = [f"unread stuff ({total} items):", ""]
+    for i, item in enumerate(items, start=1):
+        tags = ", ".join(item.tags) or "untagged"
+        lines.append(f"{i}. [{item.type}] {item.description} - {tags} - {format_age(item.added_at)}")
+    if total > len(items):
+        lines.append(f"...and {total - len(items)} more")
+    return FastPathResult(reply="\n".join(lines))
+
+
+def handle_fast_path(text: str, store: Optional[ReadingListStore]) -> Optional[FastPathResult]:
+    """
+    Handle a message locally if it's a common, unambiguous intent.
+
+    Returns None when the message should go to the agent instead.
+    """
+    if store is None:
+        return None
+
+    intent = classify(text)
+    if intent is None:
+        return None
+
+    try:
+        if intent.kind == "save_links":
+            result = _save_links(store, intent.urls)
+        elif intent.kind == "mark_read":
+            result = _mark_read(store, intent.query)
+        elif intent.kind == "list":
+            result = _list_unread(store)
+        else:
+            result = None
+    except Exception as e:
+        logger.error(f"Fast path failed for {intent.kind}, falling back to agent: {e}")
+        return None
+
+    if result is not None:
+        logger.info(f"Handled '{intent.kind}' locally")
+    return result
@@ -0,0 +1,35 @@
+"""Full-text search helpers for the reading list's FTS5 index."""
+
+import re
+from typing import List, Optional
+
+# Words that carry no meaning when looking an item up by description
+STOPWORDS = {
+    "the", "a", "an", "that", "this", "one", "thing", "about", "on", "of", "in", "for",
+    "to", "and", "or", "with", "my", "it", "is", "was", "from", "some",
+    "article", "video", "post", "repo", "podcast", "tweet", "thread", "piece", "link"
+}
+
+# BM25 column weights: description, reason, url, tags
+BM25_WEIGHTS = (10.0, 2.0, 3.0, 5.0)
+
+
+def query_terms(text: str) -> List[str]:
+    """Lowercased search terms from free text, without stopwords."""
+    words = re.findall(r"\w+", text.lower())
+    return [w for w in words if w not in STOPWORDS and len(w) > 1]
+
+
+def build_fts_query(text: str, match_all: bool = False) -> Optional[str]:
+    """
+    Turn free text into a safe FTS5 MATCH expression.
+
+    Each term is quoted and prefix-matched ("kube" finds "kubernetes").
+    Terms are OR'ed for ranked search, or AND'ed when every term must
+    match (e.g. resolving "done with the rust cli thing" to one item).
+    """
+    terms = query_terms(text)
+    if not terms:
+        return None
+    joiner = " AND " if match_all else " OR "
+    return joiner.join(f'"{t}"*' for t in terms)
@@ -0,0 +1,236 @@
+"""Per-chat reading list shards: one SQLite store and journal per chat."""
+
+import os
+import shutil
+import threading
+import logging
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Optional, Any, Callable, Dict, Iterator, List
+
+from .store import ReadingListStore, DEFAULT_TZ, DEFAULT_DB_PATH, LEGACY_JSON_PATH
+from .journal import ReadingJournal, DEFAULT_JOURNAL_DIR
+
+logger = logging.getLogger(__name__)
+
+# Default directory holding one subdirectory per chat
+DEFAULT_DATA_DIR = "data"
+
+# Shards kept open at once; the least recently used is closed beyond this
+DEFAULT_MAX_OPEN = 32
+
+SHARD_DB_FILE = "reading_list.db"
+SHARD_JOURNAL_DIR = "journal"
+
+
+class ShardManager:
+    """
+    Opens each chat's reading list on first use and keeps the most
+    recently used ones open.
+
+    Every shard has its own database file, connection and lock, so a
+    write in one chat never waits on another. The manager's own lock is
+    only held to look up, insert or evict entries, never while a shard
+    is being opened or used.
+
+    Code that holds a store across awaits or on another thread should
+    take a lease(): a leased shard is never evicted, so the open count
+    may go over max_open until the lease is released. Evicted shards
+    are closed on a background thread (closing a journal joins its
+    compaction thread).
+    """
+
+    def __init__(self, base_dir: str = DEFAULT_DATA_DIR, tz: str = DEFAULT_TZ, max_open: int = DEFAULT_MAX_OPEN):
+        self.base_dir = base_dir
+        self.tz = tz
+        self.max_open = max_open
+        self._shards: "OrderedDict[str, tuple]" = OrderedDict()  # key -> (store, journal)
+        self._lock = threading.RLock()  # re-entered when a close finishes immediately
+        self._opening: dict = {}  # key -> lock held while that shard opens
+        self._leases: Dict[str, int] = {}  # key -> leases outstanding
+        self._closing: Dict[str, Future] = {}  # key -> close in progress
+        self._closer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="shard-close")
+        self._open_hooks: List[Callable] = []
+        os.makedirs(base_dir, exist_ok=True)
+
+    def add_open_hook(self, hook: Callable):
+        """Register a function(chat_key, store) called whenever a shard is opened."""
+        self._open_hooks.append(hook)
+
+    def shard_dir(self, chat_id: Any) -> str:
+        """Directory holding a chat's database and journal."""
+        return os.path.join(self.base_dir, str(chat_id))
+
+    def get(self, chat_id: Any) -> ReadingListStore:
+        """
+        Get a chat's store, opening it if needed.
+
+        The store may be closed once other shards push it out; use
+        lease() to keep it open while it's in use.
+        """
+        return self._get(str(chat_id), pin=False)
+
+    @contextmanager
+    def lease(self, chat_id: Any) -> Iterator[ReadingListStore]:
+        """Get a chat's store and keep it open until the block ends."""
+        key = str(chat_id)
+        store = self._get(key, pin=True)
+        try:
+            yield store
+        finally:
+            with self._lock:
+                self._leases[key] -= 1
+                if not self._leases[key]:
+                    del self._leases[key]
+                    self._evict_overflow()
+
+    def _get(self, key: str, pin: bool) -> ReadingListStore:
+        with self._lock:
+            shard = self._use(key, pin)
+            if shard is not None:
+                return shard[0]
+            open_lock = self._opening.setdefault(key, threading.Lock())
+
+        with open_lock:
+            with self._lock:
+                shard = self._use(key, pin)
+                if shard is not None:
+                    return shard[0]
+                closing = self._closing.get(key)
+            if closing is not None:
+                # Still being closed after an eviction; don't open it twice
+                closing.exception()
+
+            shard = self._open(key)
+
+            with self._lock:
+                self._shards[key] = shard
+                self._opening.pop(key, None)
+                if pin:
+                    self._leases[key] = self._leases.get(key, 0) + 1
+                self._evict_overflow(protect=key)
+        return shard[0]
+
+    def _use(self, key: str, pin: bool) -> Optional[tuple]:
+        """Look up an open shard and mark it recently used (and leased). Hold _lock."""
+        shard = self._shards.get(key)
+        if shard is not None:
+            self._shards.move_to_end(key)
+            if pin:
+                self._leases[key] = self._leases.get(key, 0) + 1
+        return shard
+
+    def _evict_overflow(self, protect: Optional[str] = None):
+        """Close least recently used shards beyond max_open, skipping leased ones. Hold _lock."""
+        excess = len(self._shards) - self.max_open
+        if excess <= 0:
+            return
+        for key in list(self._shards):
+            if excess <= 0:
+                break
+            if key == protect or key in self._leases:
+                continue
+            shard = self._shards.pop(key)
+            excess -= 1
+            logger.info(f"Closing idle reading list shard {key}")
+            future = self._closer.submit(_close_shard, shard)
+            self._closing[key] = future
+            future.add_done_callback(lambda f, key=key: self._closed(key, f))
+
+    def _closed(self, key: str, future: Future):
+        with self._lock:
+            if self._closing.get(key) is future:
+                del self._closing[key]
+        if future.exception() is not None:
+            logger.error(f"Error closing reading list shard {key}: {future.exception()}")
+
+    def _open(self, key: str) -> tuple:
+        path = self.shard_dir(key)
+        os.makedirs(path, exist_ok=True)
+        store = ReadingListStore(os.path.join(path, SHARD_DB_FILE), tz=self.tz)
+        journal = ReadingJournal(os.path.join(path, SHARD_JOURNAL_DIR))
+        journal.attach(store)
+        for hook in self._open_hooks:
+            try:
+                hook(key, store)
+            except Exception as e:
+                logger.error(f"Shard open hook {hook} failed for {key}: {e}")
+        logger.info(f"Opened reading list shard {key}")
+        return (store, journal)
+
+    def open_count(self) -> int:
+        """Number of shards currently open."""
+        with self._lock:
+            return len(self._shards)
+
+    def close_all(self):
+        """Close every open shard, waiting for evicted ones to finish closing. Blocking."""
+        self._closer.shutdown(wait=True)
+        with self._lock:
+            shards = list(self._shards.values())
+            self._shards.clear()
+        for shard in shards:
+            _close_shard(shard)
+
+    def adopt_legacy(self, chat_id: Any):
+        """
+        Move single-tenant data into a chat's shard.
+
+        The old top-level reading_list.db and journal/ are moved into the
+        chat's shard if it has none yet. Then the legacy reading_list.json
+        is imported once.
+        """
+        path = self.shard_dir(chat_id)
+        os.makedirs(path, exist_ok=True)
+        shard_db = os.path.join(path, SHARD_DB_FILE)
+
+        if os.path.exists(DEFAULT_DB_PATH) and not os.path.exists(shard_db):
+            for suffix in ("", "-wal", "-shm"):
+                if os.path.exists(DEFAULT_DB_PATH + suffix):
+                    os.rename(DEFAULT_DB_PATH + suffix, shard_db + suffix)
+            if os.path.isdir(DEFAULT_JOURNAL_DIR):
+                shutil.move(DEFAULT_JOURNAL_DIR, os.path.join(path, SHARD_JOURNAL_DIR))
+            logger.info(f"Moved legacy reading list database into shard {chat_id}")
+
+        self.get(chat_id).migrate_from_json(LEGACY_JSON_PATH)
+
+
+def _close_shard(shard: tuple):
+    store, journal = shard
+    try:
+        journal.close()
+    finally:
+        store.close()
+
+
+# Global shard manager (set by main.py)
+_shard_manager: Optional[ShardManager] = None
+
+
+def get_shard_manager() -> Optional[ShardManager]:
+    """Get the global ShardManager instance."""
+    return _shard_manager
+
+
+def set_shard_manager(manager: ShardManager):
+    """Set the global ShardManager instance."""
+    global _shard_manager
+    _shard_manager = manager
+
+
+def get_reading_store(chat_id: Any) -> Optional[ReadingListStore]:
+    """Get a chat's reading list store, or None if storage isn't initialized."""
+    if _shard_manager is None:
+        return None
+    return _shard_manager.get(chat_id)
+
+
+@contextmanager
+def lease_reading_store(chat_id: Any) -> Iterator[Optional[ReadingListStore]]:
+    """Lease a chat's reading list store (see ShardManager.lease), or None if storage isn't initialized."""
+    if _shard_manager is None:
+        yield None
+        return
+    with _shard_manager.lease(chat_id) as store:
+        yield store
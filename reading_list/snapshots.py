@@ -0,0 +1,302 @@
+"""
+Page snapshots: the extracted main text of saved links, kept locally.
+
+When an item is added, SnapshotPipeline fetches its page in the
+background and parses it in a process pool (so parsing never blocks the
+event loop). For article-like items the main text is stored
+zlib-compressed under its SHA-256; the item's content_hash column points
+at it, and identical pages saved by any chat share one file. Every item
+also gets its reading/watch time estimate here, from the text's word
+count or the page's stated duration.
+"""
+
+import asyncio
+import hashlib
+import logging
+import os
+import tempfile
+import time
+import zlib
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable, ContextManager, Deque, Optional
+
+from .extract import extract_article, extract_duration
+from .metadata import MetadataFetcher, parse_html
+from .types import ReadingItem
+from .timing import TIMED_TYPES, SOCIAL_MINUTES, minutes_for_words, minutes_for_seconds
+from .urls import canonicalize_url
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SNAPSHOT_DIR = "snapshots"
+SNAPSHOT_TYPES = ("article", "repo", "other")  # videos, podcasts and posts have no page text
+MAX_PAGE_BYTES = 2 * 1024 * 1024
+DEFAULT_FETCH_WORKERS = 3
+DEFAULT_EXTRACT_WORKERS = 2
+MAX_QUEUE = 1000
+BACKFILL_LIMIT = 200  # unestimated unread items queued when a shard opens
+THROUGHPUT_WINDOW = 5 * 60  # seconds of completions used for the items/min rate
+TIMING_SAMPLES = 256
+
+
+class SnapshotStore:
+    """Content-addressed, zlib-compressed text files: <dir>/<aa>/<hash>.z"""
+
+    def __init__(self, dir_path: str = DEFAULT_SNAPSHOT_DIR):
+        self.dir_path = dir_path
+        os.makedirs(dir_path, exist_ok=True)
+
+    def _path(self, content_hash: str) -> str:
+        return os.path.join(self.dir_path, content_hash[:2], content_hash + ".z")
+
+    def put(self, text: str) -> str:
+        """Store text (once per distinct content). Returns its content hash."""
+        data = text.encode("utf-8")
+        content_hash = hashlib.sha256(data).hexdigest()
+        path = self._path(content_hash)
+        if os.path.exists(path):
+            return content_hash
+
+        dir_path = os.path.dirname(path)
+        os.makedirs(dir_path, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=dir_path, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(zlib.compress(data, 6))
+            os.rename(temp_path, path)
+        except:
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+            raise
+        return content_hash
+
+    def get(self, content_hash: str) -> Optional[str]:
+        try:
+            with open(self._path(content_hash), 'rb') as f:
+                return zlib.decompress(f.read()).decode("utf-8")
+        except FileNotFoundError:
+            return None
+
+
+@dataclass
+class SnapshotJob:
+    chat_key: str
+    item_id: str
+    url: str
+    type: str
+    queued_at: float = field(default_factory=time.monotonic)
+
+
+class SnapshotPipeline:
+    """
+    Background fetch -> extract -> store for newly added items.
+
+    Items are picked up through store listeners (see attach), which may
+    fire on any thread; jobs are handed to the event loop thread-safely.
+    A job holds a lease on its shard (lease_store, e.g. ShardManager.lease)
+    while it runs, so the store isn't closed under it.
+    Unread items still missing an estimate are queued when their shard
+    opens. The queue is bounded and jobs beyond it are dropped and counted.
+    """
+
+    def __init__(
+        self,
+        lease_store: Callable[[str], ContextManager],
+        fetcher: Callable[[], MetadataFetcher],
+        snapshots: Optional[SnapshotStore] = None,
+        fetch_workers: int = DEFAULT_FETCH_WORKERS,
+        extract_workers: int = DEFAULT_EXTRACT_WORKERS,
+        max_queue: int = MAX_QUEUE
+    ):
+        self._lease_store = lease_store
+        self._fetcher = fetcher
+        self.snapshots = snapshots or get_snapshot_store()
+        self.fetch_workers = fetch_workers
+        self.extract_workers = extract_workers
+        self.max_queue = max_queue
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._fetch_limit: Optional[asyncio.Semaphore] = None
+        self._workers = []
+        self._pending_backfill = []  # shards opened before start()
+        self.processed = 0
+        self.failed = 0
+        self.skipped = 0
+        self.dropped = 0
+        self._completed_at: Deque[float] = deque()
+        self._extract_ms: Deque[float] = deque(maxlen=TIMING_SAMPLES)
+
+    def attach(self, shards):
+        """Watch every shard the ShardManager opens for newly added items."""
+        shards.add_open_hook(self._watch)
+
+    def _watch(self, chat_key: str, store):
+        def on_change(old: Optional[ReadingItem], new: Optional[ReadingItem]):
+            if old is None and new is not None:
+                self.submit(chat_key, new)
+        store.add_listener(on_change)
+        if self._loop is None:
+            self._pending_backfill.append((chat_key, store))
+        else:
+            self._backfill(chat_key, store)
+
+    def _backfill(self, chat_key: str, store):
+        try:
+            items = store.unestimated_items(BACKFILL_LIMIT)
+        except Exception as e:
+            logger.error(f"Snapshot backfill failed for shard {chat_key}: {e}")
+            return
+        for item in items:
+            self.submit(chat_key, item)
+        if items:
+            logger.info(f"Queued {len(items)} items without a time estimate from shard {chat_key}")
+
+    def submit(self, chat_key: str, item: ReadingItem):
+        """Queue an item for snapshotting. Safe to call from any thread."""
+        if self._loop is None:
+            return
+        self._loop.call_soon_threadsafe(self._enqueue, SnapshotJob(chat_key, item.id, item.url, item.type))
+
+    def _enqueue(self, job: SnapshotJob):
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            self.dropped += 1
+
+    async def start(self):
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue(maxsize=self.max_queue)
+        self._executor = ProcessPoolExecutor(max_workers=self.extract_workers)
+        # Our own limit, so a backlog never holds the fetcher's slots that link_info waits on
+        self._fetch_limit = asyncio.Semaphore(self.fetch_workers)
+        self._workers = [asyncio.ensure_future(self._work()) for _ in range(self.fetch_workers)]
+        logger.info(f"Snapshot pipeline started ({self.fetch_workers} fetchers, {self.extract_workers} extractors)")
+        pending, self._pending_backfill = self._pending_backfill, []
+        for chat_key, store in pending:
+            self._backfill(chat_key, store)
+
+    async def stop(self):
+        self._loop = None
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    async def _work(self):
+        while True:
+            job = await self._queue.get()
+            try:
+                with self._lease_store(job.chat_key) as store:
+                    await self._process(job, store)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.failed += 1
+                logger.info(f"Snapshot failed for item {job.item_id} ({job.url}): {e}")
+            finally:
+                self._queue.task_done()
+
+    async def _process(self, job: SnapshotJob, store):
+        if job.type == "social":
+            self._finish(job, store.set_estimate(job.item_id, SOCIAL_MINUTES))
+            return
+
+        fetcher = self._fetcher()
+        html, final_url, content_type = await fetcher.fetch_page(job.url, MAX_PAGE_BYTES, self._fetch_limit)
+        if not html:
+            self.skipped += 1
+            logger.info(f"Snapshot skipped for item {job.item_id}: not HTML ({content_type})")
+            return
+
+        # The page is here anyway; save link_info a request (cache files and
+        # parsing stay off the event loop)
+        canonical = canonicalize_url(job.url)
+        if await asyncio.to_thread(fetcher.cache.get, canonical) is None:
+            info, _ = await self._loop.run_in_executor(self._executor, parse_html, job.url, html)
+            info.fetched_at = time.time()
+            await asyncio.to_thread(fetcher.cache.put, canonical, info)
+
+        started = time.perf_counter()
+        if job.type in TIMED_TYPES:
+            seconds = await self._loop.run_in_executor(self._executor, extract_duration, html)
+            text, words = "", 0
+        else:
+            text, words = await self._loop.run_in_executor(self._executor, extract_article, html)
+            seconds = None
+        extract_ms = (time.perf_counter() - started) * 1000
+        self._extract_ms.append(extract_ms)
+
+        if job.type in TIMED_TYPES:
+            minutes = minutes_for_seconds(seconds) if seconds else None
+            if minutes is None:
+                self.skipped += 1
+                logger.info(f"Snapshot skipped for item {job.item_id}: page states no duration")
+                return
+            self._finish(job, store.set_estimate(job.item_id, minutes), f"{minutes} min", extract_ms)
+            return
+
+        if not text:
+            self.skipped += 1
+            logger.info(f"Snapshot skipped for item {job.item_id}: no main text found")
+            return
+        content_hash = await asyncio.to_thread(self.snapshots.put, text)
+        stored = store.set_content_hash(job.item_id, content_hash)
+        stored = stored and store.set_estimate(job.item_id, minutes_for_words(words), words)
+        self._finish(job, stored, f"{words} words", extract_ms)
+
+    def _finish(self, job: SnapshotJob, stored: bool, detail: str = "", extract_ms: float = 0.0):
+        if not stored:
+            # Deleted while it was queued
+            self.skipped += 1
+            return
+        self.processed += 1
+        self._completed_at.append(time.monotonic())
+        if detail:
+            logger.info(
+                f"Snapshot for item {job.item_id}: {detail}, extracted in {extract_ms:.0f}ms, "
+                f"{time.monotonic() - job.queued_at:.1f}s after queueing"
+            )
+
+    def stats(self) -> dict:
+        """Queue depth, outcomes, recent throughput and extraction timings."""
+        now = time.monotonic()
+        while self._completed_at and now - self._completed_at[0] > THROUGHPUT_WINDOW:
+            self._completed_at.popleft()
+        timings = sorted(self._extract_ms)
+        return {
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            "processed": self.processed,
+            "failed": self.failed,
+            "skipped": self.skipped,
+            "dropped": self.dropped,
+            "per_minute": len(self._completed_at) * 60 / THROUGHPUT_WINDOW,
+            "extract_ms_p50": timings[len(timings) // 2] if timings else 0.0,
+            "extract_ms_p95": timings[min(len(timings) - 1, int(len(timings) * 0.95))] if timings else 0.0
+        }
+
+
+# Global snapshot store and pipeline
+_snapshot_store: Optional[SnapshotStore] = None
+_pipeline: Optional[SnapshotPipeline] = None
+
+
+def get_snapshot_store() -> SnapshotStore:
+    global _snapshot_store
+    if _snapshot_store is None:
+        _snapshot_store = SnapshotStore()
+    return _snapshot_store
+
+
+def get_snapshot_pipeline() -> Optional[SnapshotPipeline]:
+    return _pipeline
+
+
+def set_snapshot_pipeline(pipeline: Optional[SnapshotPipeline]):
+    global _pipeline
+    _pipeline = pipeline
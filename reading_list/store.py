@@ -0,0 +1,753 @@
+"""SQLite persistence layer for the reading list."""
+
+import json
+import os
+import sqlite3
+import threading
+import logging
+import dataclasses
+import itertools
+from collections import Counter
+from typing import List, Optional, Iterable, Dict, Callable
+import pytz
+from .types import ReadingItem, utc_now_iso
+from . import aggregates
+from .urls import canonicalize_url, url_hash
+from .search import build_fts_query, BM25_WEIGHTS
+
+logger = logging.getLogger(__name__)
+
+# Default database path
+DEFAULT_DB_PATH = "reading_list.db"
+
+# Timezone used to bucket activity into days (matches the scheduler default)
+DEFAULT_TZ = "Asia/Kolkata"
+
+# Legacy whole-file list written by the agent before the SQLite store existed
+LEGACY_JSON_PATH = "reading_list.json"
+
+# Schema migrations, applied in order. PRAGMA user_version records how many ran.
+_MIGRATIONS = [
+    """
+    CREATE TABLE items (
+        id          TEXT PRIMARY KEY,
+        url         TEXT NOT NULL,
+        description TEXT NOT NULL DEFAULT '',
+        reason      TEXT NOT NULL DEFAULT '',
+        type        TEXT NOT NULL DEFAULT 'article',
+        status      TEXT NOT NULL DEFAULT 'unread',
+        added_at    TEXT NOT NULL,
+        read_at     TEXT,
+        tags        TEXT NOT NULL DEFAULT '[]',
+        extra       TEXT NOT NULL DEFAULT '{}'
+    );
+    CREATE INDEX idx_items_status_added ON items(status, added_at);
+    CREATE INDEX idx_items_added_at ON items(added_at);
+    CREATE INDEX idx_items_read_at ON items(read_at);
+    CREATE INDEX idx_items_type ON items(type);
+
+    CREATE TABLE item_tags (
+        item_id TEXT NOT NULL REFERENCES items(id) ON DELETE CASCADE,
+        tag     TEXT NOT NULL,
+        PRIMARY KEY (item_id, tag)
+    );
+    CREATE INDEX idx_item_tags_tag ON item_tags(tag);
+    """,
+    """
+    CREATE TABLE aggregates (
+        kind  TEXT NOT NULL,
+        key   TEXT NOT NULL,
+        count INTEGER NOT NULL,
+        PRIMARY KEY (kind, key)
+    );
+    CREATE INDEX idx_aggregates_kind_count ON aggregates(kind, count);
+
+    CREATE TABLE meta (
+        key   TEXT PRIMARY KEY,
+        value TEXT
+    );
+    """,
+    """
+    ALTER TABLE items ADD COLUMN canonical_url TEXT;
+    ALTER TABLE items ADD COLUMN url_hash INTEGER;
+    CREATE INDEX idx_items_url_hash ON items(url_hash);
+    """,
+    """
+    CREATE VIRTUAL TABLE items_fts USING fts5(
+        description, reason, url, tags,
+        content='items', content_rowid='rowid', tokenize='porter unicode61'
+    );
+    CREATE TRIGGER items_fts_insert AFTER INSERT ON items BEGIN
+        INSERT INTO items_fts (rowid, description, reason, url, tags)
+        VALUES (new.rowid, new.description, new.reason, new.url, new.tags);
+    END;
+    CREATE TRIGGER items_fts_delete AFTER DELETE ON items BEGIN
+        INSERT INTO items_fts (items_fts, rowid, description, reason, url, tags)
+        VALUES ('delete', old.rowid, old.description, old.reason, old.url, old.tags);
+    END;
+    CREATE TRIGGER items_fts_update AFTER UPDATE OF description, reason, url, tags ON items BEGIN
+        INSERT INTO items_fts (items_fts, rowid, description, reason, url, tags)
+        VALUES ('delete', old.rowid, old.description, old.reason, old.url, old.tags);
+        INSERT INTO items_fts (rowid, description, reason, url, tags)
+        VALUES (new.rowid, new.description, new.reason, new.url, new.tags);
+    END;
+    INSERT INTO items_fts (items_fts) VALUES ('rebuild');
+    """,
+    """
+    ALTER TABLE items ADD COLUMN content_hash TEXT;
+    CREATE INDEX idx_items_content_hash ON items(content_hash);
+    """,
+    """
+    ALTER TABLE items ADD COLUMN est_minutes INTEGER;
+    ALTER TABLE items ADD COLUMN word_count INTEGER;
+    CREATE INDEX idx_items_status_minutes ON items(status, est_minutes);
+    """,
+]
+
+# Store versions come from one process-wide counter, so a shard that is
+# closed and reopened never reuses a version it had before
+_VERSIONS = itertools.count(1)
+
+_COLUMNS = "id, url, description, reason, type, status, added_at, read_at, tags, extra"
+_QUALIFIED_COLUMNS = ", ".join(f"items.{c}" for c in _COLUMNS.split(", "))
+
+
+class ReadingListStore:
+    """
+    Reading list backed by SQLite.
+
+    Every add or update touches a single row (plus its tag rows), and
+    filters run against indexes on status, added_at, read_at, type and
+    tags instead of loading the whole list. Per-status, per-type, per-tag
+    and per-day counters are updated in the same transaction as each
+    write, so stats never need a full scan.
+    """
+
+    def __init__(self, path: str = DEFAULT_DB_PATH, tz: str = DEFAULT_TZ):
+        self.path = path
+        self.tz_name = tz
+        self.tz = pytz.timezone(tz)
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA foreign_keys=ON")
+        self._listeners: List[Callable] = []
+        self._streaks = None
+        self.version = next(_VERSIONS)
+        self._migrate()
+        self._backfill_url_hashes()
+        self._recover_aggregates()
+        self._ingest_checked = int(self._get_meta("ingest_checked") or 0)
+        self._ingest_duplicates = int(self._get_meta("ingest_duplicates") or 0)
+
+    def add_listener(self, listener: Callable):
+        """
+        Register a function(old_item, new_item) called after each committed write.
+
+        old_item is None for inserts. Listeners must be fast; they run on
+        the writer's thread with the store's lock still held, so they see
+        writes in commit order (which the journal relies on).
+        """
+        self._listeners.append(listener)
+
+    def _notify(self, old: Optional[ReadingItem], new: Optional[ReadingItem]):
+        self.version = next(_VERSIONS)
+        for listener in self._listeners:
+            try:
+                listener(old, new)
+            except Exception as e:
+                logger.error(f"Reading list listener {listener} failed: {e}")
+
+    @property
+    def streaks(self):
+        """Streak tracker for this store, built on first use."""
+        if self._streaks is None:
+            from .streaks import StreakTracker
+            self._streaks = StreakTracker(self)
+        return self._streaks
+
+    def close(self):
+        """Mark a clean shutdown and close the underlying connection."""
+        with self._lock:
+            self._set_meta("clean_shutdown", "1")
+            self._conn.close()
+
+    def _migrate(self):
+        """Apply any schema migrations that haven't run yet."""
+        with self._lock:
+            version = self._conn.execute("PRAGMA user_version").fetchone()[0]
+            for i, script in enumerate(_MIGRATIONS[version:], start=version + 1):
+                self._conn.executescript(f"BEGIN; {script} PRAGMA user_version = {i}; COMMIT;")
+                logger.info(f"Applied reading list schema migration {i}")
+
+    def _backfill_url_hashes(self):
+        """Fill canonical_url/url_hash for rows written before they existed."""
+        with self._lock:
+            rows = self._conn.execute("SELECT id, url FROM items WHERE url_hash IS NULL").fetchall()
+            if not rows:
+                return
+            self._conn.execute("BEGIN")
+            for item_id, url in rows:
+                canonical = _canonical(url)
+                self._conn.execute(
+                    "UPDATE items SET canonical_url = ?, url_hash = ? WHERE id = ?",
+                    (canonical, url_hash(canonical), item_id)
+                )
+            self._conn.execute("COMMIT")
+        logger.info(f"Backfilled canonical URLs for {len(rows)} items")
+
+    def _get_meta(self, key: str) -> Optional[str]:
+        row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, key: str, value: str):
+        self._conn.execute(
+            "INSERT INTO meta (key, value) VALUES (?, ?) "
+            "ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+            (key, value)
+        )
+
+    def _recover_aggregates(self):
+        """
+        Make sure aggregates are usable after open.
+
+        They are rebuilt if they were never built or were bucketed in a
+        different timezone, and verified if the last run didn't close
+        cleanly (e.g. after a crash).
+        """
+        with self._lock:
+            if self._get_meta("aggregates_tz") != self.tz_name:
+                self.rebuild_aggregates()
+            elif self._get_meta("clean_shutdown") == "0":
+                problems = self.check_aggregates()
+                if problems:
+                    logger.warning(f"Reading list aggregates inconsistent after unclean shutdown: {problems[:5]}")
+                    self.rebuild_aggregates()
+            self._set_meta("clean_shutdown", "0")
+
+    def rebuild_aggregates(self):
+        """Recompute all aggregates from the items table."""
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                aggregates.rebuild(self._conn, self.tz)
+                self._set_meta("aggregates_tz", self.tz_name)
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+            # The streak tracker is derived from the day counters. Reload it
+            # in place: its listener stays registered and holders of
+            # store.streaks see the new runs.
+            if self._streaks is not None:
+                self._streaks.reload(self)
+
+    def check_aggregates(self) -> List[str]:
+        """Compare aggregates against a full scan. Returns a list of mismatches."""
+        with self._lock:
+            return aggregates.diff(self._conn, self.tz)
+
+    # ------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------
+
+    def get_item(self, item_id: str) -> Optional[ReadingItem]:
+        """Get an item by ID."""
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {_COLUMNS} FROM items WHERE id = ?", (item_id,)
+            ).fetchone()
+        return _row_to_item(row) if row else None
+
+    def list_items(
+        self,
+        status: Optional[str] = None,
+        tags: Optional[List[str]] = None,
+        type: Optional[str] = None,
+        added_before: Optional[str] = None,
+        limit: Optional[int] = None,
+        newest_first: bool = True,
+        after: Optional[tuple] = None
+    ) -> List[ReadingItem]:
+        """
+        List items matching all given filters.
+
+        Args:
+            status: 'unread' or 'read'
+            tags: Match items carrying any of these tags
+            type: Item type ('article', 'video', ...)
+            added_before: ISO timestamp; only items added before it
+            limit: Maximum number of items to return
+            newest_first: Sort by added_at descending (ascending if False)
+            after: (added_at, id) of the last item of the previous page
+        """
+        where, params = _build_filters(status, tags, type, added_before)
+        order = "DESC" if newest_first else "ASC"
+        if after is not None:
+            op = "<" if newest_first else ">"
+            where += (" AND " if where else " WHERE ") + f"(added_at, id) {op} (?, ?)"
+            params.extend(after)
+        sql = f"SELECT {_COLUMNS} FROM items{where} ORDER BY added_at {order}, id {order}"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [_row_to_item(r) for r in rows]
+
+    def count(
+        self,
+        status: Optional[str] = None,
+        tags: Optional[List[str]] = None,
+        type: Optional[str] = None,
+        added_before: Optional[str] = None
+    ) -> int:
+        """Count items matching all given filters."""
+        # Single-dimension counts come straight from the aggregates
+        if not tags and not added_before and not (status and type):
+            if status:
+                return self._aggregate("status", status)
+            if type:
+                return self._aggregate("type", type)
+            return sum(self.aggregate_counts("status").values())
+
+        where, params = _build_filters(status, tags, type, added_before)
+        with self._lock:
+            return self._conn.execute(f"SELECT COUNT(*) FROM items{where}", params).fetchone()[0]
+
+    def set_content_hash(self, item_id: str, content_hash: Optional[str]) -> bool:
+        """
+        Point an item at its extracted-text snapshot.
+
+        Snapshots are derived data, so this isn't journaled or announced
+        to listeners. Returns False if the item no longer exists.
+        """
+        with self._lock:
+            cur = self._conn.execute(
+                "UPDATE items SET content_hash = ? WHERE id = ?", (content_hash, item_id)
+            )
+        return cur.rowcount > 0
+
+    def get_content_hash(self, item_id: str) -> Optional[str]:
+        """Content hash of an item's snapshot, or None if it has none yet."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT content_hash FROM items WHERE id = ?", (item_id,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def snapshot_count(self) -> int:
+        """Items with a stored snapshot."""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM items WHERE content_hash IS NOT NULL"
+            ).fetchone()[0]
+
+    def set_estimate(self, item_id: str, minutes: Optional[int], word_count: Optional[int] = None) -> bool:
+        """
+        Store an item's reading/watch time estimate (and word count, for text).
+
+        Like snapshots, estimates are derived data: not journaled and not
+        announced to listeners. The version still moves, since answers
+        about what fits in a time budget depend on them. Returns False if
+        the item no longer exists.
+        """
+        with self._lock:
+            cur = self._conn.execute(
+                "UPDATE items SET est_minutes = ?, word_count = ? WHERE id = ?",
+                (minutes, word_count, item_id)
+            )
+        if cur.rowcount > 0:
+            self.version = next(_VERSIONS)
+        return cur.rowcount > 0
+
+    def get_estimate(self, item_id: str) -> Optional[int]:
+        """An item's estimated minutes, or None if it has no estimate yet."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT est_minutes FROM items WHERE id = ?", (item_id,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def timed_items(
+        self,
+        max_minutes: int,
+        tags: Optional[List[str]] = None,
+        type: Optional[str] = None,
+        limit: Optional[int] = None
+    ) -> List[tuple]:
+        """
+        Unread items estimated at max_minutes or less, oldest first.
+
+        Returns:
+            [(item, minutes)]
+        """
+        where, params = _build_filters("unread", tags, type, None)
+        where += " AND est_minutes IS NOT NULL AND est_minutes <= ?"
+        params.append(max_minutes)
+        sql = f"SELECT {_COLUMNS}, est_minutes FROM items{where} ORDER BY added_at ASC, id ASC"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [(_row_to_item(r), r["est_minutes"]) for r in rows]
+
+    def unestimated_items(self, limit: int) -> List[ReadingItem]:
+        """Newest unread items that have no time estimate yet."""
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {_COLUMNS} FROM items WHERE status = 'unread' AND est_minutes IS NULL "
+                f"ORDER BY added_at DESC LIMIT ?",
+                (limit,)
+            ).fetchall()
+        return [_row_to_item(r) for r in rows]
+
+    def unestimated_count(self) -> int:
+        """Unread items that have no time estimate yet."""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM items WHERE status = 'unread' AND est_minutes IS NULL"
+            ).fetchone()[0]
+
+    def find_by_url(self, url: str) -> Optional[ReadingItem]:
+        """Find an item whose canonical URL matches this URL's."""
+        canonical = _canonical(url)
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {_COLUMNS} FROM items WHERE url_hash = ? AND canonical_url = ? LIMIT 1",
+                (url_hash(canonical), canonical)
+            ).fetchone()
+        return _row_to_item(row) if row else None
+
+    def check_duplicate(self, url: str) -> Optional[ReadingItem]:
+        """
+        Look up a link about to be saved, counting it in the ingest metrics.
+
+        Returns the existing item if the link is already in the list.
+        """
+        existing = self.find_by_url(url)
+        with self._lock:
+            self._ingest_checked += 1
+            if existing is not None:
+                self._ingest_duplicates += 1
+            self._set_meta("ingest_checked", str(self._ingest_checked))
+            self._set_meta("ingest_duplicates", str(self._ingest_duplicates))
+        return existing
+
+    def ingest_metrics(self) -> dict:
+        """Links checked on ingest, duplicates caught, and the duplicate hit rate."""
+        checked = self._ingest_checked
+        return {
+            "checked": checked,
+            "duplicates": self._ingest_duplicates,
+            "hit_rate": self._ingest_duplicates / checked if checked else 0.0
+        }
+
+    def export_items(self) -> List[dict]:
+        """Return every item as a dict, oldest first."""
+        return [item.to_dict() for item in self.list_items(newest_first=False)]
+
+    def search(
+        self,
+        query: str,
+        status: Optional[str] = None,
+        limit: int = 10,
+        match_all: bool = False
+    ) -> List[ReadingItem]:
+        """
+        Ranked full-text search over description, reason, url and tags.
+
+        Args:
+            query: Free text, e.g. "that kubernetes article"
+            status: Only items with this status
+            limit: Maximum number of results
+            match_all: Require every term to match instead of ranking any match
+
+        Returns:
+            Items, best BM25 match first
+        """
+        fts_query = build_fts_query(query, match_all=match_all)
+        if fts_query is None:
+            return []
+        weights = ", ".join(str(w) for w in BM25_WEIGHTS)
+        sql = (
+            f"SELECT {_QUALIFIED_COLUMNS} "
+            f"FROM items_fts JOIN items ON items.rowid = items_fts.rowid "
+            f"WHERE items_fts MATCH ?"
+        )
+        params = [fts_query]
+        if status:
+            sql += " AND items.status = ?"
+            params.append(status)
+        sql += f" ORDER BY bm25(items_fts, {weights}) LIMIT ?"
+        params.append(limit)
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [_row_to_item(r) for r in rows]
+
+    def tag_counts(self, limit: Optional[int] = None) -> List[tuple]:
+        """Return (tag, count) pairs, most common first."""
+        sql = "SELECT key, count FROM aggregates WHERE kind = 'tag' ORDER BY count DESC, key"
+        params = []
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        with self._lock:
+            return [(r[0], r[1]) for r in self._conn.execute(sql, params).fetchall()]
+
+    def aggregate_counts(self, kind: str) -> Dict[str, int]:
+        """Return all counters of one kind ('status', 'type', 'tag', 'added_day', 'read_day')."""
+        if kind not in aggregates.KINDS:
+            raise ValueError(f"Unknown aggregate kind: {kind}")
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT key, count FROM aggregates WHERE kind = ?", (kind,)
+            ).fetchall()
+        return {r[0]: r[1] for r in rows}
+
+    def _aggregate(self, kind: str, key: str) -> int:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT count FROM aggregates WHERE kind = ? AND key = ?", (kind, key)
+            ).fetchone()
+        return row[0] if row else 0
+
+    def get_stats(self, top_tags: int = 5) -> dict:
+        """
+        Library stats from the aggregates, without touching the items table.
+
+        Returns:
+            dict with total, by_status, by_type and top_tags [(tag, count)]
+        """
+        by_status = self.aggregate_counts("status")
+        return {
+            "total": sum(by_status.values()),
+            "by_status": by_status,
+            "by_type": self.aggregate_counts("type"),
+            "top_tags": self.tag_counts(limit=top_tags)
+        }
+
+    # ------------------------------------------------------------
+    # Writes
+    # ------------------------------------------------------------
+
+    def add_item(self, item: ReadingItem) -> ReadingItem:
+        """Insert a new item."""
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._insert(item)
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._notify(None, item)
+        logger.info(f"Added reading item {item.id}: {item.url}")
+        return item
+
+    def add_items(self, items: Iterable[ReadingItem]) -> int:
+        """
+        Insert many items in a single transaction. Returns the number inserted.
+
+        Aggregate counters are summed across the batch and written once.
+        """
+        inserted = []
+        counts = Counter()
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                for item in items:
+                    self._insert(item, counts)
+                    inserted.append(item)
+                aggregates.apply_counts(self._conn, counts)
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+            for item in inserted:
+                self._notify(None, item)
+        return len(inserted)
+
+    def update_item(self, item_id: str, **kwargs) -> Optional[ReadingItem]:
+        """
+        Update an item's properties.
+
+        Accepts any ReadingItem field except id. Returns the updated item,
+        or None if no item has that ID.
+        """
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                old = self.get_item(item_id)
+                if old is None:
+                    self._conn.execute("ROLLBACK")
+                    return None
+                item = dataclasses.replace(old, tags=list(old.tags), extra=dict(old.extra))
+
+                for key, value in kwargs.items():
+                    if key != "id" and hasattr(item, key):
+                        setattr(item, key, value)
+                if "tags" in kwargs:
+                    item.tags = _clean_tags(item.tags)
+
+                canonical = _canonical(item.url)
+                self._conn.execute(
+                    "UPDATE items SET url = ?, description = ?, reason = ?, type = ?, status = ?, "
+                    "added_at = ?, read_at = ?, tags = ?, extra = ?, canonical_url = ?, url_hash = ? "
+                    "WHERE id = ?",
+                    (item.url, item.description, item.reason, item.type, item.status,
+                     item.added_at, item.read_at, json.dumps(item.tags), json.dumps(item.extra),
+                     canonical, url_hash(canonical), item.id)
+                )
+                if "tags" in kwargs:
+                    self._conn.execute("DELETE FROM item_tags WHERE item_id = ?", (item.id,))
+                    self._insert_tags(item)
+                aggregates.apply_change(self._conn, old, item, self.tz)
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._notify(old, item)
+        return item
+
+    def delete_item(self, item_id: str) -> Optional[ReadingItem]:
+        """Delete an item. Returns the deleted item, or None if not found."""
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                old = self.get_item(item_id)
+                if old is None:
+                    self._conn.execute("ROLLBACK")
+                    return None
+                self._conn.execute("DELETE FROM items WHERE id = ?", (item_id,))
+                aggregates.apply_change(self._conn, old, None, self.tz)
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._notify(old, None)
+        logger.info(f"Deleted reading item {item_id}")
+        return old
+
+    def mark_read(self, item_id: str, read_at: Optional[str] = None) -> Optional[ReadingItem]:
+        """Mark an item as read. Returns the updated item, or None if not found."""
+        return self.update_item(item_id, status="read", read_at=read_at or utc_now_iso())
+
+    def _insert(self, item: ReadingItem, counts: Optional[Counter] = None):
+        item.tags = _clean_tags(item.tags)
+        # Short ids collide occasionally in large lists; draw a fresh one
+        while self._conn.execute("SELECT 1 FROM items WHERE id = ?", (item.id,)).fetchone():
+            item.id = ReadingItem.new_id()
+        canonical = _canonical(item.url)
+        self._conn.execute(
+            f"INSERT INTO items ({_COLUMNS}, canonical_url, url_hash) "
+            f"VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (item.id, item.url, item.description, item.reason, item.type, item.status,
+             item.added_at, item.read_at, json.dumps(item.tags), json.dumps(item.extra),
+             canonical, url_hash(canonical))
+        )
+        self._insert_tags(item)
+        if counts is None:
+            aggregates.apply_change(self._conn, None, item, self.tz)
+        else:
+            counts.update(aggregates.item_keys(item, self.tz))
+
+    def _insert_tags(self, item: ReadingItem):
+        self._conn.executemany(
+            "INSERT OR IGNORE INTO item_tags (item_id, tag) VALUES (?, ?)",
+            [(item.id, tag) for tag in item.tags]
+        )
+
+    # ------------------------------------------------------------
+    # Migration
+    # ------------------------------------------------------------
+
+    def migrate_from_json(self, json_path: str = LEGACY_JSON_PATH) -> int:
+        """
+        One-time import of the legacy reading_list.json.
+
+        Items are inserted in one transaction and the file is renamed to
+        '<path>.migrated' afterwards, so the import never runs twice.
+        Returns the number of items imported.
+        """
+        if not os.path.exists(json_path):
+            return 0
+
+        try:
+            with open(json_path, 'r') as f:
+                data = json.load(f)
+        except Exception as e:
+            logger.error(f"Error reading legacy reading list {json_path}: {e}")
+            return 0
+
+        items = []
+        for entry in data if isinstance(data, list) else []:
+            if not isinstance(entry, dict) or not entry.get("url"):
+                logger.warning(f"Skipping invalid legacy reading list entry: {entry!r}")
+                continue
+            items.append(ReadingItem.from_dict(entry))
+
+        count = self.add_items(items)
+        os.rename(json_path, json_path + ".migrated")
+        logger.info(f"Migrated {count} items from {json_path}")
+        return count
+
+
+def _canonical(url: str) -> str:
+    """Canonical form of url, or the URL as given if it can't be parsed."""
+    try:
+        return canonicalize_url(url)
+    except ValueError:
+        return url.strip()
+
+
+def _clean_tags(tags: Iterable[str]) -> List[str]:
+    """Lowercase, strip and dedupe tags, keeping their order."""
+    result = []
+    for tag in tags or []:
+        tag = tag.strip().lower().lstrip('#')
+        if tag and tag not in result:
+            result.append(tag)
+    return result
+
+
+def _build_filters(status, tags, type, added_before) -> tuple:
+    """Build a WHERE clause and its parameters from list/count filters."""
+    clauses = []
+    params = []
+    if status:
+        clauses.append("status = ?")
+        params.append(status)
+    if type:
+        clauses.append("type = ?")
+        params.append(type)
+    if added_before:
+        clauses.append("added_at < ?")
+        params.append(added_before)
+    tags = _clean_tags(tags or [])
+    if tags:
+        placeholders = ", ".join("?" for _ in tags)
+        clauses.append(
+            f"id IN (SELECT item_id FROM item_tags WHERE tag IN ({placeholders}))"
+        )
+        params.extend(tags)
+    where = (" WHERE " + " AND ".join(clauses)) if clauses else ""
+    return where, params
+
+
+def _row_to_item(row: sqlite3.Row) -> ReadingItem:
+    return ReadingItem(
+        id=row["id"],
+        url=row["url"],
+        description=row["description"],
+        reason=row["reason"],
+        type=row["type"],
+        status=row["status"],
+        added_at=row["added_at"],
+        read_at=row["read_at"],
+        tags=json.loads(row["tags"]),
+        extra=json.loads(row["extra"])
+    )
@@ -0,0 +1,149 @@
+"""Incremental streak tracking over per-day activity."""
+
+import heapq
+import logging
+from dataclasses import dataclass
+from datetime import date, datetime
+from typing import Dict, List, Optional
+
+from .types import ReadingItem
+from .aggregates import local_day
+
+logger = logging.getLogger(__name__)
+
+# Activity kinds tracked, and the aggregate counters they're built from
+STREAK_KINDS = {"added": "added_day", "read": "read_day"}
+
+
+@dataclass
+class Streak:
+    """A run of consecutive active days."""
+    length: int
+    start: Optional[date] = None
+    end: Optional[date] = None
+
+
+class _DayRuns:
+    """
+    Activity days for one kind, stored as counts per day ordinal plus
+    maximal runs of consecutive days indexed by both ends.
+
+    Adding a day merges at most two neighbouring runs, so updates and
+    current/longest streak lookups are O(1).
+    """
+
+    def __init__(self):
+        self.counts: Dict[int, int] = {}
+        self.start_of: Dict[int, int] = {}   # run end -> run start
+        self.end_of: Dict[int, int] = {}     # run start -> run end
+        self.longest = Streak(0)
+
+    def add(self, day: int, n: int = 1):
+        previous = self.counts.get(day, 0)
+        self.counts[day] = previous + n
+        if previous > 0:
+            return
+
+        start = self.start_of.pop(day - 1, day)
+        end = self.end_of.pop(day + 1, day)
+        self.end_of[start] = end
+        self.start_of[end] = start
+
+        length = end - start + 1
+        if length > self.longest.length:
+            self.longest = Streak(length, date.fromordinal(start), date.fromordinal(end))
+
+    def remove(self, day: int, n: int = 1):
+        remaining = self.counts.get(day, 0) - n
+        if remaining > 0:
+            self.counts[day] = remaining
+            return
+        self.counts.pop(day, None)
+        # Splitting a run is rare (items deleted or un-read); rebuild the runs
+        self._rebuild_runs()
+
+    def _rebuild_runs(self):
+        counts = self.counts
+        self.counts = {}
+        self.start_of.clear()
+        self.end_of.clear()
+        self.longest = Streak(0)
+        for day in sorted(counts):
+            self.add(day, counts[day])
+
+    def run_ending(self, day: int) -> int:
+        start = self.start_of.get(day)
+        return day - start + 1 if start is not None else 0
+
+
+class StreakTracker:
+    """
+    Current streak, longest streak and activity heatmap for added and read days.
+
+    Built once from the store's per-day aggregates and kept current by a
+    store listener, so /streak never parses item timestamps.
+    Days are local to the store's timezone.
+    """
+
+    def __init__(self, store):
+        self.reload(store)
+        store.add_listener(self.on_change)
+
+    def reload(self, store):
+        """Rebuild the runs from the store's aggregates (after they were rebuilt)."""
+        self.tz = store.tz
+        self._runs = {kind: _DayRuns() for kind in STREAK_KINDS}
+        for kind, aggregate in STREAK_KINDS.items():
+            for day, count in store.aggregate_counts(aggregate).items():
+                self._runs[kind].add(date.fromisoformat(day).toordinal(), count)
+
+    def today(self) -> date:
+        """Today's date in the tracker's timezone."""
+        return datetime.now(self.tz).date()
+
+    def on_change(self, old: Optional[ReadingItem], new: Optional[ReadingItem]):
+        """Store listener: move an item's activity days from old to new state."""
+        for kind, field_name in (("added", "added_at"), ("read", "read_at")):
+            old_day = local_day(getattr(old, field_name), self.tz) if old else None
+            new_day = local_day(getattr(new, field_name), self.tz) if new else None
+            if old_day == new_day:
+                continue
+            if old_day:
+                self._runs[kind].remove(date.fromisoformat(old_day).toordinal())
+            if new_day:
+                self._runs[kind].add(date.fromisoformat(new_day).toordinal())
+
+    def current_streak(self, kind: str, today: Optional[date] = None) -> Streak:
+        """
+        Consecutive active days ending today, or yesterday if there's been
+        no activity yet today (the streak is still alive).
+        """
+        runs = self._runs[kind]
+        today = today or self.today()
+        for end in (today.toordinal(), today.toordinal() - 1):
+            length = runs.run_ending(end)
+            if length:
+                return Streak(length, date.fromordinal(end - length + 1), date.fromordinal(end))
+        return Streak(0)
+
+    def longest_streak(self, kind: str) -> Streak:
+        """The longest run of consecutive active days ever."""
+        return self._runs[kind].longest
+
+    def top_streaks(self, kind: str, n: int = 5) -> List[Streak]:
+        """The n longest past runs, longest first."""
+        runs = self._runs[kind]
+        best = heapq.nlargest(n, runs.end_of.items(), key=lambda kv: kv[1] - kv[0])
+        return [Streak(end - start + 1, date.fromordinal(start), date.fromordinal(end)) for start, end in best]
+
+    def heatmap(self, kind: str, days: int = 365, today: Optional[date] = None) -> List[int]:
+        """Activity counts for the last `days` days, oldest first, ending today."""
+        counts = self._runs[kind].counts
+        end = (today or self.today()).toordinal()
+        return [counts.get(day, 0) for day in range(end - days + 1, end + 1)]
+
+
+def render_heatmap(counts: List[int]) -> str:
+    """Render daily counts as rows of seven squares, one row per week."""
+    cells = ["⬜" if c == 0 else "🟩" if c < 3 else "🟦" for c in counts]
+    return "\n".join("".join(cells[i:i + 7]) for i in range(0, len(cells), 7))
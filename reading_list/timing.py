@@ -0,0 +1,114 @@
+"""
+Reading/watch time estimates and picking what fits in a time budget.
+
+Estimates are whole minutes, computed once at ingest: from the word
+count of an article's snapshot, or from a video's or podcast's duration.
+Picking is a 0/1 knapsack over unread items, so "I have 20 minutes"
+fills the 20 minutes as fully as possible instead of taking the first
+short items that happen to come up.
+"""
+
+import math
+import re
+from typing import List, Optional, Sequence, Tuple
+
+from .types import ReadingItem
+
+WORDS_PER_MINUTE = 230
+TIMED_TYPES = ("video", "podcast")  # estimated from their duration, not their text
+SOCIAL_MINUTES = 2         # a post or thread, read without fetching it
+MAX_BUDGET_MINUTES = 600   # knapsack capacity cap (10 hours)
+MAX_CANDIDATES = 300       # oldest unread items considered per pick
+
+_ISO_DURATION_RE = re.compile(
+    r"^P(?:(\d+)D)?(?:T(?:(\d+)H)?(?:(\d+)M)?(?:(\d+(?:\.\d+)?)S)?)?$", re.IGNORECASE
+)
+
+
+def minutes_for_words(words: int) -> Optional[int]:
+    """Reading time of a text, rounded up to whole minutes."""
+    if words <= 0:
+        return None
+    return max(1, math.ceil(words / WORDS_PER_MINUTE))
+
+
+def minutes_for_seconds(seconds: float) -> Optional[int]:
+    """Watch/listen time of a duration, rounded up to whole minutes."""
+    if seconds <= 0:
+        return None
+    return max(1, math.ceil(seconds / 60))
+
+
+def parse_duration(value: str) -> Optional[float]:
+    """
+    Seconds from '754', '754.3', 'PT12M34S' (ISO 8601) or '12:34' / '1:02:03'.
+
+    Returns None if the value isn't a duration.
+    """
+    value = (value or "").strip()
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    match = _ISO_DURATION_RE.match(value)
+    if match and any(match.groups()):
+        days, hours, minutes, seconds = (float(g) if g else 0.0 for g in match.groups())
+        return days * 86400 + hours * 3600 + minutes * 60 + seconds
+    parts = value.split(":")
+    if 2 <= len(parts) <= 3 and all(p.isdigit() for p in parts):
+        total = 0.0
+        for part in parts:
+            total = total * 60 + int(part)
+        return total
+    return None
+
+
+def pick_within(
+    candidates: Sequence[Tuple[ReadingItem, int]],
+    budget: int
+) -> List[Tuple[ReadingItem, int]]:
+    """
+    Choose items whose estimates add up to as much of the budget as possible.
+
+    Among equally full picks, older items win. Candidates should be
+    ordered oldest first; only the first MAX_CANDIDATES are considered.
+
+    Args:
+        candidates: (item, minutes) pairs, oldest first
+        budget: Minutes available
+
+    Returns:
+        The chosen (item, minutes) pairs, oldest first
+    """
+    budget = min(budget, MAX_BUDGET_MINUTES)
+    candidates = [(item, m) for item, m in candidates if 0 < m <= budget][:MAX_CANDIDATES]
+    n = len(candidates)
+    if n == 0 or budget <= 0:
+        return []
+
+    # One minute is worth more than all rank bonuses together (at most
+    # n(n+1)/2), so fuller picks always win and rank only breaks ties
+    # toward older items
+    scale = n * (n + 1) // 2 + 1
+    best = [0] * (budget + 1)
+    taken = []
+    for rank, (_, minutes) in enumerate(candidates):
+        value = minutes * scale + (n - rank)
+        took = bytearray(budget + 1)
+        for capacity in range(budget, minutes - 1, -1):
+            with_item = best[capacity - minutes] + value
+            if with_item > best[capacity]:
+                best[capacity] = with_item
+                took[capacity] = 1
+        taken.append(took)
+
+    chosen = []
+    capacity = budget
+    for i in range(n - 1, -1, -1):
+        if taken[i][capacity]:
+            chosen.append(candidates[i])
+            capacity -= candidates[i][1]
+    chosen.reverse()
+    return chosen
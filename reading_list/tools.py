@@ -0,0 +1,459 @@
+"""Agent tools for querying and updating the reading list."""
+
+import functools
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Optional, List, Any
+
+from .types import ReadingItem
+from .shards import get_reading_store, lease_reading_store
+from .snapshots import get_snapshot_store, SNAPSHOT_TYPES
+from .timing import pick_within, MAX_BUDGET_MINUTES, MAX_CANDIDATES
+from .urls import canonicalize_url
+
+logger = logging.getLogger(__name__)
+
+# Fields list_items can project, and the default projection
+LIST_FIELDS = ("id", "url", "description", "reason", "type", "tags", "status", "added_at", "read_at", "age")
+DEFAULT_FIELDS = ("id", "type", "description", "tags", "age")
+
+ITEM_TYPES = ("article", "video", "social", "repo", "podcast", "other")
+
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 100
+
+# Characters of snapshot text returned per read_snapshot call
+DEFAULT_SNAPSHOT_CHARS = 8000
+MAX_SNAPSHOT_CHARS = 30000
+
+
+def format_age(added_at: str) -> str:
+    """Format how long ago an item was added, e.g. '3d' or '2w'."""
+    try:
+        added = datetime.fromisoformat(added_at.replace('Z', '+00:00'))
+    except ValueError:
+        return "?"
+    days = (datetime.now(timezone.utc) - added).days
+    if days < 1:
+        return "today"
+    if days < 14:
+        return f"{days}d"
+    if days < 60:
+        return f"{days // 7}w"
+    return f"{days // 30}mo"
+
+
+def format_added(added_at: str) -> str:
+    """'added today' or 'added 3d ago'."""
+    age = format_age(added_at)
+    return "added today" if age == "today" else f"added {age} ago"
+
+
+def _field_value(item: ReadingItem, name: str) -> str:
+    """Render one projected field compactly, on a single line."""
+    if name == "tags":
+        value = ",".join(item.tags)
+    elif name == "age":
+        value = format_age(item.added_at)
+    else:
+        value = getattr(item, name) or ""
+    return str(value).replace("\n", " ").replace("|", "/")
+
+
+def format_items(items: List[ReadingItem], fields: List[str]) -> str:
+    """Render items as a header line plus one '|'-separated line per item."""
+    lines = ["|".join(fields)]
+    for item in items:
+        lines.append("|".join(_field_value(item, f) for f in fields))
+    return "\n".join(lines)
+
+
+def _encode_cursor(item: ReadingItem) -> str:
+    return f"{item.added_at}_{item.id}"
+
+
+def _decode_cursor(cursor: str) -> Optional[tuple]:
+    added_at, sep, item_id = cursor.rpartition("_")
+    if not sep or not added_at or not item_id:
+        return None
+    return (added_at, item_id)
+
+
+def _parse_list(value) -> List[str]:
+    """Accept either a list or a comma-separated string."""
+    if not value:
+        return []
+    if isinstance(value, str):
+        value = value.split(",")
+    return [v.strip() for v in value if v and v.strip()]
+
+
+# ============================================================
+# Agent Tools
+# ============================================================
+
+def _leased(func):
+    """Keep the chat's shard open while the tool runs (it may run on a worker thread)."""
+    @functools.wraps(func)
+    def wrapper(chat_id, *args, **kwargs):
+        with lease_reading_store(chat_id):
+            return func(chat_id, *args, **kwargs)
+    return wrapper
+
+
+@_leased
+def list_items(
+    chat_id: Any,
+    status: Optional[str] = None,
+    tags: Optional[List[str]] = None,
+    type: Optional[str] = None,
+    older_than: Optional[int] = None,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    fields: Optional[List[str]] = None
+) -> str:
+    """
+    List reading list items, newest first.
+
+    Args:
+        chat_id: Chat whose reading list to use
+        status: 'unread' or 'read'
+        tags: Only items with any of these tags
+        type: Only items of this type
+        older_than: Only items added more than this many days ago
+        limit: Page size (default 20, max 100)
+        cursor: next_cursor value from a previous call
+        fields: Fields to return (default id, type, description, tags, age)
+
+    Returns:
+        Compact '|'-separated rows, plus next_cursor if there are more
+    """
+    store = get_reading_store(chat_id)
+    if store is None:
+        return "Reading list not initialized"
+
+    fields = _parse_list(fields) or list(DEFAULT_FIELDS)
+    unknown = [f for f in fields if f not in LIST_FIELDS]
+    if unknown:
+        return f"Unknown fields: {', '.join(unknown)}. Valid fields: {', '.join(LIST_FIELDS)}"
+
+    after = None
+    if cursor:
+        after = _decode_cursor(cursor)
+        if after is None:
+            return f"Invalid cursor '{cursor}'"
+
+    added_before = None
+    if older_than:
+        cutoff = datetime.now(timezone.utc) - timedelta(days=int(older_than))
+        added_before = cutoff.strftime('%Y-%m-%dT%H:%M:%SZ')
+
+    limit = max(1, min(int(limit or DEFAULT_LIMIT), MAX_LIMIT))
+
+    # Fetch one extra row to know whether another page exists
+    items = store.list_items(
+        status=status or None,
+        tags=_parse_list(tags),
+        type=type or None,
+        added_before=added_before,
+        limit=limit + 1,
+        after=after
+    )
+    if not items:
+        return "No matching items"
+
+    has_more = len(items) > limit
+    items = items[:limit]
+    result = format_items(items, fields)
+    if has_more:
+        result += f"\nnext_cursor: {_encode_cursor(items[-1])}"
+    return result
+
+
+@_leased
+def search(
+    chat_id: Any,
+    query: str,
+    status: Optional[str] = None,
+    limit: Optional[int] = None,
+    fields: Optional[List[str]] = None
+) -> str:
+    """
+    Full-text search over descriptions, reasons, urls and tags, best match first.
+
+    Args:
+        chat_id: Chat whose reading list to use
+        query: Free text, e.g. "kubernetes" or "rust cli"
+        status: 'unread' or 'read'
+        limit: Maximum results (default 20, max 100)
+        fields: Fields to return (default id, type, description, tags, age)
+
+    Returns:
+        Compact '|'-separated rows
+    """
+    store = get_reading_store(chat_id)
+    if store is None:
+        return "Reading list not initialized"
+
+    fields = _parse_list(fields) or list(DEFAULT_FIELDS)
+    unknown = [f for f in fields if f not in LIST_FIELDS]
+    if unknown:
+        return f"Unknown fields: {', '.join(unknown)}. Valid fields: {', '.join(LIST_FIELDS)}"
+
+    limit = max(1, min(int(limit or DEFAULT_LIMIT), MAX_LIMIT))
+    items = store.search(query, status=status or None, limit=limit)
+    if not items:
+        return f"No items match '{query}'"
+    return format_items(items, fields)
+
+
+@_leased
+def add_item(
+    chat_id: Any,
+    url: str,
+    description: str = "",
+    reason: str = "",
+    type: str = "article",
+    tags: Optional[List[str]] = None
+) -> str:
+    """
+    Add a link to the reading list as unread.
+
+    Args:
+        chat_id: Chat whose reading list to use
+        url: The link
+        description: What it is, in a few words
+        reason: Why it might be interesting
+        type: One of article, video, social, repo, podcast, other
+        tags: 1-3 lowercase topic tags
+
+    Returns:
+        Success message with the new item ID and unread count, or the
+        existing item if the link (after canonicalization) is already saved
+    """
+    store = get_reading_store(chat_id)
+    if store is None:
+        return "Reading list not initialized"
+
+    if type not in ITEM_TYPES:
+        return f"Unknown type '{type}'. Use one of: {', '.join(ITEM_TYPES)}"
+    try:
+        canonicalize_url(url)
+    except ValueError:
+        return f"Invalid URL '{url}'. Not added."
+
+    existing = store.check_duplicate(url)
+    if existing is not None:
+        return (f"Already saved as [{existing.id}] {existing.description or existing.url} "
+                f"({existing.status}, {format_added(existing.added_at)}). Not added again.")
+
+    item = store.add_item(ReadingItem(
+        url=url.strip(),
+        description=description,
+        reason=reason,
+        type=type,
+        tags=_parse_list(tags)
+    ))
+    unread = store.count(status="unread")
+    return f"Added [{item.id}] {item.type} tagged {','.join(item.tags) or '-'} ({unread} unread)"
+
+
+@_leased
+def mark_read(chat_id: Any, item_id: str) -> str:
+    """
+    Mark an item as read.
+
+    Args:
+        chat_id: Chat whose reading list to use
+        item_id: The item ID (from list_items output)
+
+    Returns:
+        Success/failure message
+    """
+    store = get_reading_store(chat_id)
+    if store is None:
+        return "Reading list not initialized"
+
+    item = store.get_item(item_id)
+    if item is None:
+        return f"No item found with ID '{item_id}'"
+    if item.status == "read":
+        return f"[{item.id}] already read at {item.read_at}"
+
+    item = store.mark_read(item_id)
+    return f"Marked [{item.id}] read ({format_added(item.added_at)}, {store.count(status='unread')} unread)"
+
+
+@_leased
+def update_item(
+    chat_id: Any,
+    item_id: str,
+    description: Optional[str] = None,
+    reason: Optional[str] = None,
+    type: Optional[str] = None,
+    tags: Optional[List[str]] = None
+) -> str:
+    """
+    Update an item's description, reason, type or tags.
+
+    Args:
+        chat_id: Chat whose reading list to use
+        item_id: The item ID (from list_items output)
+        description: New description
+        reason: New reason
+        type: New type
+        tags: Replacement tag list
+
+    Returns:
+        Success/failure message
+    """
+    store = get_reading_store(chat_id)
+    if store is None:
+        return "Reading list not initialized"
+
+    updates = {}
+    if description is not None:
+        updates["description"] = description
+    if reason is not None:
+        updates["reason"] = reason
+    if type is not None:
+        if type not in ITEM_TYPES:
+            return f"Unknown type '{type}'. Use one of: {', '.join(ITEM_TYPES)}"
+        updates["type"] = type
+    if tags is not None:
+        updates["tags"] = _parse_list(tags)
+
+    if not updates:
+        return "Nothing to update"
+
+    item = store.update_item(item_id, **updates)
+    if item is None:
+        return f"No item found with ID '{item_id}'"
+    return f"Updated [{item.id}] {item.type} tagged {','.join(item.tags) or '-'}"
+
+
+@_leased
+def delete_item(chat_id: Any, item_id: str) -> str:
+    """
+    Remove an item from the reading list entirely.
+
+    Args:
+        chat_id: Chat whose reading list to use
+        item_id: The item ID (from list_items output)
+
+    Returns:
+        Success/failure message
+    """
+    store = get_reading_store(chat_id)
+    if store is None:
+        return "Reading list not initialized"
+
+    item = store.delete_item(item_id)
+    if item is None:
+        return f"No item found with ID '{item_id}'"
+    return f"Deleted [{item.id}] {item.description or item.url}"
+
+
+@_leased
+def count(
+    chat_id: Any,
+    status: Optional[str] = None,
+    tags: Optional[List[str]] = None,
+    type: Optional[str] = None
+) -> str:
+    """
+    Count items matching the given filters.
+
+    Returns:
+        The count as a short string
+    """
+    store = get_reading_store(chat_id)
+    if store is None:
+        return "Reading list not initialized"
+
+    n = store.count(status=status or None, tags=_parse_list(tags), type=type or None)
+    return str(n)
+
+
+@_leased
+def read_snapshot(chat_id: Any, item_id: str, offset: int = 0, max_chars: int = DEFAULT_SNAPSHOT_CHARS) -> str:
+    """
+    Read the locally stored main text of a saved page.
+
+    Args:
+        chat_id: Chat whose reading list to use
+        item_id: The item ID
+        offset: Character offset to start from (for long pages)
+        max_chars: Maximum characters to return
+
+    Returns:
+        The text, or a message saying why there is none
+    """
+    store = get_reading_store(chat_id)
+    if store is None:
+        return "Reading list not initialized"
+
+    item = store.get_item(item_id)
+    if item is None:
+        return f"No item found with ID '{item_id}'"
+    if item.type not in SNAPSHOT_TYPES:
+        return f"[{item.id}] is a {item.type}, which has no page text snapshot"
+    content_hash = store.get_content_hash(item_id)
+    text = get_snapshot_store().get(content_hash) if content_hash else None
+    if text is None:
+        return f"No snapshot of [{item.id}] yet - use WebFetch on {item.url}"
+
+    offset = max(0, int(offset or 0))
+    max_chars = max(1, min(int(max_chars or DEFAULT_SNAPSHOT_CHARS), MAX_SNAPSHOT_CHARS))
+    chunk = text[offset:offset + max_chars]
+    end = offset + len(chunk)
+    header = f"[{item.id}] {item.url} ({len(text)} chars, showing {offset}-{end})"
+    if end < len(text):
+        return f"{header}\n\n{chunk}\n\nnext_offset: {end}"
+    return f"{header}\n\n{chunk}"
+
+
+@_leased
+def quick_picks(
+    chat_id: Any,
+    minutes: int,
+    tags: Optional[List[str]] = None,
+    type: Optional[str] = None
+) -> str:
+    """
+    Pick unread items that together fill a time budget.
+
+    Args:
+        chat_id: Chat whose reading list to use
+        minutes: Time available, in minutes
+        tags: Only items carrying any of these tags
+        type: Only items of this type
+
+    Returns:
+        The picks with their estimates, one per line, and the total
+    """
+    store = get_reading_store(chat_id)
+    if store is None:
+        return "Reading list not initialized"
+
+    try:
+        minutes = int(minutes)
+    except (TypeError, ValueError):
+        return "Error: minutes must be a number"
+    if minutes <= 0:
+        return "Error: minutes must be positive"
+    minutes = min(minutes, MAX_BUDGET_MINUTES)
+
+    candidates = store.timed_items(minutes, tags=_parse_list(tags), type=type or None, limit=MAX_CANDIDATES)
+    picks = pick_within(candidates, minutes)
+    missing = store.unestimated_count()
+    note = f"\n({missing} unread items have no estimate yet)" if missing else ""
+    if not picks:
+        return f"Nothing unread fits in {minutes} min{note}"
+
+    lines = [
+        f"[{item.id}] ~{m} min {item.type}: {item.description or item.url}"
+        for item, m in picks
+    ]
+    total = sum(m for _, m in picks)
+    return "\n".join(lines) + f"\ntotal: {total} of {minutes} min{note}"
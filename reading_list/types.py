@@ -0,0 +1,89 @@
+"""Data types for the reading list."""
+
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Optional, Literal, List
+import uuid
+
+
+def utc_now_iso() -> str:
+    """Current UTC time in the ISO format used for added_at/read_at."""
+    return datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+def normalize_timestamp(value: Optional[str]) -> Optional[str]:
+    """
+    Normalize an ISO timestamp to 'YYYY-MM-DDTHH:MM:SSZ' in UTC.
+
+    Naive timestamps are treated as UTC. Returns None if the value is
+    missing or can't be parsed, so one bad row never breaks a migration.
+    """
+    if not value:
+        return None
+    try:
+        dt = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except (ValueError, AttributeError):
+        return None
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.astimezone(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+# Keys that map onto columns; anything else in a legacy item is kept in `extra`
+ITEM_FIELDS = (
+    "id", "url", "description", "reason", "type",
+    "tags", "status", "added_at", "read_at"
+)
+
+
+@dataclass
+class ReadingItem:
+    """A saved link in the reading list."""
+    url: str
+    description: str = ""
+    reason: str = ""
+    type: Literal["article", "video", "social", "repo", "podcast", "other"] = "article"
+    tags: List[str] = field(default_factory=list)
+    status: Literal["unread", "read"] = "unread"
+    added_at: str = field(default_factory=utc_now_iso)
+    read_at: Optional[str] = None
+    id: str = field(default_factory=lambda: ReadingItem.new_id())
+    extra: dict = field(default_factory=dict)  # Unknown keys from older list files
+
+    def to_dict(self) -> dict:
+        data = dict(self.extra)
+        data.update({
+            "id": self.id,
+            "url": self.url,
+            "description": self.description,
+            "reason": self.reason,
+            "type": self.type,
+            "tags": list(self.tags),
+            "status": self.status,
+            "added_at": self.added_at,
+            "read_at": self.read_at
+        })
+        return data
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "ReadingItem":
+        tags = data.get("tags") or []
+        if isinstance(tags, str):
+            tags = [t.strip() for t in tags.split(",")]
+        return cls(
+            id=data.get("id") or cls.new_id(),
+            url=data["url"],
+            description=data.get("description") or "",
+            reason=data.get("reason") or "",
+            type=data.get("type") or "article",
+            tags=[t.lower() for t in tags if t],
+            status=data.get("status") or "unread",
+            added_at=normalize_timestamp(data.get("added_at")) or utc_now_iso(),
+            read_at=normalize_timestamp(data.get("read_at")),
+            extra={k: v for k, v in data.items() if k not in ITEM_FIELDS}
+        )
+
+    @staticmethod
+    def new_id() -> str:
+        """Generate a short unique ID for an item."""
+        return uuid.uuid4().hex[:8]
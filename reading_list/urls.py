@@ -0,0 +1,129 @@
+"""URL canonicalization and type detection for saved links."""
+
+import hashlib
+import re
+from typing import Optional
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+# Host rules from the system prompt's type classification
+_TYPE_HOSTS = {
+    "video": ("youtube.com", "youtu.be", "vimeo.com"),
+    "social": ("twitter.com", "x.com", "threads.net", "bsky.app"),
+    "repo": ("github.com", "gitlab.com"),
+    "podcast": ("podcasts.apple.com", "overcast.fm", "pca.st", "pocketcasts.com"),
+}
+
+_TWITTER_HOSTS = {"twitter.com", "x.com", "mobile.twitter.com", "fxtwitter.com", "vxtwitter.com", "fixupx.com"}
+
+# Query parameters that only track where a click came from
+_TRACKING_PARAMS = {
+    "fbclid", "gclid", "dclid", "msclkid", "mc_cid", "mc_eid", "igshid", "_hsenc", "_hsmi",
+    "ref", "ref_src", "ref_url", "referrer", "source", "si", "feature", "share", "spm", "yclid",
+}
+_TRACKING_PREFIXES = ("utm_", "pk_", "mtm_")
+
+# Path suffixes that still point at a GitHub repo's root page
+_GITHUB_ROOT_SUFFIX = re.compile(r'^/([^/]+)/([^/]+?)(?:\.git)?(?:/tree/(?:main|master))?/?$')
+
+_YOUTUBE_ID = re.compile(r'^[\w-]{6,}$')
+
+
+def _strip_host(host: str) -> str:
+    host = host.lower().rstrip(".")
+    for prefix in ("www.", "m.", "mobile."):
+        if host.startswith(prefix) and host.count(".") > 1:
+            host = host[len(prefix):]
+    return host
+
+
+def _host_matches(host: str, domain: str) -> bool:
+    return host == domain or host.endswith("." + domain)
+
+
+def _youtube_id(host: str, path: str, query: dict) -> Optional[str]:
+    if host == "youtu.be":
+        video_id = path.strip("/").split("/")[0]
+    elif _host_matches(host, "youtube.com") or host == "youtube-nocookie.com":
+        if path == "/watch":
+            video_id = query.get("v", "")
+        else:
+            parts = path.strip("/").split("/")
+            video_id = parts[1] if len(parts) > 1 and parts[0] in ("shorts", "embed", "live", "v") else ""
+    else:
+        return None
+    return video_id if _YOUTUBE_ID.match(video_id or "") else None
+
+
+def canonicalize_url(url: str) -> str:
+    """
+    Reduce a URL to a canonical form so re-sent links compare equal.
+
+    - http/https, 'www.'/'m.' prefixes, default ports and fragments are ignored
+    - youtu.be, /shorts/ and /embed/ links become youtube.com/watch?v=<id>
+    - twitter.com and mirrors become x.com; tweets become x.com/i/status/<id>
+    - GitHub repo roots drop '.git', '/tree/main' and case differences
+    - tracking query parameters (utm_*, fbclid, ...) are dropped and the
+      rest sorted; trailing slashes are removed
+
+    Raises:
+        ValueError: If the URL can't be parsed (e.g. a non-numeric or
+            out-of-range port, or an unclosed IPv6 bracket)
+    """
+    url = url.strip()
+    if "://" not in url:
+        url = "https://" + url
+    try:
+        parts = urlsplit(url)
+        port = parts.port
+    except ValueError as e:
+        raise ValueError(f"Invalid URL {url!r}: {e}") from None
+    host = _strip_host(parts.hostname or "")
+    path = re.sub(r'/{2,}', '/', parts.path or "/")
+    pairs = parse_qsl(parts.query, keep_blank_values=True)
+
+    video_id = _youtube_id(host, path, dict(pairs))
+    if video_id:
+        return f"https://youtube.com/watch?v={video_id}"
+
+    if host in _TWITTER_HOSTS:
+        match = re.match(r'^/(?:[^/]+|i(?:/web)?)/status(?:es)?/(\d+)', path)
+        if match:
+            return f"https://x.com/i/status/{match.group(1)}"
+        return "https://x.com" + (path.rstrip("/") or "")
+
+    if host == "github.com":
+        match = _GITHUB_ROOT_SUFFIX.match(path)
+        if match:
+            return f"https://github.com/{match.group(1).lower()}/{match.group(2).lower()}"
+
+    query = sorted(
+        (k, v) for k, v in pairs
+        if k.lower() not in _TRACKING_PARAMS and not k.lower().startswith(_TRACKING_PREFIXES)
+    )
+    netloc = host
+    if port and port not in (80, 443):
+        netloc += f":{port}"
+    path = path.rstrip("/") if path != "/" else ""
+    return urlunsplit(("https", netloc, path, urlencode(query), ""))
+
+
+def url_hash(canonical_url: str) -> int:
+    """Signed 64-bit hash of a canonical URL, for the store's lookup index."""
+    digest = hashlib.blake2b(canonical_url.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big", signed=True)
+
+
+def detect_type(url: str) -> str:
+    """Infer item type from the URL host, following the prompt's rules."""
+    parts = urlsplit(url if "://" in url else "https://" + url)
+    host = (parts.hostname or "").lower()
+    for item_type, hosts in _TYPE_HOSTS.items():
+        for h in hosts:
+            if _host_matches(host, h):
+                return item_type
+    path = parts.path.lower()
+    if host == "open.spotify.com" and path.startswith(("/episode/", "/show/")):
+        return "podcast"
+    if "/podcast" in path or host.startswith("podcast"):
+        return "podcast"
+    return "article"
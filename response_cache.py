@@ -0,0 +1,124 @@
+"""Cache of agent replies to read-only questions, keyed on reading list version."""
+
+import re
+import time
+import logging
+from collections import OrderedDict
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_ENTRIES = 256
+DEFAULT_TTL = 15 * 60  # seconds; replies mention ages and times, so keep it short
+
+# Tools that never change state. A reply is only cached if its turn used
+# nothing else, and at least one reading list read (LIST_READ_TOOLS).
+READ_ONLY_TOOLS = frozenset({
+    "Read",
+    "WebFetch",
+    "mcp__reading_list__list_items",
+    "mcp__reading_list__search",
+    "mcp__reading_list__count",
+    "mcp__reading_list__link_info",
+    "mcp__reading_list__read_snapshot",
+    "mcp__reading_list__quick_picks",
+    "mcp__scheduler__cron_list"
+})
+LIST_READ_TOOLS = frozenset(t for t in READ_ONLY_TOOLS if t.startswith("mcp__reading_list__"))
+
+# Questions about the list ("what's unread?", "what should I read next?")
+_READ_QUERY_RE = re.compile(
+    r"^(what|whats|which|show|list|any|anything|how many|recommend|suggest|give me|pick)\b",
+    re.IGNORECASE
+)
+# ...that name the list or what's on it
+_LIST_WORDS_RE = re.compile(
+    r"\b(unread|backlog|reading list|my list|the list|saved|read next|watch next|to read|to watch|"
+    r"articles?|videos?|podcasts?|repos?|links?|items?|tagged)\b",
+    re.IGNORECASE
+)
+# ...that don't ask for anything to change
+_WRITE_WORDS_RE = re.compile(
+    r"\b(add|save|delete|remove|mark|done|finished|read it|remind|cancel|tag|change|update|rename|stop)\b",
+    re.IGNORECASE
+)
+_APOSTROPHE_RE = re.compile(r"['\u2019]")
+_NON_WORD_RE = re.compile(r"[^a-z0-9]+")
+
+
+def normalize_query(text: str) -> str:
+    """Lowercase and strip punctuation so trivial rewordings share a key."""
+    text = _APOSTROPHE_RE.sub("", text.lower())
+    return _NON_WORD_RE.sub(" ", text).strip()
+
+
+def is_read_query(text: str) -> bool:
+    """True for short questions about the list that don't ask for a change."""
+    text = text.strip()
+    return (
+        len(text) <= 200
+        and bool(_READ_QUERY_RE.match(text))
+        and bool(_LIST_WORDS_RE.search(text))
+        and not _WRITE_WORDS_RE.search(text)
+    )
+
+
+def is_cacheable_turn(tools) -> bool:
+    """
+    True if a turn's reply can be reused: it read the reading list and
+    did nothing but read. Replies that used no list tool answered from
+    conversation context or general knowledge and may not hold later.
+    """
+    used = set(tools)
+    return bool(used & LIST_READ_TOOLS) and used <= READ_ONLY_TOOLS
+
+
+class ResponseCache:
+    """
+    LRU of replies keyed by (chat_id, normalized query).
+
+    Each entry remembers the reading list version it was computed at; a
+    lookup at any other version is a miss and drops the entry, so every
+    write to the list invalidates that chat's cached replies. Entries also
+    expire after ttl seconds.
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES, ttl: float = DEFAULT_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: OrderedDict = OrderedDict()  # (chat_id, query) -> (version, stored_at, reply)
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get(self, chat_id, query: str, version: int) -> Optional[str]:
+        key = (chat_id, normalize_query(query))
+        entry = self._entries.get(key)
+        if entry is not None:
+            entry_version, expires_at, reply = entry
+            if entry_version == version and expires_at > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return reply
+            if entry_version != version:
+                self.invalidations += 1
+            del self._entries[key]
+        self.misses += 1
+        return None
+
+    def put(self, chat_id, query: str, version: int, reply: str):
+        key = (chat_id, normalize_query(query))
+        self._entries[key] = (version, time.monotonic() + self.ttl, reply)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+            "hit_rate": self.hits / lookups if lookups else 0.0
+        }
@@ -3,6 +3,7 @@ from .types import Schedule, JobState, CronJob
 from .store import load_cron_store, save_cron_store
 from .schedule import compute_next_run_at_ms
 from .service import CronService
+from .timers import TimerBackend, AsyncioTimer, JobQueueTimer
 from .executor import execute_cron_job
 from .tools import cron_list, cron_add, cron_remove, cron_update
 from .mcp_tools import create_scheduler_mcp_server
@@ -12,6 +13,7 @@ __all__ = [
     'load_cron_store', 'save_cron_store',
     'compute_next_run_at_ms',
     'CronService',
+    'TimerBackend', 'AsyncioTimer', 'JobQueueTimer',
     'execute_cron_job',
     'cron_list', 'cron_add', 'cron_remove', 'cron_update',
     'create_scheduler_mcp_server'
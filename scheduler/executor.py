@@ -1,6 +1,7 @@
 """Job executor: sends prompts to agent and delivers responses."""
 
 import logging
+import tracing
 from .types import CronJob
 
 logger = logging.getLogger(__name__)
@@ -41,10 +42,13 @@ async def execute_cron_job(job: CronJob):
 
     logger.info(f"Executing job '{job.name}' with prompt: {job.prompt[:50]}...")
 
-    # Send prompt to agent
-    response = await _process_message(job.prompt, chat_id)
+    with tracing.trace("cron", chat_id=chat_id, job_id=job.id):
+        # Send prompt to agent
+        with tracing.span("agent"):
+            response = await _process_message(job.prompt, chat_id)
 
-    # Send response to Telegram
-    await _send_message(chat_id, response)
+        # Send response to Telegram
+        with tracing.span("telegram.send"):
+            await _send_message(chat_id, response)
 
     logger.info(f"Job '{job.name}' executed successfully")
@@ -1,18 +1,28 @@
 """CronService: manages job lifecycle and timer scheduling."""
 
+import heapq
+import itertools
 import logging
 import time
 import asyncio
-from typing import Optional, List, Callable, Any
-from .types import CronJob, Schedule, JobState
+from typing import Optional, List, Callable, Dict, Tuple
+from .types import CronJob
 from .store import load_cron_store, save_cron_store
 from .schedule import compute_next_run_at_ms
+from .timers import TimerBackend, AsyncioTimer, JobQueueTimer
 
 logger = logging.getLogger(__name__)
 
 # Default store path
 DEFAULT_STORE_PATH = "cron_jobs.json"
 
+# Stale heap entries are tolerated up to this multiple of the live ones
+# before the heap is rebuilt
+HEAP_SLACK = 2
+
+# Seconds to coalesce job changes before writing the store
+FLUSH_DELAY = 1.0
+
 
 class CronService:
     """
@@ -21,16 +31,30 @@ class CronService:
     Instead of creating one timer per job, we maintain a single timer
     that fires at the next job's scheduled time. After execution,
     we re-arm the timer for the next earliest job.
+
+    Jobs are indexed by id, and run times are kept in a min-heap of
+    (next_run_at_ms, seq, job_id). Entries are deleted lazily: an entry
+    is live only while it matches _scheduled[job_id], so rescheduling,
+    disabling or removing a job never searches the heap.
+
+    The store is written behind: changes within flush_delay of each
+    other share one write, serialized in a worker thread, so a mutation
+    never rewrites every job on the event loop. stop() writes what's
+    left.
     """
 
-    def __init__(self, store_path: str = DEFAULT_STORE_PATH):
+    def __init__(self, store_path: str = DEFAULT_STORE_PATH, flush_delay: float = FLUSH_DELAY):
         self.store_path = store_path
-        self.jobs: List[CronJob] = []
-        self._timer_handle: Optional[asyncio.TimerHandle] = None
+        self.flush_delay = flush_delay
+        self.jobs: Dict[str, CronJob] = {}
+        self._heap: List[Tuple[int, int, str]] = []
+        self._scheduled: Dict[str, Tuple[int, int]] = {}  # job_id -> (run at, seq) of its live entry
+        self._seq = itertools.count()
+        self._timer: Optional[TimerBackend] = None  # the single outstanding wake-up
         self._executor: Optional[Callable] = None
-        self._job_queue: Any = None  # Telegram job queue for scheduling
-        self._loop: Optional[asyncio.AbstractEventLoop] = None
         self._started = False
+        self._dirty = False
+        self._flush_task: Optional[asyncio.Task] = None
 
     def set_executor(self, executor: Callable):
         """Set the function to call when executing jobs."""
@@ -38,31 +62,43 @@ class CronService:
 
     def set_job_queue(self, job_queue):
         """Set the Telegram job queue for scheduling."""
-        self._job_queue = job_queue
+        self.set_timer(JobQueueTimer(job_queue))
+
+    def set_timer(self, timer: TimerBackend):
+        """Use a specific timer backend (default: asyncio's call_later)."""
+        if self._timer is not None:
+            self._timer.cancel()
+        self._timer = timer
+        self._arm_timer()
 
     def start(self):
         """Load jobs and arm the timer."""
-        self.jobs = load_cron_store(self.store_path)
-        self._loop = asyncio.get_event_loop()
+        self.jobs = {job.id: job for job in load_cron_store(self.store_path)}
+        if self._timer is None:
+            self._timer = AsyncioTimer(asyncio.get_event_loop())
         self._started = True
 
         # Recompute next run times for all jobs
         now_ms = int(time.time() * 1000)
-        for job in self.jobs:
+        for job in self.jobs.values():
             if job.enabled:
                 job.state.next_run_at_ms = compute_next_run_at_ms(job.schedule, now_ms)
+        self._rebuild_heap()
 
         self._save()
         self._arm_timer()
         logger.info(f"CronService started with {len(self.jobs)} jobs")
 
     def stop(self):
-        """Cancel timer and save state."""
+        """Cancel timer and write any unsaved changes."""
         self._started = False
-        if self._timer_handle:
-            self._timer_handle.cancel()
-            self._timer_handle = None
-        self._save()
+        if self._timer is not None:
+            self._timer.cancel()
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            self._flush_task = None
+        if self._dirty:
+            self._write()
         logger.info("CronService stopped")
 
     def add_job(self, job: CronJob) -> CronJob:
@@ -70,7 +106,8 @@ class CronService:
         now_ms = int(time.time() * 1000)
         job.state.next_run_at_ms = compute_next_run_at_ms(job.schedule, now_ms)
 
-        self.jobs.append(job)
+        self.jobs[job.id] = job
+        self._schedule(job)
         self._save()
         self._arm_timer()
 
@@ -79,128 +116,176 @@ class CronService:
 
     def remove_job(self, job_id: str) -> bool:
         """Remove a job by ID."""
-        for i, job in enumerate(self.jobs):
-            if job.id == job_id:
-                del self.jobs[i]
-                self._save()
-                self._arm_timer()
-                logger.info(f"Removed job {job_id}")
-                return True
-        return False
+        if not self._delete(job_id):
+            return False
+        self._save()
+        self._arm_timer()
+        logger.info(f"Removed job {job_id}")
+        return True
 
     def update_job(self, job_id: str, **kwargs) -> Optional[CronJob]:
         """Update a job's properties."""
-        for job in self.jobs:
-            if job.id == job_id:
-                for key, value in kwargs.items():
-                    if hasattr(job, key):
-                        setattr(job, key, value)
-
-                # Recompute next run if schedule changed or job was enabled
-                if "schedule" in kwargs or ("enabled" in kwargs and kwargs["enabled"]):
-                    now_ms = int(time.time() * 1000)
-                    job.state.next_run_at_ms = compute_next_run_at_ms(job.schedule, now_ms)
-
-                self._save()
-                self._arm_timer()
-                logger.info(f"Updated job {job_id}")
-                return job
-        return None
+        job = self.jobs.get(job_id)
+        if job is None:
+            return None
+
+        for key, value in kwargs.items():
+            if key != "id" and hasattr(job, key):
+                setattr(job, key, value)
+
+        # Recompute next run if schedule changed or job was enabled
+        if "schedule" in kwargs or ("enabled" in kwargs and kwargs["enabled"]):
+            now_ms = int(time.time() * 1000)
+            job.state.next_run_at_ms = compute_next_run_at_ms(job.schedule, now_ms)
+
+        self._schedule(job)
+        self._save()
+        self._arm_timer()
+        logger.info(f"Updated job {job_id}")
+        return job
 
     def get_job(self, job_id: str) -> Optional[CronJob]:
         """Get a job by ID."""
-        for job in self.jobs:
-            if job.id == job_id:
-                return job
-        return None
+        return self.jobs.get(job_id)
 
     def list_jobs(self) -> List[CronJob]:
         """Return all jobs."""
-        return self.jobs.copy()
+        return list(self.jobs.values())
 
     def _save(self):
-        """Persist jobs to disk."""
-        save_cron_store(self.jobs, self.store_path)
+        """Mark jobs changed; they're written behind (or now, without a running loop)."""
+        self._dirty = True
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            self._write()
+            return
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.ensure_future(self._flush_later())
 
-    def _arm_timer(self):
-        """Schedule the next timer for the earliest job."""
-        if not self._started:
+    def _write(self):
+        self._dirty = False
+        save_cron_store(list(self.jobs.values()), self.store_path)
+
+    async def _flush_later(self):
+        await asyncio.sleep(self.flush_delay)
+        await self.flush()
+
+    async def flush(self):
+        """Write the store now if jobs changed."""
+        if not self._dirty:
+            return
+        self._dirty = False
+        # Copy the job list on the loop; a change made while the thread
+        # serializes marks the store dirty again and gets written next time
+        jobs = list(self.jobs.values())
+        await asyncio.to_thread(save_cron_store, jobs, self.store_path)
+
+    # ------------------------------------------------------------
+    # Run-time heap
+    # ------------------------------------------------------------
+
+    def _schedule(self, job: CronJob):
+        """Make the heap reflect a job's current next run (none if disabled)."""
+        run_at = job.state.next_run_at_ms if job.enabled else None
+        if run_at is None:
+            if self._scheduled.pop(job.id, None) is not None:
+                self._compact()
+            return
+        current = self._scheduled.get(job.id)
+        if current is not None and current[0] == run_at:
             return
+        entry = (run_at, next(self._seq))
+        self._scheduled[job.id] = entry
+        heapq.heappush(self._heap, (run_at, entry[1], job.id))
+        self._compact()
+
+    def _delete(self, job_id: str) -> bool:
+        """Drop a job and its schedule; its heap entry goes stale."""
+        if self.jobs.pop(job_id, None) is None:
+            return False
+        self._scheduled.pop(job_id, None)
+        self._compact()
+        return True
+
+    def _compact(self):
+        """Rebuild the heap once stale entries outnumber live ones by HEAP_SLACK."""
+        if len(self._heap) > HEAP_SLACK * len(self._scheduled) + 64:
+            self._rebuild_heap()
+
+    def _rebuild_heap(self):
+        """Rebuild the heap from the live entries only."""
+        self._scheduled = {}
+        self._heap = []
+        for job in self.jobs.values():
+            if job.enabled and job.state.next_run_at_ms is not None:
+                seq = next(self._seq)
+                self._scheduled[job.id] = (job.state.next_run_at_ms, seq)
+                self._heap.append((job.state.next_run_at_ms, seq, job.id))
+        heapq.heapify(self._heap)
+
+    def _peek(self) -> Optional[Tuple[int, str]]:
+        """(run at, job_id) of the earliest live entry, discarding stale ones on top."""
+        while self._heap:
+            run_at, seq, job_id = self._heap[0]
+            if self._scheduled.get(job_id) == (run_at, seq):
+                return run_at, job_id
+            heapq.heappop(self._heap)
+        return None
+
+    def _pop_due(self, now_ms: int) -> List[CronJob]:
+        """Remove and return every job whose live entry is due."""
+        due = []
+        while True:
+            top = self._peek()
+            if top is None or top[0] > now_ms:
+                return due
+            heapq.heappop(self._heap)
+            del self._scheduled[top[1]]
+            due.append(self.jobs[top[1]])
 
-        # Cancel existing timer
-        if self._timer_handle:
-            self._timer_handle.cancel()
-            self._timer_handle = None
+    def _arm_timer(self):
+        """Point the single timer at the earliest job (replacing any pending wake-up)."""
+        if not self._started or self._timer is None:
+            return
 
         # Find next job to run
         now_ms = int(time.time() * 1000)
-        next_job = None
-        next_time = None
-
-        for job in self.jobs:
-            if not job.enabled:
-                continue
-            if job.state.next_run_at_ms is None:
-                continue
-            if next_time is None or job.state.next_run_at_ms < next_time:
-                next_time = job.state.next_run_at_ms
-                next_job = job
-
-        if next_job is None:
+        top = self._peek()
+        if top is None:
+            self._timer.cancel()
             logger.debug("No jobs scheduled")
             return
+        next_time, next_job = top[0], self.jobs[top[1]]
 
         # Calculate delay
-        delay_ms = max(0, next_time - now_ms)
-        delay_sec = delay_ms / 1000
-
-        # Use Telegram's job_queue if available (more reliable for long delays)
-        if self._job_queue is not None:
-            self._job_queue.run_once(
-                self._on_timer_callback,
-                when=delay_sec,
-                name=f"cron_timer_{next_job.id}"
-            )
-            logger.debug(f"Armed timer via job_queue for {next_job.name} in {delay_sec:.1f}s")
-        elif self._loop:
-            # Fallback to asyncio timer
-            self._timer_handle = self._loop.call_later(
-                delay_sec,
-                lambda: asyncio.create_task(self._on_timer())
-            )
-            logger.debug(f"Armed timer via asyncio for {next_job.name} in {delay_sec:.1f}s")
-
-    async def _on_timer_callback(self, context):
-        """Callback for Telegram job_queue."""
-        await self._on_timer()
+        delay_sec = max(0, next_time - now_ms) / 1000
+        self._timer.schedule(delay_sec, self._on_timer)
+        logger.debug(f"Armed timer for {next_job.name} in {delay_sec:.1f}s")
+
+    def pending_timers(self) -> int:
+        """Wake-ups outstanding; never more than one."""
+        return self._timer.pending() if self._timer is not None else 0
 
     async def _on_timer(self):
         """Called when timer fires. Execute due jobs and re-arm."""
         now_ms = int(time.time() * 1000)
-        jobs_to_delete = []
-
-        for job in self.jobs:
-            if not job.enabled:
-                continue
-            if job.state.next_run_at_ms is None:
-                continue
-            if job.state.next_run_at_ms > now_ms:
-                continue
 
+        for job in self._pop_due(now_ms):
             # Job is due - execute it
             logger.info(f"Executing job {job.id}: {job.name}")
             await self._execute_job(job)
 
-            # Mark for deletion if one-shot
+            if self.jobs.get(job.id) is not job:
+                continue  # Removed while it ran
             if job.delete_after_run:
-                jobs_to_delete.append(job.id)
+                # One-shot job is done
+                self._delete(job.id)
+                logger.info(f"Removed job {job.id}")
             else:
                 # Compute next run time
                 job.state.next_run_at_ms = compute_next_run_at_ms(job.schedule, now_ms)
-
-        # Delete one-shot jobs
-        for job_id in jobs_to_delete:
-            self.remove_job(job_id)
+                self._schedule(job)
 
         self._save()
         self._arm_timer()
@@ -0,0 +1,109 @@
+"""Timer backends for CronService: one cancellable wake-up at a time."""
+
+import asyncio
+import itertools
+import logging
+from typing import Any, Awaitable, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+TimerCallback = Callable[[], Awaitable[None]]
+
+
+class TimerBackend:
+    """
+    Holds at most one pending wake-up.
+
+    schedule() replaces whatever was pending, cancel() drops it. Each
+    wake-up carries a generation number, so one that was already on its
+    way when it got replaced (a cancel racing the fire) does nothing.
+    """
+
+    def __init__(self):
+        self._generation = itertools.count(1)
+        self._current = 0
+
+    def schedule(self, delay_sec: float, callback: TimerCallback):
+        """Run callback after delay_sec, replacing any pending wake-up."""
+        self.cancel()
+        self._current = next(self._generation)
+        self._arm(max(0.0, delay_sec), self._current, callback)
+
+    def cancel(self):
+        """Drop the pending wake-up, if any."""
+        self._current = 0
+        self._disarm()
+
+    def pending(self) -> int:
+        """Number of wake-ups outstanding (0 or 1)."""
+        raise NotImplementedError
+
+    async def _fire(self, generation: int, callback: TimerCallback):
+        if generation != self._current:
+            logger.debug(f"Ignoring superseded timer {generation}")
+            return
+        self._current = 0
+        self._fired()
+        await callback()
+
+    def _arm(self, delay_sec: float, generation: int, callback: TimerCallback):
+        raise NotImplementedError
+
+    def _disarm(self):
+        raise NotImplementedError
+
+    def _fired(self):
+        """Forget the handle of a wake-up that is now running."""
+        raise NotImplementedError
+
+
+class AsyncioTimer(TimerBackend):
+    """Wake-ups via loop.call_later."""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        super().__init__()
+        self._loop = loop
+        self._handle: Optional[asyncio.TimerHandle] = None
+
+    def _arm(self, delay_sec, generation, callback):
+        self._handle = self._loop.call_later(
+            delay_sec,
+            lambda: asyncio.ensure_future(self._fire(generation, callback))
+        )
+
+    def _disarm(self):
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+
+    def _fired(self):
+        self._handle = None
+
+    def pending(self) -> int:
+        return int(self._handle is not None)
+
+
+class JobQueueTimer(TimerBackend):
+    """Wake-ups via Telegram's job_queue (survives long delays better)."""
+
+    def __init__(self, job_queue: Any, name: str = "cron_timer"):
+        super().__init__()
+        self._job_queue = job_queue
+        self._name = name
+        self._job = None
+
+    def _arm(self, delay_sec, generation, callback):
+        async def run(context):
+            await self._fire(generation, callback)
+        self._job = self._job_queue.run_once(run, when=delay_sec, name=self._name)
+
+    def _disarm(self):
+        if self._job is not None:
+            self._job.schedule_removal()
+            self._job = None
+
+    def _fired(self):
+        self._job = None
+
+    def pending(self) -> int:
+        return int(self._job is not None)
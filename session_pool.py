@@ -0,0 +1,276 @@
+"""Bounded pool of live agent sessions, plus a small pool of pre-warmed clients."""
+
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_SESSIONS = 8
+DEFAULT_IDLE_TIMEOUT = 30 * 60   # seconds
+REAP_INTERVAL = 60               # seconds between idle checks
+SUMMARY_TIMEOUT = 60             # seconds allowed for an eviction summary
+
+
+class SessionPool:
+    """
+    Live sessions keyed by chat id, most recently used last.
+
+    Each session is a dict holding at least 'client' (a connected
+    ClaudeSDKClient) and 'turn_count'. The pool adds 'last_used' and
+    'busy'. Adding a session beyond max_size evicts the least recently
+    used idle one, and a background reaper evicts sessions idle longer
+    than idle_timeout. Before an evicted client is disconnected it is
+    asked for a summary, which is kept so the chat resumes cheaply.
+    """
+
+    def __init__(
+        self,
+        max_size: int = DEFAULT_MAX_SESSIONS,
+        idle_timeout: float = DEFAULT_IDLE_TIMEOUT,
+        summarize: Optional[Callable[[Any], Awaitable[str]]] = None
+    ):
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self._summarize = summarize
+        self._sessions: "OrderedDict[Any, dict]" = OrderedDict()
+        self._summaries: Dict[Any, str] = {}
+        self._reaper: Optional[asyncio.Task] = None
+        self._closing: set = set()
+        self.evictions = 0
+        self.idle_disconnects = 0
+
+    # ------------------------------------------------------------
+    # Dict-like access
+    # ------------------------------------------------------------
+
+    def __contains__(self, chat_id) -> bool:
+        return chat_id in self._sessions
+
+    def __getitem__(self, chat_id) -> dict:
+        session = self._sessions[chat_id]
+        self._touch(chat_id, session)
+        return session
+
+    def __setitem__(self, chat_id, session: dict):
+        session.setdefault('busy', False)
+        self._sessions[chat_id] = session
+        self._touch(chat_id, session)
+        # The newcomer is about to be used; never make it its own victim
+        self._evict_overflow(protect=chat_id)
+
+    def __delitem__(self, chat_id):
+        del self._sessions[chat_id]
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def _touch(self, chat_id, session: dict):
+        session['last_used'] = time.monotonic()
+        self._sessions.move_to_end(chat_id)
+
+    def release(self, session: dict):
+        """Mark a session idle after a turn; trims the pool if it ran over."""
+        session['busy'] = False
+        session['last_used'] = time.monotonic()
+        self._evict_overflow()
+
+    def peek(self, chat_id) -> Optional[dict]:
+        """The chat's live session, without counting as a use."""
+        return self._sessions.get(chat_id)
+
+    def replace(self, chat_id, session: dict):
+        """Swap in a new session for chat_id, disconnecting the old one (no summary)."""
+        old = self._sessions.get(chat_id)
+        self._sessions[chat_id] = session
+        session.setdefault('busy', False)
+        session['last_used'] = time.monotonic()
+        if old is not None and old is not session:
+            self._spawn_close(chat_id, old, summarize=False)
+
+    def pop_summary(self, chat_id) -> Optional[str]:
+        """Summary left behind by an evicted session, if any."""
+        return self._summaries.pop(chat_id, None)
+
+    def stats(self) -> dict:
+        """Pool occupancy and eviction counters."""
+        return {
+            "size": len(self._sessions),
+            "max_size": self.max_size,
+            "busy": sum(1 for s in self._sessions.values() if s.get('busy')),
+            "closing": len(self._closing),
+            "evictions": self.evictions,
+            "idle_disconnects": self.idle_disconnects,
+            "summaries_kept": len(self._summaries)
+        }
+
+    # ------------------------------------------------------------
+    # Eviction
+    # ------------------------------------------------------------
+
+    def _evict_overflow(self, protect=None):
+        while len(self._sessions) > self.max_size:
+            victim = next(
+                (cid for cid, s in self._sessions.items() if not s.get('busy') and cid != protect),
+                None
+            )
+            if victim is None:
+                # Everything else is mid-turn; let the pool run over until a turn ends
+                logger.warning(f"Session pool over capacity ({len(self._sessions)}/{self.max_size}), all busy")
+                return
+            self.evictions += 1
+            self._evict(victim, reason="lru")
+
+    def _evict(self, chat_id, reason: str):
+        session = self._sessions.pop(chat_id)
+        logger.info(f"Evicting session for chat_id {chat_id} ({reason}); pool: {self.stats()}")
+        self._spawn_close(chat_id, session, summarize=True)
+
+    def _spawn_close(self, chat_id, session: dict, summarize: bool):
+        task = asyncio.ensure_future(self._close_session(chat_id, session, summarize))
+        self._closing.add(task)
+        task.add_done_callback(self._closing.discard)
+
+    def discard(self, chat_id):
+        """Drop a broken session and disconnect it without summarizing."""
+        session = self._sessions.pop(chat_id, None)
+        if session is not None:
+            self._spawn_close(chat_id, session, summarize=False)
+
+    async def _close_session(self, chat_id, session: dict, summarize: bool):
+        client = session['client']
+        summary = session.get('summary')
+        if summarize and self._summarize is not None and session.get('turn_count', 0) > 0:
+            try:
+                summary = await asyncio.wait_for(self._summarize(client), SUMMARY_TIMEOUT) or summary
+            except Exception as e:
+                logger.error(f"Error summarizing evicted session for chat_id {chat_id}: {e}")
+        if summary and chat_id not in self._sessions:
+            self._summaries[chat_id] = summary
+        try:
+            await client.disconnect()
+        except Exception as e:
+            logger.error(f"Error disconnecting client for chat_id {chat_id}: {e}")
+
+    async def _reap_idle(self):
+        while True:
+            await asyncio.sleep(REAP_INTERVAL)
+            cutoff = time.monotonic() - self.idle_timeout
+            idle = [
+                cid for cid, s in self._sessions.items()
+                if not s.get('busy') and s.get('last_used', 0) < cutoff
+            ]
+            for chat_id in idle:
+                self.idle_disconnects += 1
+                self._evict(chat_id, reason="idle")
+
+    def start(self):
+        """Start the idle reaper. Call from a running event loop."""
+        if self._reaper is None:
+            self._reaper = asyncio.ensure_future(self._reap_idle())
+
+    async def close(self):
+        """Stop the reaper and disconnect every session (no summaries)."""
+        if self._reaper is not None:
+            self._reaper.cancel()
+            self._reaper = None
+        sessions = list(self._sessions.items())
+        self._sessions.clear()
+        await asyncio.gather(
+            *(self._close_session(cid, s, summarize=False) for cid, s in sessions),
+            *list(self._closing),
+            return_exceptions=True
+        )
+        logger.info(f"Session pool closed ({len(sessions)} sessions disconnected)")
+
+
+DEFAULT_WARM_CLIENTS = 1
+DEFAULT_WARM_MAX_AGE = 60 * 60  # seconds
+
+
+class WarmPool:
+    """
+    A few pre-connected, unclaimed clients so new sessions skip connect latency.
+
+    connect is an async factory returning a dict with at least 'client'.
+    Claiming takes the oldest fresh entry and schedules a background refill;
+    entries older than max_age are disconnected instead of handed out.
+    """
+
+    def __init__(
+        self,
+        connect: Callable[[], Awaitable[dict]],
+        size: int = DEFAULT_WARM_CLIENTS,
+        max_age: float = DEFAULT_WARM_MAX_AGE
+    ):
+        self.size = size
+        self.max_age = max_age
+        self._connect = connect
+        self._ready: list = []
+        self._refill: Optional[asyncio.Task] = None
+        self.claims = 0
+        self.misses = 0
+        self.expired = 0
+
+    def __len__(self) -> int:
+        return len(self._ready)
+
+    def claim(self) -> Optional[dict]:
+        """Take a warm entry, or None if none is ready. Always triggers a refill."""
+        entry = None
+        cutoff = time.monotonic() - self.max_age
+        while self._ready:
+            candidate = self._ready.pop(0)
+            if candidate['warmed_at'] >= cutoff:
+                entry = candidate
+                break
+            self.expired += 1
+            asyncio.ensure_future(self._disconnect(candidate))
+        if entry is None:
+            self.misses += 1
+        else:
+            self.claims += 1
+        self.refill()
+        return entry
+
+    def refill(self):
+        """Top the pool up in the background (one refill task at a time)."""
+        if self.size <= 0 or (self._refill is not None and not self._refill.done()):
+            return
+        self._refill = asyncio.ensure_future(self._fill())
+
+    async def _fill(self):
+        while len(self._ready) < self.size:
+            try:
+                entry = await self._connect()
+            except Exception as e:
+                logger.error(f"Error pre-warming client: {e}")
+                return
+            entry['warmed_at'] = time.monotonic()
+            self._ready.append(entry)
+            logger.info(f"Pre-warmed client ready ({len(self._ready)}/{self.size})")
+
+    async def _disconnect(self, entry: dict):
+        try:
+            await entry['client'].disconnect()
+        except Exception as e:
+            logger.error(f"Error disconnecting warm client: {e}")
+
+    def stats(self) -> dict:
+        return {
+            "warm": len(self._ready),
+            "warm_size": self.size,
+            "warm_claims": self.claims,
+            "warm_misses": self.misses,
+            "warm_expired": self.expired
+        }
+
+    async def close(self):
+        """Stop refilling and disconnect unclaimed clients."""
+        if self._refill is not None:
+            self._refill.cancel()
+            self._refill = None
+        ready, self._ready = self._ready, []
+        await asyncio.gather(*(self._disconnect(e) for e in ready), return_exceptions=True)
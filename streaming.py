@@ -0,0 +1,127 @@
+"""Progressive delivery of agent replies to Telegram via message edits."""
+
+import asyncio
+import logging
+import time
+from typing import List, Optional
+
+from telegram.constants import ChatAction, MessageLimit
+from telegram.error import BadRequest, RetryAfter
+
+logger = logging.getLogger(__name__)
+
+EDIT_INTERVAL = 1.0     # seconds between edits of the same message
+TYPING_INTERVAL = 4.0   # Telegram's typing indicator lasts about 5 seconds
+MAX_TEXT = MessageLimit.MAX_TEXT_LENGTH
+
+
+def split_text(text: str, limit: int = MAX_TEXT) -> List[str]:
+    """Split a reply into Telegram-sized chunks, preferring line breaks."""
+    chunks = []
+    while len(text) > limit:
+        cut = text.rfind("\n", 0, limit)
+        if cut <= 0:
+            cut = limit
+        chunks.append(text[:cut])
+        text = text[cut:].lstrip("\n")
+    if text:
+        chunks.append(text)
+    return chunks
+
+
+class ReplyStream:
+    """
+    Streams one agent reply into a Telegram message.
+
+    The first text sends the message right away; later text edits it, at
+    most once per EDIT_INTERVAL, always showing the latest text. While the
+    agent is in a tool call a typing indicator is kept alive instead.
+    """
+
+    def __init__(self, bot, chat_id, edit_interval: float = EDIT_INTERVAL, typing: bool = True):
+        self.bot = bot
+        self.chat_id = chat_id
+        self.edit_interval = edit_interval
+        self.typing = typing
+        self.message = None
+        self._text = ""
+        self._shown = ""
+        self._last_edit = 0.0
+        self._flush: Optional[asyncio.Task] = None
+        self._typing: Optional[asyncio.Task] = None
+        self._lock = asyncio.Lock()
+
+    @property
+    def started(self) -> bool:
+        return self.message is not None
+
+    async def update(self, text: str):
+        """Show the reply text so far."""
+        self._stop_typing()
+        self._text = text
+        if not text.strip():
+            return
+        if self.message is None:
+            async with self._lock:
+                if self.message is None:
+                    self.message = await self.bot.send_message(chat_id=self.chat_id, text=text[:MAX_TEXT])
+                    self._shown = text[:MAX_TEXT]
+                    self._last_edit = time.monotonic()
+            return
+        if self._flush is None or self._flush.done():
+            self._flush = asyncio.ensure_future(self._flush_later())
+
+    async def tool(self, name: str):
+        """The agent started a tool call; keep the typing indicator up."""
+        if self.typing and (self._typing is None or self._typing.done()):
+            self._typing = asyncio.ensure_future(self._keep_typing())
+
+    async def finish(self, text: str):
+        """Replace the streamed text with the final reply, splitting long replies."""
+        self._stop_typing()
+        if self._flush is not None:
+            self._flush.cancel()
+        chunks = split_text(text) or [text]
+        if self.message is None:
+            for chunk in chunks:
+                await self.bot.send_message(chat_id=self.chat_id, text=chunk)
+            return
+        async with self._lock:
+            await self._edit(chunks[0])
+        for chunk in chunks[1:]:
+            await self.bot.send_message(chat_id=self.chat_id, text=chunk)
+
+    async def _flush_later(self):
+        delay = self._last_edit + self.edit_interval - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        async with self._lock:
+            await self._edit(self._text[:MAX_TEXT])
+
+    async def _edit(self, text: str):
+        if not text or text == self._shown:
+            return
+        try:
+            await self.message.edit_text(text)
+            self._shown = text
+        except RetryAfter as e:
+            logger.warning(f"Edit rate-limited for chat_id {self.chat_id}, retrying in {e.retry_after}s")
+            await asyncio.sleep(float(e.retry_after))
+            await self._edit(text)
+        except BadRequest as e:
+            # "Message is not modified" and friends; the next edit catches up
+            logger.debug(f"Edit skipped for chat_id {self.chat_id}: {e}")
+        self._last_edit = time.monotonic()
+
+    async def _keep_typing(self):
+        try:
+            while True:
+                await self.bot.send_chat_action(chat_id=self.chat_id, action=ChatAction.TYPING)
+                await asyncio.sleep(TYPING_INTERVAL)
+        except Exception as e:
+            logger.debug(f"Typing indicator failed for chat_id {self.chat_id}: {e}")
+
+    def _stop_typing(self):
+        if self._typing is not None:
+            self._typing.cancel()
+            self._typing = None
@@ -0,0 +1,41 @@
+import asyncio
+
+import agent
+from chat_queue import QueuedMessage
+from response_cache import ResponseCache
+
+
+class FakeStore:
+    version = 1
+
+
+def test_scheduled_prompts_skip_the_response_cache(monkeypatch):
+    calls = []
+
+    async def fake_turn(text, chat_id, image_path=None, stream=None, turn=None):
+        calls.append(text)
+        if turn is not None:
+            turn.update(ok=True, tools=["mcp__reading_list__list_items"])
+        return f"reply {len(calls)}"
+
+    monkeypatch.setattr(agent, "_process_turn", fake_turn)
+    monkeypatch.setattr(agent, "get_reading_store", lambda chat_id: FakeStore())
+    monkeypatch.setattr(agent, "RESPONSES", ResponseCache())
+    monkeypatch.setattr(agent, "SESSION_NOTES", {})
+
+    async def run(text, coalesce):
+        message = QueuedMessage(text, None, coalesce, None, asyncio.get_running_loop().create_future())
+        return await agent._run_batch(1, [message])
+
+    async def scenario():
+        question = "what's unread?"
+        # A scheduled prompt that looks like a list question is never cached or reused
+        assert await run(question, coalesce=False) == "reply 1"
+        assert await run(question, coalesce=False) == "reply 2"
+        # The user's own question is, with a note crediting the user
+        assert await run(question, coalesce=True) == "reply 3"
+        assert await run(question, coalesce=True) == "reply 3"
+
+    asyncio.run(scenario())
+    assert len(calls) == 3
+    assert agent.SESSION_NOTES[1][0].startswith("The user asked")
@@ -0,0 +1,22 @@
+import asyncio
+import logging
+
+import agent
+
+
+def test_failed_background_compaction_is_logged_and_forgotten(monkeypatch, caplog):
+    async def failing(chat_id, session):
+        raise RuntimeError("summary service down")
+
+    monkeypatch.setattr(agent, "compact_session", failing)
+
+    async def run():
+        task = agent.start_compaction(42, {})
+        assert agent.COMPACTIONS[42] is task
+        await asyncio.gather(task, return_exceptions=True)
+        await asyncio.sleep(0)
+
+    with caplog.at_level(logging.ERROR):
+        asyncio.run(run())
+    assert 42 not in agent.COMPACTIONS
+    assert "summary service down" in caplog.text
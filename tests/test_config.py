@@ -0,0 +1,30 @@
+import asyncio
+import json
+
+from config import ConfigManager
+
+
+def test_remember_chat_keeps_the_first_owner(tmp_path):
+    path = tmp_path / "config.json"
+    config = ConfigManager(str(path))
+
+    config.remember_chat(1)
+    config.remember_chat(2)
+
+    assert config.get("chat_id") == 1
+    assert json.loads(path.read_text())["chat_id"] == 1
+
+
+def test_changes_are_written_behind(tmp_path):
+    path = tmp_path / "config.json"
+    path.write_text(json.dumps({"chat_id": 1}))
+
+    async def run():
+        config = ConfigManager(str(path), flush_delay=0.01)
+        config.set_chat_setting(5, "quick_minutes", 20)
+        assert "chats" not in json.loads(path.read_text())
+        await asyncio.sleep(0.05)
+        assert json.loads(path.read_text())["chats"] == {"5": {"quick_minutes": 20}}
+        await config.stop()
+
+    asyncio.run(run())
@@ -0,0 +1,51 @@
+import asyncio
+import json
+
+from scheduler.service import CronService
+from scheduler.types import CronJob, Schedule
+
+
+class NullTimer:
+    def schedule(self, delay_sec, callback):
+        pass
+
+    def cancel(self):
+        pass
+
+    def pending(self):
+        return 0
+
+
+def _job(i):
+    return CronJob(id=f"job{i}", name=f"job {i}", prompt="hi", schedule=Schedule(kind="every", every_ms=60_000))
+
+
+def test_changes_are_written_behind_in_one_write(tmp_path, monkeypatch):
+    path = tmp_path / "cron_jobs.json"
+    writes = []
+
+    import scheduler.service as service_module
+    save = service_module.save_cron_store
+    monkeypatch.setattr(service_module, "save_cron_store", lambda jobs, p: writes.append(len(jobs)) or save(jobs, p))
+
+    async def run():
+        service = CronService(str(path), flush_delay=0.05)
+        service.set_timer(NullTimer())
+        service.start()
+        await asyncio.sleep(0.1)
+        writes.clear()
+
+        for i in range(50):
+            service.add_job(_job(i))
+        service.remove_job("job0")
+        service.update_job("job1", enabled=False)
+        assert writes == []
+        await asyncio.sleep(0.1)
+        assert writes == [49]
+
+        service.add_job(_job(99))
+        service.stop()
+        assert writes == [49, 50]
+
+    asyncio.run(run())
+    assert len(json.loads(path.read_text())["jobs"]) == 50
@@ -0,0 +1,20 @@
+from reading_list.importer import import_file
+from reading_list.store import ReadingListStore
+
+
+def test_malformed_url_is_counted_invalid_and_import_continues(tmp_path):
+    export = tmp_path / "export.csv"
+    export.write_text(
+        "url,title\n"
+        "https://example.com/a,A\n"
+        "http://example.com:99999/bad-port,Bad port\n"
+        "http://[::1/unclosed,Bad host\n"
+        "https://example.com/b,B\n"
+    )
+    store = ReadingListStore(str(tmp_path / "list.db"))
+    try:
+        totals = import_file(str(export), lambda: store, fmt="csv")
+        assert (totals.parsed, totals.added, totals.invalid) == (4, 2, 2)
+        assert sorted(item.url for item in store.list_items()) == ["https://example.com/a", "https://example.com/b"]
+    finally:
+        store.close()
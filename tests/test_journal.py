@@ -0,0 +1,44 @@
+import logging
+import threading
+
+from reading_list.journal import ReadingJournal
+from reading_list.store import ReadingListStore
+from reading_list.types import ReadingItem
+
+
+def test_replay_matches_the_store_after_concurrent_writes(tmp_path):
+    store = ReadingListStore(str(tmp_path / "list.db"))
+    journal = ReadingJournal(str(tmp_path / "journal"))
+    journal.attach(store)
+    item = store.add_item(ReadingItem(url="https://example.com/a"))
+
+    def writer(name):
+        for i in range(200):
+            store.update_item(item.id, description=f"{name} {i}", tags=[name, str(i % 3)])
+
+    threads = [threading.Thread(target=writer, args=(name,)) for name in ("loop", "importer")]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    try:
+        replayed = journal.replay()[item.id]
+        current = store.get_item(item.id)
+        assert (replayed["description"], replayed["tags"]) == (current.description, current.tags)
+    finally:
+        journal.close()
+        store.close()
+
+
+def test_writes_after_close_are_reported(tmp_path, caplog):
+    store = ReadingListStore(str(tmp_path / "list.db"))
+    journal = ReadingJournal(str(tmp_path / "journal"))
+    journal.attach(store)
+    journal.close()
+    try:
+        with caplog.at_level(logging.ERROR):
+            store.add_item(ReadingItem(url="https://example.com/a"))
+        assert "closed journal" in caplog.text
+    finally:
+        store.close()
@@ -0,0 +1,92 @@
+import asyncio
+
+import httpx
+
+from reading_list.metadata import MetadataCache, MetadataFetcher
+
+PAGE = "<html><head><title>Slow page</title></head><body></body></html>"
+URL = "http://93.184.216.34/post"  # a public address, so no DNS lookup is needed
+
+
+def _fetcher(tmp_path, delay=0.0):
+    calls = []
+
+    async def handler(request):
+        calls.append(str(request.url))
+        await asyncio.sleep(delay)
+        return httpx.Response(200, headers={"content-type": "text/html"}, text=PAGE)
+
+    fetcher = MetadataFetcher(cache=MetadataCache(str(tmp_path)), transport=httpx.MockTransport(handler))
+    return fetcher, calls
+
+
+def test_timeout_stops_waiting_but_the_fetch_finishes_and_is_cached(tmp_path):
+    async def run():
+        fetcher, calls = _fetcher(tmp_path, delay=0.2)
+        [info] = await fetcher.fetch_many([URL], timeout=0.05)
+        assert info.error == "timed out"
+        await asyncio.sleep(0.3)
+        info = await fetcher.fetch(URL)
+        await fetcher.aclose()
+        return info, calls, fetcher.stats()
+
+    info, calls, stats = asyncio.run(run())
+    assert info.title == "Slow page"
+    assert len(calls) == 1
+    assert stats["cache_hits"] == 1 and stats["inflight"] == 0
+
+
+def test_concurrent_fetches_share_one_request(tmp_path):
+    async def run():
+        fetcher, calls = _fetcher(tmp_path, delay=0.05)
+        infos = await asyncio.gather(*(fetcher.fetch(URL) for _ in range(5)))
+        await fetcher.aclose()
+        return infos, calls
+
+    infos, calls = asyncio.run(run())
+    assert [i.title for i in infos] == ["Slow page"] * 5
+    assert len(calls) == 1
+
+
+def test_cache_hit_skips_the_request(tmp_path):
+    async def run():
+        fetcher, calls = _fetcher(tmp_path)
+        await fetcher.fetch(URL)
+        # Same canonical URL
+        info = await fetcher.fetch(URL + "/?utm_source=feed")
+        await fetcher.aclose()
+        return info, calls, fetcher.stats()
+
+    info, calls, stats = asyncio.run(run())
+    assert info.title == "Slow page"
+    assert len(calls) == 1
+    assert stats["cache_hits"] == 1
+
+
+def test_private_addresses_are_refused(tmp_path):
+    async def run():
+        fetcher, calls = _fetcher(tmp_path)
+        infos = await fetcher.fetch_many([
+            "http://127.0.0.1:8080/admin",
+            "http://169.254.169.254/latest/meta-data",
+            "http://10.0.0.1/",
+            "http://[::1]/",
+        ])
+        await fetcher.aclose()
+        return infos, calls
+
+    infos, calls = asyncio.run(run())
+    assert calls == []
+    assert all("refusing to fetch" in info.error for info in infos)
+
+
+def test_waiters_get_an_error_when_the_fetch_is_cancelled(tmp_path):
+    async def run():
+        fetcher, _ = _fetcher(tmp_path, delay=10)
+        waiter = asyncio.ensure_future(fetcher.fetch(URL))
+        await asyncio.sleep(0.05)
+        await fetcher.aclose()
+        return await waiter
+
+    info = asyncio.run(run())
+    assert info.error == "cancelled"
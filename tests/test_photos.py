@@ -0,0 +1,17 @@
+from photos import PhotoStore
+
+
+def test_analysis_is_kept_per_chat_and_bytes_are_shared(tmp_path):
+    store = PhotoStore(str(tmp_path))
+    first = store.put(b"same screenshot", "file-a")
+    store.set_analysis(first, 1, "A chart of chat 1's spending")
+
+    second = store.put(b"same screenshot", "file-b")
+    assert second == first
+    assert store.stats()["photos"] == 1
+    assert store.analysis(second, 2) is None
+    assert store.analysis(first, 1)["text"] == "A chart of chat 1's spending"
+
+    # Survives a reload
+    assert PhotoStore(str(tmp_path)).analysis(first, 2) is None
+    assert PhotoStore(str(tmp_path)).analysis(first, 1)["text"] == "A chart of chat 1's spending"
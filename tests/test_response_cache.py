@@ -0,0 +1,36 @@
+from response_cache import is_cacheable_turn, is_read_query
+
+
+def test_list_questions_are_read_queries():
+    for text in (
+        "what's unread?",
+        "What should I read next?",
+        "how many articles do I have",
+        "show my reading list",
+        "any videos tagged rust?",
+    ):
+        assert is_read_query(text), text
+
+
+def test_other_questions_are_not_read_queries():
+    for text in (
+        "what time is it",
+        "what do you think about rust?",
+        "what about the second one?",
+        "which is better?",
+        "any thoughts?",
+        "recommend a good book on databases",
+        "what's unread? also mark the first one done",
+    ):
+        assert not is_read_query(text), text
+
+
+def test_only_turns_that_read_the_list_are_cacheable():
+    assert is_cacheable_turn(["mcp__reading_list__list_items"])
+    assert is_cacheable_turn(["mcp__reading_list__search", "WebFetch"])
+    # Answered from context or general knowledge
+    assert not is_cacheable_turn([])
+    assert not is_cacheable_turn(["WebFetch"])
+    assert not is_cacheable_turn(["mcp__scheduler__cron_list"])
+    # Changed something
+    assert not is_cacheable_turn(["mcp__reading_list__list_items", "mcp__reading_list__mark_read"])
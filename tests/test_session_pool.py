@@ -0,0 +1,51 @@
+import asyncio
+
+from session_pool import SessionPool
+
+
+class FakeClient:
+    def __init__(self):
+        self.disconnected = False
+
+    async def disconnect(self):
+        self.disconnected = True
+
+
+def session(busy=False):
+    return {'client': FakeClient(), 'turn_count': 0, 'busy': busy}
+
+
+def test_new_session_is_not_evicted_when_all_others_are_busy():
+    async def run():
+        pool = SessionPool(max_size=2)
+        pool['a'] = session(busy=True)
+        pool['b'] = session(busy=True)
+        newcomer = session()
+        pool['c'] = newcomer
+
+        assert pool['c'] is newcomer
+        assert len(pool) == 3  # over capacity until a turn ends
+        await asyncio.sleep(0)
+        assert not newcomer['client'].disconnected
+
+        # Once a turn ends the pool trims back down, oldest idle first
+        pool.release(pool.peek('a'))
+        await asyncio.sleep(0)
+        assert len(pool) == 2
+        assert 'a' not in pool and 'c' in pool
+
+    asyncio.run(run())
+
+
+def test_least_recently_used_idle_session_is_evicted():
+    async def run():
+        pool = SessionPool(max_size=2)
+        pool['a'] = session()
+        pool['b'] = session()
+        pool['a']  # touch
+        pool['c'] = session()
+        assert 'b' not in pool
+        assert 'a' in pool and 'c' in pool
+        await pool.close()
+
+    asyncio.run(run())
@@ -0,0 +1,31 @@
+from reading_list.shards import ShardManager
+from reading_list.types import ReadingItem
+
+
+def test_leased_shard_stays_open_past_max_open(tmp_path):
+    shards = ShardManager(str(tmp_path), max_open=1)
+    try:
+        with shards.lease(1) as a:
+            shards.get(2)
+            assert shards.open_count() == 2
+            a.add_item(ReadingItem(url="https://example.com/a"))
+        # Released: now it can be evicted
+        shards.get(3)
+        assert shards.open_count() == 1
+        assert shards.get(1).count() == 1
+    finally:
+        shards.close_all()
+
+
+def test_unleased_shards_are_evicted_least_recently_used_first(tmp_path):
+    shards = ShardManager(str(tmp_path), max_open=2)
+    try:
+        first = shards.get(1)
+        shards.get(2)
+        shards.get(1)
+        shards.get(3)
+        assert shards.open_count() == 2
+        # 2 was closed; 1 is still the same open store
+        assert shards.get(1) is first
+    finally:
+        shards.close_all()
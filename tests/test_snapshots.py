@@ -0,0 +1,49 @@
+import asyncio
+
+import httpx
+
+from reading_list.metadata import MetadataCache, MetadataFetcher
+from reading_list.shards import ShardManager
+from reading_list.snapshots import SnapshotPipeline, SnapshotStore
+from reading_list.types import ReadingItem
+from reading_list.urls import canonicalize_url
+
+URL = "http://93.184.216.34/essay"  # a public address, so no DNS lookup is needed
+PAGE = (
+    "<html><head><title>An essay</title></head><body><article>"
+    + "<p>" + "word " * 500 + "</p>"
+    + "</article></body></html>"
+)
+
+
+def test_pipeline_estimates_items_and_fills_the_metadata_cache(tmp_path):
+    async def handler(request):
+        # Snapshot fetches don't hold the slots metadata lookups use
+        assert fetcher._semaphore._value == 1
+        return httpx.Response(200, headers={"content-type": "text/html"}, text=PAGE)
+
+    fetcher = MetadataFetcher(
+        cache=MetadataCache(str(tmp_path / "meta")), concurrency=1, transport=httpx.MockTransport(handler)
+    )
+    shards = ShardManager(str(tmp_path / "data"))
+
+    async def run():
+        pipeline = SnapshotPipeline(shards.lease, lambda: fetcher, SnapshotStore(str(tmp_path / "snap")))
+        pipeline.attach(shards)
+        await pipeline.start()
+        item = shards.get(1).add_item(ReadingItem(url=URL))
+        for _ in range(200):
+            if pipeline.processed or pipeline.failed or pipeline.skipped:
+                break
+            await asyncio.sleep(0.02)
+        await pipeline.stop()
+        await fetcher.aclose()
+        return item, pipeline
+
+    try:
+        item, pipeline = asyncio.run(run())
+        assert (pipeline.processed, pipeline.failed) == (1, 0)
+        assert shards.get(1).get_estimate(item.id) == 3
+        assert fetcher.cache.get(canonicalize_url(URL)).title == "An essay"
+    finally:
+        shards.close_all()
@@ -0,0 +1,36 @@
+from datetime import datetime, timedelta, timezone
+
+from reading_list.store import ReadingListStore
+from reading_list.types import ReadingItem
+
+
+def _days_ago(n):
+    return (datetime.now(timezone.utc) - timedelta(days=n)).strftime('%Y-%m-%dT12:00:00Z')
+
+
+def test_rebuild_aggregates_refreshes_the_streak_tracker(tmp_path):
+    store = ReadingListStore(str(tmp_path / "list.db"), tz="UTC")
+    try:
+        items = [store.add_item(ReadingItem(url=f"https://example.com/{i}")) for i in range(3)]
+        tracker = store.streaks
+        listeners = len(store._listeners)
+        assert tracker.current_streak("read").length == 0
+
+        # Changed behind the store's back (e.g. a repaired database)
+        for days_ago, item in enumerate(items):
+            store._conn.execute(
+                "UPDATE items SET status = 'read', read_at = ? WHERE id = ?", (_days_ago(days_ago), item.id)
+            )
+        assert tracker.current_streak("read").length == 0
+
+        store.rebuild_aggregates()
+        assert store.streaks is tracker
+        assert len(store._listeners) == listeners
+        assert tracker.current_streak("read").length == 3
+        assert tracker.longest_streak("read").length == 3
+
+        # Still kept current by its listener afterwards
+        store.mark_read(store.add_item(ReadingItem(url="https://example.com/new")).id, _days_ago(3))
+        assert tracker.current_streak("read").length == 4
+    finally:
+        store.close()
@@ -0,0 +1,86 @@
+import random
+
+import pytest
+
+from scheduler.service import CronService
+from scheduler.timers import AsyncioTimer, JobQueueTimer
+from scheduler.types import CronJob, Schedule
+
+
+class FakeHandle:
+    def __init__(self, live):
+        self._live = live
+        live.add(self)
+
+    def cancel(self):
+        self._live.discard(self)
+
+
+class FakeLoop:
+    """Records call_later handles that haven't been cancelled."""
+
+    def __init__(self):
+        self.live = set()
+
+    def call_later(self, delay, callback):
+        return FakeHandle(self.live)
+
+
+class FakeJob:
+    def __init__(self, live):
+        self._live = live
+        live.add(self)
+
+    def schedule_removal(self):
+        self._live.discard(self)
+
+
+class FakeJobQueue:
+    """Records run_once jobs that haven't been removed."""
+
+    def __init__(self):
+        self.live = set()
+
+    def run_once(self, callback, when, name=None):
+        return FakeJob(self.live)
+
+
+def _asyncio_backend():
+    loop = FakeLoop()
+    return AsyncioTimer(loop), loop.live
+
+
+def _job_queue_backend():
+    queue = FakeJobQueue()
+    return JobQueueTimer(queue), queue.live
+
+
+@pytest.mark.parametrize("backend", [_asyncio_backend, _job_queue_backend])
+def test_random_mutations_leave_one_pending_timer(tmp_path, backend):
+    timer, live = backend()
+    service = CronService(str(tmp_path / "cron_jobs.json"))
+    service.set_timer(timer)
+    service.start()
+    rng = random.Random(25)
+
+    for _ in range(300):
+        ids = list(service.jobs)
+        action = rng.choice(["add", "update", "remove", "enable"] if ids else ["add"])
+        if action == "add":
+            every_ms = rng.randint(1, 600) * 60_000
+            service.add_job(CronJob(id=CronJob.new_id(), name="job", prompt="hi",
+                                    schedule=Schedule(kind="every", every_ms=every_ms)))
+        elif action == "update":
+            every_ms = rng.randint(1, 600) * 60_000
+            service.update_job(rng.choice(ids), schedule=Schedule(kind="every", every_ms=every_ms))
+        elif action == "remove":
+            service.remove_job(rng.choice(ids))
+        else:
+            service.update_job(rng.choice(ids), enabled=rng.random() < 0.5)
+
+        expected = int(any(job.enabled for job in service.jobs.values()))
+        assert len(live) == expected
+        assert service.pending_timers() == expected
+
+    service.stop()
+    assert not live and service.pending_timers() == 0
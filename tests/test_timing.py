@@ -0,0 +1,19 @@
+from reading_list.timing import pick_within
+from reading_list.types import ReadingItem
+
+
+def _candidates(minutes):
+    return [(ReadingItem(url=f"https://example.com/{i}"), m) for i, m in enumerate(minutes)]
+
+
+def test_fuller_pick_beats_more_older_items():
+    # Ten 1-minute items come first, but the single 11-minute one fills the budget
+    candidates = _candidates([1] * 10 + [11])
+    chosen = pick_within(candidates, 11)
+    assert [m for _, m in chosen] == [11]
+
+
+def test_ties_go_to_older_items():
+    candidates = _candidates([5, 5, 5])
+    chosen = pick_within(candidates, 10)
+    assert [item.url for item, _ in chosen] == ["https://example.com/0", "https://example.com/1"]
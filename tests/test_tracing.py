@@ -0,0 +1,22 @@
+import json
+
+import tracing
+
+
+def test_traces_are_buffered_until_flushed(tmp_path, monkeypatch):
+    path = tmp_path / "traces.jsonl"
+    monkeypatch.setattr(tracing, "SAMPLE_RATE", 1.0)
+    monkeypatch.setattr(tracing, "TRACES_PATH", str(path))
+    tracing._pending_traces.clear()
+
+    for i in range(3):
+        with tracing.trace("message", chat_id=i):
+            with tracing.span("agent"):
+                pass
+    assert not path.exists()
+
+    tracing.flush_traces(str(path))
+    traces = [json.loads(line) for line in path.read_text().splitlines()]
+    assert [t["chat_id"] for t in traces] == [0, 1, 2]
+    assert [s["stage"] for s in traces[0]["spans"]] == ["agent", "message"]
+    assert not tracing._pending_traces
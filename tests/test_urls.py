@@ -0,0 +1,37 @@
+import pytest
+
+from reading_list import shards
+from reading_list.store import ReadingListStore
+from reading_list.tools import add_item
+from reading_list.urls import canonicalize_url
+
+
+def test_canonicalize_url():
+    assert canonicalize_url("http://www.example.com/a/?utm_source=x&b=2&a=1#top") == "https://example.com/a?a=1&b=2"
+    assert canonicalize_url("https://youtu.be/dQw4w9WgXcQ") == "https://youtube.com/watch?v=dQw4w9WgXcQ"
+    assert canonicalize_url("example.com:8080/x") == "https://example.com:8080/x"
+
+
+@pytest.mark.parametrize("url", ["http://example.com:99999/", "http://example.com:abc/", "http://[::1/"])
+def test_unparseable_url_raises_value_error(url):
+    with pytest.raises(ValueError, match="Invalid URL"):
+        canonicalize_url(url)
+
+
+def test_store_keeps_unparseable_url_as_given(tmp_path):
+    store = ReadingListStore(str(tmp_path / "list.db"))
+    try:
+        assert store.find_by_url("http://example.com:99999/") is None
+    finally:
+        store.close()
+
+
+def test_add_item_rejects_invalid_url(tmp_path, monkeypatch):
+    manager = shards.ShardManager(str(tmp_path))
+    monkeypatch.setattr(shards, "_shard_manager", manager)
+    try:
+        assert add_item(1, "http://example.com:99999/post").startswith("Invalid URL")
+        assert manager.get(1).count() == 0
+        assert add_item(1, "https://example.com/post").startswith("Added")
+    finally:
+        manager.close_all()
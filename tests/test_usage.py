@@ -0,0 +1,20 @@
+import asyncio
+import json
+
+from usage import UsageTracker
+
+
+def test_turns_are_written_behind_and_on_stop(tmp_path):
+    path = tmp_path / "usage.json"
+
+    async def run():
+        tracker = UsageTracker(str(path), flush_delay=60)
+        for _ in range(3):
+            tracker.record(7, {"input_tokens": 100, "output_tokens": 10}, 0.01, 500)
+        assert not path.exists()
+        await tracker.stop()
+
+    asyncio.run(run())
+    totals = json.loads(path.read_text())["chats"]["7"]
+    assert (totals["turns"], totals["input_tokens"], totals["duration_ms"]) == (3, 300, 1500)
+    assert UsageTracker(str(path)).get(7)["turns"] == 3
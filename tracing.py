@@ -0,0 +1,268 @@
+"""
+Lightweight latency tracing for the message hot path.
+
+A trace covers one unit of work (a Telegram update, a cron job) and is
+made of named spans ("photo.download", "agent.query", "tool.<name>").
+Span durations feed per-stage summaries (count, sum, p50/p95/p99 over a
+window of recent samples), exported as Prometheus text to a file and,
+optionally, an HTTP endpoint. Sampled traces are also appended to a
+JSONL file; they are buffered in memory and written from a worker
+thread every TRACE_FLUSH_INTERVAL, so ending a trace never touches the
+disk. Unsampled traces cost one random() call and make every span a
+no-op.
+"""
+
+import asyncio
+import contextvars
+import json
+import logging
+import os
+import random
+import tempfile
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Deque, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_RATE = float(os.getenv('TRACE_SAMPLE_RATE', 0.05))
+TRACES_PATH = os.getenv('TRACE_FILE', "traces.jsonl")
+METRICS_PATH = os.getenv('TRACE_METRICS_FILE', "metrics.prom")
+METRICS_PORT = int(os.getenv('TRACE_METRICS_PORT', 0))  # 0 disables the endpoint
+EXPORT_INTERVAL = 30          # seconds between metrics file writes
+TRACE_FLUSH_INTERVAL = 5      # seconds between trace file writes
+MAX_PENDING_TRACES = 1000     # buffered traces; the oldest are dropped beyond this
+WINDOW = 2048                 # recent samples kept per stage for quantiles
+MAX_TRACES_BYTES = 5 * 1024 * 1024
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+class StageStats:
+    """Running count and sum plus a window of recent durations for one stage."""
+
+    def __init__(self, window: int = WINDOW):
+        self.count = 0
+        self.total = 0.0
+        self.samples: Deque[float] = deque(maxlen=window)
+
+    def add(self, seconds: float):
+        self.count += 1
+        self.total += seconds
+        self.samples.append(seconds)
+
+    def quantiles(self) -> Dict[float, float]:
+        if not self.samples:
+            return {q: 0.0 for q in QUANTILES}
+        ordered = sorted(self.samples)
+        last = len(ordered) - 1
+        return {q: ordered[min(last, int(q * len(ordered)))] for q in QUANTILES}
+
+
+class Trace:
+    """Spans recorded for one sampled unit of work."""
+
+    def __init__(self, name: str, attrs: Optional[dict] = None):
+        self.name = name
+        self.attrs = attrs or {}
+        self.started_at = time.time()
+        self._start = time.perf_counter()
+        self.spans: List[dict] = []
+
+    def add(self, stage: str, seconds: float, start: float):
+        self.spans.append({
+            "stage": stage,
+            "offset_ms": round((start - self._start) * 1000, 2),
+            "ms": round(seconds * 1000, 2)
+        })
+        STAGES.setdefault(stage, StageStats()).add(seconds)
+
+    def to_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "started_at": self.started_at,
+            "ms": round((time.perf_counter() - self._start) * 1000, 2),
+            **self.attrs,
+            "spans": self.spans
+        }
+
+
+# Per-stage stats across all sampled traces: {stage: StageStats}
+STAGES: Dict[str, StageStats] = {}
+
+# Finished traces as JSON lines, waiting for flush_traces()
+_pending_traces: Deque[str] = deque(maxlen=MAX_PENDING_TRACES)
+
+_current: contextvars.ContextVar[Optional[Trace]] = contextvars.ContextVar("trace", default=None)
+
+
+def current_trace() -> Optional[Trace]:
+    """The trace active in this context, or None (not started or not sampled)."""
+    return _current.get()
+
+
+@contextmanager
+def activate(trace: Optional[Trace]):
+    """Make an existing trace current, e.g. in a worker task handling its message."""
+    token = _current.set(trace)
+    try:
+        yield trace
+    finally:
+        _current.reset(token)
+
+
+@contextmanager
+def trace(name: str, **attrs):
+    """
+    Start a trace, sampled at TRACE_SAMPLE_RATE. The whole trace is
+    recorded as a stage of its own name and written out when it ends.
+    """
+    if random.random() >= SAMPLE_RATE:
+        with activate(None):
+            yield None
+        return
+
+    t = Trace(name, attrs)
+    with activate(t):
+        start = time.perf_counter()
+        try:
+            yield t
+        finally:
+            t.add(name, time.perf_counter() - start, start)
+            _write_trace(t)
+
+
+@contextmanager
+def span(stage: str):
+    """Time a block as a stage of the current trace (no-op when unsampled)."""
+    t = _current.get()
+    if t is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        t.add(stage, time.perf_counter() - start, start)
+
+
+def record(stage: str, seconds: float, start: Optional[float] = None):
+    """Record a stage timed by the caller (perf_counter start, if known)."""
+    t = _current.get()
+    if t is not None:
+        t.add(stage, seconds, start if start is not None else time.perf_counter() - seconds)
+
+
+def _write_trace(t: Trace):
+    if TRACES_PATH:
+        _pending_traces.append(json.dumps(t.to_dict()))
+
+
+def flush_traces(path: str = TRACES_PATH):
+    """Append buffered traces to path. Blocking; the exporter runs it in a thread."""
+    lines = []
+    while _pending_traces:
+        lines.append(_pending_traces.popleft())
+    if not lines or not path:
+        return
+    try:
+        if os.path.exists(path) and os.path.getsize(path) > MAX_TRACES_BYTES:
+            os.replace(path, path + ".1")
+        with open(path, 'a') as f:
+            f.write("\n".join(lines) + "\n")
+    except Exception as e:
+        logger.error(f"Error writing traces: {e}")
+
+
+# ------------------------------------------------------------
+# Export
+# ------------------------------------------------------------
+
+def metrics_text() -> str:
+    """Per-stage latency summaries in Prometheus text format."""
+    lines = [
+        "# HELP readingbuddy_stage_seconds Latency of each hot-path stage",
+        "# TYPE readingbuddy_stage_seconds summary"
+    ]
+    for stage, stats in sorted(STAGES.items()):
+        label = stage.replace("\\", "\\\\").replace('"', '\\"')
+        for q, value in stats.quantiles().items():
+            lines.append(f'readingbuddy_stage_seconds{{stage="{label}",quantile="{q}"}} {value:.6f}')
+        lines.append(f'readingbuddy_stage_seconds_sum{{stage="{label}"}} {stats.total:.6f}')
+        lines.append(f'readingbuddy_stage_seconds_count{{stage="{label}"}} {stats.count}')
+    return "\n".join(lines) + "\n"
+
+
+def write_metrics(path: str = METRICS_PATH):
+    """Atomically write metrics_text() to path (for a textfile collector or a human)."""
+    dir_path = os.path.dirname(path) or '.'
+    fd, temp_path = tempfile.mkstemp(dir=dir_path, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            f.write(metrics_text())
+        os.rename(temp_path, path)
+    except Exception as e:
+        logger.error(f"Error writing metrics: {e}")
+        if os.path.exists(temp_path):
+            os.unlink(temp_path)
+
+
+async def _serve_metrics(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+    try:
+        await reader.readline()
+        body = metrics_text().encode()
+        writer.write(
+            b"HTTP/1.1 200 OK\r\nContent-Type: text/plain; version=0.0.4\r\n"
+            + f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode()
+            + body
+        )
+        await writer.drain()
+    finally:
+        writer.close()
+
+
+class MetricsExporter:
+    """
+    Writes the metrics file periodically, flushes buffered traces, and
+    serves /metrics if a port is set.
+    """
+
+    def __init__(self, path: str = METRICS_PATH, port: int = METRICS_PORT, interval: float = EXPORT_INTERVAL):
+        self.path = path
+        self.port = port
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+        self._trace_task: Optional[asyncio.Task] = None
+        self._server: Optional[asyncio.base_events.Server] = None
+
+    async def _write_periodically(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            write_metrics(self.path)
+
+    async def _flush_traces_periodically(self):
+        while True:
+            await asyncio.sleep(TRACE_FLUSH_INTERVAL)
+            await asyncio.to_thread(flush_traces)
+
+    async def start(self):
+        if self.path:
+            self._task = asyncio.ensure_future(self._write_periodically())
+        if TRACES_PATH:
+            self._trace_task = asyncio.ensure_future(self._flush_traces_periodically())
+        if self.port:
+            self._server = await asyncio.start_server(_serve_metrics, "127.0.0.1", self.port)
+            logger.info(f"Serving metrics on http://127.0.0.1:{self.port}/metrics")
+
+    async def stop(self):
+        for task in (self._task, self._trace_task):
+            if task is not None:
+                task.cancel()
+        self._task = self._trace_task = None
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+        if self.path:
+            write_metrics(self.path)
+        await asyncio.to_thread(flush_traces)
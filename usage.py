@@ -0,0 +1,135 @@
+"""Per-turn token usage and cost accounting for agent sessions."""
+
+import asyncio
+import json
+import logging
+import os
+import tempfile
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_USAGE_PATH = "usage.json"
+FLUSH_DELAY = 5.0  # seconds to coalesce turns before writing
+
+# Token fields reported in SDK usage dicts
+TOKEN_FIELDS = (
+    "input_tokens",
+    "output_tokens",
+    "cache_read_input_tokens",
+    "cache_creation_input_tokens"
+)
+
+
+def context_tokens(usage: Optional[dict]) -> int:
+    """
+    Size of the context one API call saw, from its usage dict.
+
+    Input, cached and cache-creation tokens are everything that was sent;
+    output tokens join the context for the next call.
+    """
+    if not usage:
+        return 0
+    return sum(int(usage.get(field) or 0) for field in TOKEN_FIELDS)
+
+
+class UsageTracker:
+    """
+    Running per-chat totals of tokens, cost and turns.
+
+    Totals are kept in memory and written behind to a JSON file so they
+    survive restarts: turns within flush_delay of each other share one
+    atomic write, done in a worker thread. Call stop() on shutdown to
+    write the last ones.
+    """
+
+    def __init__(self, path: str = DEFAULT_USAGE_PATH, flush_delay: float = FLUSH_DELAY):
+        self.path = path
+        self.flush_delay = flush_delay
+        self.totals: Dict[str, Dict[str, Any]] = self._load()
+        self._dirty = False
+        self._flush_task: Optional[asyncio.Task] = None
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        if not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, 'r') as f:
+                return json.load(f).get("chats", {})
+        except Exception as e:
+            logger.error(f"Error loading usage totals: {e}")
+            return {}
+
+    def _write(self, text: str):
+        dir_path = os.path.dirname(self.path) or '.'
+        fd, temp_path = tempfile.mkstemp(dir=dir_path, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                f.write(text)
+            os.rename(temp_path, self.path)
+        except Exception as e:
+            logger.error(f"Error saving usage totals: {e}")
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+
+    def _snapshot(self) -> str:
+        return json.dumps({"chats": self.totals}, indent=2)
+
+    def _changed(self):
+        self._dirty = True
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            # No event loop (scripts): write through
+            self._dirty = False
+            self._write(self._snapshot())
+            return
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.ensure_future(self._flush_later())
+
+    async def _flush_later(self):
+        await asyncio.sleep(self.flush_delay)
+        await self.flush()
+
+    async def flush(self):
+        """Write the totals now if they changed."""
+        if not self._dirty:
+            return
+        # Serialize on the loop, so the worker thread sees a consistent snapshot
+        text = self._snapshot()
+        self._dirty = False
+        await asyncio.to_thread(self._write, text)
+
+    async def stop(self):
+        """Write anything pending."""
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            self._flush_task = None
+        await self.flush()
+
+    def record(self, chat_id, usage: Optional[dict], cost_usd: Optional[float], duration_ms: int = 0) -> dict:
+        """
+        Add one agent turn to a chat's totals.
+
+        Args:
+            chat_id: Chat the turn belongs to
+            usage: Usage dict from the turn's ResultMessage
+            cost_usd: total_cost_usd from the ResultMessage
+            duration_ms: Wall time of the turn
+
+        Returns:
+            The chat's updated totals
+        """
+        totals = self.totals.setdefault(str(chat_id), {
+            "turns": 0, "cost_usd": 0.0, "duration_ms": 0, **{field: 0 for field in TOKEN_FIELDS}
+        })
+        totals["turns"] += 1
+        totals["cost_usd"] = round(totals["cost_usd"] + (cost_usd or 0.0), 6)
+        totals["duration_ms"] += duration_ms or 0
+        for field in TOKEN_FIELDS:
+            totals[field] += int((usage or {}).get(field) or 0)
+        self._changed()
+        return totals
+
+    def get(self, chat_id) -> Optional[dict]:
+        return self.totals.get(str(chat_id))